@@ -0,0 +1,415 @@
+# backend/conftest.py
+"""
+Configuration commune des tests (python -m pytest depuis backend/).
+
+Les tests n'utilisent ni Supabase ni LLM réels :
+- `src.supabase_client` est remplacé par FakeSupabase, une base en mémoire qui
+  couvre le sous-ensemble de l'API postgrest utilisé par les services ;
+- `shared.llm` est remplacé par des modèles factices (FakeLessonLLM) ;
+- `src.composio_client` est remplacé par des clients Composio factices, que les
+  tests configurent (composio_fetch.tools.execute).
+"""
+import asyncio
+import copy
+import json
+import os
+import re
+import sys
+import types
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+# Script manuel (python test_streaming.py) : il appelle le vrai LLM
+collect_ignore = ["test_streaming.py"]
+
+# Checkpoints des graphs en mémoire : pas de fichiers sqlite dans le dépôt
+os.environ.setdefault("CHECKPOINT_BACKEND", "memory")
+
+
+# --- Supabase en mémoire ---
+
+# (table parente, table embarquée) -> (colonne parente, colonne embarquée, liste ?)
+RELATIONS: Dict[Tuple[str, str], Tuple[str, str, bool]] = {
+    ("quizzes", "quiz_questions"): ("id", "quiz_id", True),
+    ("quiz_questions", "quiz_answers"): ("id", "question_id", True),
+    ("formations", "formation_modules"): ("id", "formation_id", True),
+    ("formation_modules", "modules"): ("module_id", "id", False),
+    ("modules", "submodules"): ("id", "module_id", True),
+}
+
+
+def _split_columns(select: str) -> List[str]:
+    parts, depth, current = [], 0, ""
+    for char in select:
+        if char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+class FakeResponse:
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    def __init__(self, db: "FakeSupabase", table: str):
+        self.db = db
+        self.table = table
+        self.operation = "select"
+        self.columns = "*"
+        self.payload: Any = None
+        self.filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self.orders: List[Tuple[str, bool, Optional[str]]] = []
+        self.bounds: Optional[Tuple[int, int]] = None
+        self.max_count: Optional[int] = None
+        self.count_mode: Optional[str] = None
+        self.is_single = False
+        self._negate = False
+
+    # --- opérations ---
+    def select(self, columns: str = "*", count: Optional[str] = None):
+        self.columns, self.count_mode = " ".join(columns.split()), count
+        return self
+
+    def insert(self, payload):
+        self.operation, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict: str = "id", **kwargs):
+        self.operation, self.payload = "upsert", (payload, on_conflict.split(","))
+        return self
+
+    def update(self, payload):
+        self.operation, self.payload = "update", payload
+        return self
+
+    def delete(self):
+        self.operation = "delete"
+        return self
+
+    # --- filtres ---
+    @property
+    def not_(self):
+        self._negate = True
+        return self
+
+    def _filter(self, predicate):
+        negate, self._negate = self._negate, False
+        self.filters.append((lambda row: not predicate(row)) if negate else predicate)
+        return self
+
+    def eq(self, column, value):
+        return self._filter(lambda row: row.get(column) == value)
+
+    def neq(self, column, value):
+        return self._filter(lambda row: row.get(column) != value)
+
+    def in_(self, column, values):
+        values = list(values)
+        return self._filter(lambda row: row.get(column) in values)
+
+    def is_(self, column, value):
+        expected = None if value in (None, "null") else value
+        return self._filter(lambda row: row.get(column) is expected)
+
+    def lt(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and row.get(column) < value)
+
+    def gt(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and row.get(column) > value)
+
+    def match(self, values: Dict[str, Any]):
+        for column, value in values.items():
+            self.eq(column, value)
+        return self
+
+    # --- forme du résultat ---
+    def order(self, column, *, desc=False, foreign_table=None, **kwargs):
+        self.orders.append((column, desc, foreign_table))
+        return self
+
+    def limit(self, count, **kwargs):
+        self.max_count = count
+        return self
+
+    def range(self, start, end, **kwargs):
+        self.bounds = (start, end)
+        return self
+
+    def single(self):
+        self.is_single = True
+        return self
+
+    def _embed(self, table: str, row: Dict[str, Any], columns: str) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for column in _split_columns(columns):
+            embedded = re.match(r"^(\w+)\((.*)\)$", column, re.S)
+            if embedded:
+                child, child_columns = embedded.groups()
+                parent_col, child_col, many = RELATIONS[(table, child)]
+                children = [
+                    self._embed(child, child_row, child_columns)
+                    for child_row in self.db.tables.get(child, [])
+                    if child_row.get(child_col) == row.get(parent_col)
+                ]
+                out[child] = children if many else (children[0] if children else None)
+            elif column == "*":
+                out.update(copy.deepcopy(row))
+            else:
+                out[column] = copy.deepcopy(row.get(column))
+        return out
+
+    def _sort_nested(self, rows: List[Dict[str, Any]], path: List[str], column: str, desc: bool):
+        if not path:
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+            return
+        for row in rows:
+            self._sort_nested(row.get(path[0]) or [], path[1:], column, desc)
+
+    def execute(self) -> FakeResponse:
+        self.db.calls.append((self.table, self.operation))
+        rows = self.db.tables.setdefault(self.table, [])
+        matches = [row for row in rows if all(f(row) for f in self.filters)]
+
+        if self.operation == "insert":
+            payload = self.payload if isinstance(self.payload, list) else [self.payload]
+            inserted = [self.db.insert_row(self.table, row) for row in payload]
+            return FakeResponse(copy.deepcopy(inserted))
+        if self.operation == "upsert":
+            payload, keys = self.payload
+            payload = payload if isinstance(payload, list) else [payload]
+            result = []
+            for new_row in payload:
+                existing = next((row for row in rows if all(row.get(k) == new_row.get(k) for k in keys)), None)
+                if existing is not None:
+                    existing.update(new_row)
+                    result.append(existing)
+                else:
+                    result.append(self.db.insert_row(self.table, new_row))
+            return FakeResponse(copy.deepcopy(result))
+        if self.operation == "update":
+            for row in matches:
+                row.update(self.payload)
+            return FakeResponse(copy.deepcopy(matches))
+        if self.operation == "delete":
+            self.db.tables[self.table] = [row for row in rows if row not in matches]
+            return FakeResponse(copy.deepcopy(matches))
+
+        data = [self._embed(self.table, row, self.columns) for row in matches]
+        for column, desc, foreign_table in reversed(self.orders):
+            self._sort_nested(data, foreign_table.split(".") if foreign_table else [], column, desc)
+        count = len(data) if self.count_mode else None
+        if self.bounds is not None:
+            data = data[self.bounds[0]:self.bounds[1] + 1]
+        # Comme PostgREST : une requête ne renvoie jamais plus de max_rows lignes
+        data = data[:self.db.max_rows]
+        if self.max_count is not None:
+            data = data[:self.max_count]
+        if self.is_single:
+            data = data[0] if data else None
+        return FakeResponse(data, count)
+
+
+class FakeRPC:
+    def __init__(self, db: "FakeSupabase", name: str, params: Dict[str, Any]):
+        self.db, self.name, self.params = db, name, params
+
+    def execute(self) -> FakeResponse:
+        self.db.calls.append((self.name, "rpc"))
+        self.db.rpc_calls.append((self.name, self.params))
+        handler = self.db.rpc_handlers.get(self.name)
+        if handler is None:
+            return FakeResponse(None)
+        return FakeResponse(handler(self.db, self.params))
+
+
+class FakeSupabase:
+    """Base en mémoire : `tables` (listes de lignes) et fonctions RPC enregistrées."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.rpc_handlers: Dict[str, Callable[["FakeSupabase", Dict[str, Any]], Any]] = {}
+        self.rpc_calls: List[Tuple[str, Dict[str, Any]]] = []
+        self.calls: List[Tuple[str, str]] = []
+        self.max_rows = 1000
+
+    def insert_row(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        rows = self.tables.setdefault(table, [])
+        row = dict(row)
+        row.setdefault("id", max((r.get("id") or 0 for r in rows), default=0) + 1)
+        rows.append(row)
+        return row
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> FakeRPC:
+        return FakeRPC(self, name, params or {})
+
+
+def insert_quiz(db: FakeSupabase, module_id: int, quiz: Dict[str, Any], generation_key: Optional[str] = None) -> int:
+    """Comme save_module_quiz (migrations/009) : désactive l'ancien quiz puis insère."""
+    if generation_key is not None:
+        for row in db.tables.get("quizzes", []):
+            if row["module_id"] == module_id and row.get("generation_key") == generation_key:
+                return row["id"]
+    for row in db.tables.get("quizzes", []):
+        if row["module_id"] == module_id:
+            row["is_active"] = False
+    quiz_row = db.insert_row("quizzes", {
+        "module_id": module_id,
+        "title": quiz["title"],
+        "description": quiz["description"],
+        "passing_score": 70,
+        "max_attempts": 3,
+        "is_active": True,
+        "generation_key": generation_key,
+    })
+    for question_index, question in enumerate(quiz["questions"]):
+        question_row = db.insert_row("quiz_questions", {
+            "quiz_id": quiz_row["id"],
+            "question_text": question["question_text"],
+            "question_type": question["question_type"],
+            "points": 1,
+            "order_index": question_index,
+        })
+        for answer_index, answer in enumerate(question["answers"]):
+            db.insert_row("quiz_answers", {
+                "question_id": question_row["id"],
+                "answer_text": answer["answer_text"],
+                "is_correct": answer["is_correct"],
+                "order_index": answer_index,
+            })
+    return quiz_row["id"]
+
+
+fake_supabase = FakeSupabase()
+_supabase_module = types.ModuleType("src.supabase_client")
+_supabase_module.supabase = fake_supabase
+sys.modules["src.supabase_client"] = _supabase_module
+
+
+# --- LLM factices ---
+
+QUIZ_JSON = json.dumps({
+    "title": "Quiz",
+    "description": "Quiz du module",
+    "questions": [
+        {
+            "question_text": f"Question {i}",
+            "question_type": "multiple_choice",
+            "explanation": "",
+            "answers": [
+                {"answer_text": "Bonne réponse", "is_correct": True},
+                {"answer_text": "Mauvaise réponse", "is_correct": False},
+            ],
+        }
+        for i in range(3)
+    ],
+})
+
+
+# Structure de formation pour les graphs de génération : modules de 2, 1 et 2 leçons
+COURSE_STRUCTURE = {
+    "title": "Formation",
+    "modules": [
+        {
+            "id": f"module_{module}",
+            "title": f"Module {module}",
+            "lessons": [
+                {"id": f"lesson_{lesson}", "title": f"Leçon {lesson}", "description": ""}
+                for lesson in lessons
+            ],
+        }
+        for module, lessons in [(1, [1, 2]), (2, [3]), (3, [4, 5])]
+    ],
+}
+
+
+class FakeLessonLLM(BaseChatModel):
+    """Renvoie une leçon HTML (ou un quiz JSON), token par token en streaming."""
+
+    streaming: bool = True
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-lesson-llm"
+
+    def _text(self, messages) -> str:
+        prompt = str(messages[-1].content)
+        return QUIZ_JSON if "quiz" in prompt.lower() else "<h2>Leçon</h2><p>Contenu de la leçon.</p>"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._text(messages)))])
+
+    def with_structured_output(self, schema, **kwargs):
+        # Les tests n'exécutent pas les chaînes à sortie structurée (create_structure)
+        return RunnableLambda(lambda _: None)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        text = self._text(messages)
+        for start in range(0, len(text), 8):
+            await asyncio.sleep(0)
+            token = text[start:start + 8]
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+_llm_module = types.ModuleType("shared.llm")
+_llm_module.llm = FakeLessonLLM()
+_llm_module.llm_not_streaming = FakeLessonLLM(streaming=False)
+_llm_module.llm_cached = FakeLessonLLM()
+_llm_module.llm_response_cache = None
+_llm_module.llm_model_identifier = "fake/lesson-llm"
+_llm_module.get_llm = lambda *args, **kwargs: FakeLessonLLM()
+sys.modules["shared.llm"] = _llm_module
+
+
+# --- Composio factice ---
+
+class APITimeoutError(Exception):
+    """Équivalent de composio_client.APITimeoutError (délai de requête dépassé)."""
+
+
+def _composio_unavailable(*args, **kwargs):
+    raise RuntimeError("Composio n'est pas disponible dans les tests")
+
+
+_composio_module = types.ModuleType("src.composio_client")
+_composio_module.APITimeoutError = APITimeoutError
+_composio_module.composio = types.SimpleNamespace(tools=types.SimpleNamespace(execute=_composio_unavailable))
+_composio_module.composio_fetch = types.SimpleNamespace(tools=types.SimpleNamespace(execute=_composio_unavailable))
+_composio_module.COMPOSIO_NOTION_AUTH_CONFIG_ID = None
+_composio_module.TOOLKIT_AUTH_CONFIGS = {}
+sys.modules["src.composio_client"] = _composio_module
+
+
+@pytest.fixture
+def supabase():
+    """Base Supabase en mémoire, vide au début de chaque test."""
+    fake_supabase.reset()
+    yield fake_supabase
+    fake_supabase.reset()
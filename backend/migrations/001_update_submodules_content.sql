@@ -0,0 +1,15 @@
+-- Sauvegarde groupée du contenu HTML des leçons générées (content graph).
+-- p_lessons : [{"id": 42, "content": "<h2>...</h2>"}, ...]
+create or replace function public.update_submodules_content(p_lessons jsonb)
+returns integer
+language sql
+as $$
+  with updated as (
+    update public.submodules s
+    set content = l.content
+    from jsonb_to_recordset(p_lessons) as l(id bigint, content text)
+    where s.id = l.id
+    returning s.id
+  )
+  select count(*)::integer from updated;
+$$;
@@ -0,0 +1,47 @@
+-- Sauvegarde d'un quiz complet (quiz, questions, réponses) en un seul appel et une
+-- seule transaction.
+-- p_quiz : {"title": "...", "description": "...", "questions": [
+--            {"question_text": "...", "question_type": "multiple_choice", "explanation": "...",
+--             "answers": [{"answer_text": "...", "is_correct": true}, ...]}, ...]}
+create or replace function public.save_module_quiz(
+  p_module_id bigint,
+  p_quiz jsonb,
+  p_passing_score integer default 70,
+  p_max_attempts integer default 3
+)
+returns bigint
+language plpgsql
+as $$
+declare
+  v_quiz_id bigint;
+  v_question jsonb;
+  v_question_index bigint;
+  v_question_id bigint;
+begin
+  insert into public.quizzes (module_id, title, description, passing_score, max_attempts, is_active)
+  values (p_module_id, p_quiz->>'title', p_quiz->>'description', p_passing_score, p_max_attempts, true)
+  returning id into v_quiz_id;
+
+  for v_question, v_question_index in
+    select q.value, q.ordinality - 1
+    from jsonb_array_elements(p_quiz->'questions') with ordinality as q(value, ordinality)
+  loop
+    insert into public.quiz_questions (quiz_id, question_text, question_type, points, order_index, explanation)
+    values (
+      v_quiz_id,
+      v_question->>'question_text',
+      coalesce(v_question->>'question_type', 'multiple_choice'),
+      1,
+      v_question_index,
+      coalesce(v_question->>'explanation', '')
+    )
+    returning id into v_question_id;
+
+    insert into public.quiz_answers (question_id, answer_text, is_correct, order_index)
+    select v_question_id, a.value->>'answer_text', (a.value->>'is_correct')::boolean, a.ordinality - 1
+    from jsonb_array_elements(v_question->'answers') with ordinality as a(value, ordinality);
+  end loop;
+
+  return v_quiz_id;
+end;
+$$;
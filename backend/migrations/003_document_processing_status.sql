@@ -0,0 +1,5 @@
+-- Statut de l'extraction asynchrone du texte des documents uploadés
+-- ('processing' -> 'ready' | 'failed'), suivi via GET /documents/{id}/status.
+alter table public.documents
+  add column if not exists status text not null default 'ready',
+  add column if not exists error text;
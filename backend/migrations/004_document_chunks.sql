@@ -0,0 +1,12 @@
+-- Texte extrait des documents uploadés, découpé en chunks (écrits par lots pendant
+-- l'extraction). documents.contents ne garde plus qu'un aperçu du texte.
+create table if not exists public.document_chunks (
+  id bigint generated always as identity primary key,
+  document_id bigint not null references public.documents(id) on delete cascade,
+  chunk_index integer not null,
+  page_number integer,
+  content text not null,
+  unique (document_id, chunk_index)
+);
+
+alter table public.documents alter column contents drop not null;
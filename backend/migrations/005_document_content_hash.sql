@@ -0,0 +1,21 @@
+-- Dé-duplication des uploads : empreinte sha256 du fichier d'origine, et copie des
+-- chunks d'une extraction existante vers un nouveau document (sans ré-extraction).
+alter table public.documents add column if not exists content_hash text;
+
+create index if not exists documents_content_hash_idx
+  on public.documents (content_hash)
+  where status = 'ready';
+
+create or replace function public.copy_document_chunks(p_source_id bigint, p_target_id bigint)
+returns integer
+language sql
+as $$
+  with copied as (
+    insert into public.document_chunks (document_id, chunk_index, page_number, content)
+    select p_target_id, chunk_index, page_number, content
+    from public.document_chunks
+    where document_id = p_source_id
+    returning 1
+  )
+  select count(*)::integer from copied;
+$$;
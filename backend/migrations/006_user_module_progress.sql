@@ -0,0 +1,98 @@
+-- Projection de la progression : un module est réussi par un utilisateur quand sa
+-- meilleure tentative (score le plus élevé) sur le quiz actif du module est suffisante.
+-- Mise à jour par /quiz/submit (record_module_progress), régénérable depuis les
+-- tentatives (rebuild_user_module_progress, voir src/features/formations/rebuild_progress.py).
+create table if not exists public.user_module_progress (
+  user_id uuid not null,
+  module_id bigint not null,
+  quiz_id bigint not null,
+  score numeric not null,
+  max_score numeric not null,
+  passed boolean not null default true,
+  updated_at timestamptz not null default now(),
+  primary key (user_id, module_id)
+);
+
+create index if not exists user_module_progress_quiz_idx
+  on public.user_module_progress (quiz_id);
+
+-- Enregistre une tentative réussie ; garde le meilleur score du quiz actif.
+create or replace function public.record_module_progress(
+  p_user_id uuid,
+  p_module_id bigint,
+  p_quiz_id bigint,
+  p_score numeric,
+  p_max_score numeric
+)
+returns void
+language sql
+as $$
+  insert into public.user_module_progress (user_id, module_id, quiz_id, score, max_score, passed, updated_at)
+  values (p_user_id, p_module_id, p_quiz_id, p_score, p_max_score, true, now())
+  on conflict (user_id, module_id) do update
+    set quiz_id = excluded.quiz_id,
+        score = excluded.score,
+        max_score = excluded.max_score,
+        passed = true,
+        updated_at = now()
+    where public.user_module_progress.quiz_id <> excluded.quiz_id
+       or public.user_module_progress.score <= excluded.score;
+$$;
+
+-- Régénère la projection depuis user_quiz_attempts (tous les utilisateurs, ou un seul).
+create or replace function public.rebuild_user_module_progress(p_user_id uuid default null)
+returns integer
+language plpgsql
+as $$
+declare
+  v_count integer;
+begin
+  delete from public.user_module_progress
+  where p_user_id is null or user_id = p_user_id;
+
+  with best_attempts as (
+    select distinct on (a.user_id, a.quiz_id)
+      a.user_id, a.quiz_id, a.score, a.max_score, a.passed
+    from public.user_quiz_attempts a
+    where a.completed_at is not null
+      and (p_user_id is null or a.user_id = p_user_id)
+    order by a.user_id, a.quiz_id, a.score desc
+  )
+  insert into public.user_module_progress (user_id, module_id, quiz_id, score, max_score, passed, updated_at)
+  select distinct on (b.user_id, q.module_id)
+    b.user_id, q.module_id, q.id, b.score, b.max_score, true, now()
+  from best_attempts b
+  join public.quizzes q on q.id = b.quiz_id and q.is_active
+  where b.passed
+     or (b.max_score > 0 and b.score::numeric / b.max_score * 100 >= q.passing_score)
+  order by b.user_id, q.module_id, q.id;
+
+  get diagnostics v_count = row_count;
+  return v_count;
+end;
+$$;
+
+-- Un module dont le quiz actif change (nouveau quiz, désactivation) doit être
+-- réussi à nouveau : les lignes liées à un autre quiz sont supprimées.
+create or replace function public.reset_module_progress_on_quiz_change()
+returns trigger
+language plpgsql
+as $$
+begin
+  if new.is_active then
+    delete from public.user_module_progress
+    where module_id = new.module_id and quiz_id <> new.id;
+  else
+    delete from public.user_module_progress
+    where quiz_id = new.id;
+  end if;
+  return new;
+end;
+$$;
+
+drop trigger if exists quizzes_reset_module_progress on public.quizzes;
+create trigger quizzes_reset_module_progress
+  after insert or update of is_active on public.quizzes
+  for each row execute function public.reset_module_progress_on_quiz_change();
+
+select public.rebuild_user_module_progress();
@@ -0,0 +1,52 @@
+-- Enregistre une tentative de quiz déjà notée (tentative + réponses + progression) en
+-- un seul appel et une seule transaction.
+-- Le numéro de tentative est calculé sous un verrou (utilisateur, quiz) : deux
+-- soumissions simultanées ne peuvent pas obtenir le même numéro ni dépasser
+-- p_max_attempts. Si la limite est atteinte, rien n'est écrit et attempt_id est null.
+-- p_responses : [{"question_id": 1, "selected_answer_ids": [3], "is_correct": true,
+--                 "points_earned": 1}, ...]
+create or replace function public.submit_quiz_attempt(
+  p_user_id uuid,
+  p_quiz_id bigint,
+  p_module_id bigint,
+  p_score numeric,
+  p_max_score numeric,
+  p_passed boolean,
+  p_max_attempts integer,
+  p_responses jsonb
+)
+returns table (attempt_id bigint, attempt_number integer)
+language plpgsql
+as $$
+#variable_conflict use_column
+declare
+  v_attempt_id bigint;
+  v_attempt_number integer;
+begin
+  perform pg_advisory_xact_lock(hashtextextended(p_user_id::text || ':' || p_quiz_id::text, 0));
+
+  select coalesce(max(a.attempt_number), 0) + 1
+  into v_attempt_number
+  from public.user_quiz_attempts a
+  where a.user_id = p_user_id and a.quiz_id = p_quiz_id;
+
+  if v_attempt_number > p_max_attempts then
+    return query select null::bigint, v_attempt_number;
+    return;
+  end if;
+
+  insert into public.user_quiz_attempts (user_id, quiz_id, score, max_score, passed, completed_at, attempt_number)
+  values (p_user_id, p_quiz_id, p_score, p_max_score, p_passed, now(), v_attempt_number)
+  returning id into v_attempt_id;
+
+  insert into public.user_quiz_responses (attempt_id, question_id, selected_answer_ids, is_correct, points_earned)
+  select v_attempt_id, r.question_id, r.selected_answer_ids, r.is_correct, r.points_earned
+  from jsonb_populate_recordset(null::public.user_quiz_responses, coalesce(p_responses, '[]'::jsonb)) as r;
+
+  if p_passed then
+    perform public.record_module_progress(p_user_id, p_module_id, p_quiz_id, p_score, p_max_score);
+  end if;
+
+  return query select v_attempt_id, v_attempt_number;
+end;
+$$;
@@ -0,0 +1,97 @@
+-- Un seul quiz actif par module : c'est la règle commune aux lectures
+-- (QuizService), à la projection incrémentale (record_module_progress), à sa
+-- régénération (rebuild_user_module_progress) et au déclencheur de 006.
+
+-- Jusqu'ici save_module_quiz ne désactivait pas l'ancien quiz et les lectures
+-- servaient le plus ancien quiz actif : c'est celui-là qui reste actif, les
+-- doublons plus récents sont désactivés (le déclencheur de 006 efface leur progression).
+update public.quizzes q
+set is_active = false
+where q.is_active
+  and exists (
+    select 1 from public.quizzes older
+    where older.module_id = q.module_id and older.is_active and older.id < q.id
+  );
+
+create unique index if not exists quizzes_one_active_per_module
+  on public.quizzes (module_id)
+  where is_active;
+
+-- Un nouveau quiz remplace le quiz actif du module dans la même transaction.
+create or replace function public.save_module_quiz(
+  p_module_id bigint,
+  p_quiz jsonb,
+  p_passing_score integer default 70,
+  p_max_attempts integer default 3
+)
+returns bigint
+language plpgsql
+as $$
+declare
+  v_quiz_id bigint;
+  v_question jsonb;
+  v_question_index bigint;
+  v_question_id bigint;
+begin
+  perform pg_advisory_xact_lock(hashtextextended('save_module_quiz:' || p_module_id::text, 0));
+
+  update public.quizzes
+  set is_active = false
+  where module_id = p_module_id and is_active;
+
+  insert into public.quizzes (module_id, title, description, passing_score, max_attempts, is_active)
+  values (p_module_id, p_quiz->>'title', p_quiz->>'description', p_passing_score, p_max_attempts, true)
+  returning id into v_quiz_id;
+
+  for v_question, v_question_index in
+    select q.value, q.ordinality - 1
+    from jsonb_array_elements(p_quiz->'questions') with ordinality as q(value, ordinality)
+  loop
+    insert into public.quiz_questions (quiz_id, question_text, question_type, points, order_index, explanation)
+    values (
+      v_quiz_id,
+      v_question->>'question_text',
+      coalesce(v_question->>'question_type', 'multiple_choice'),
+      1,
+      v_question_index,
+      coalesce(v_question->>'explanation', '')
+    )
+    returning id into v_question_id;
+
+    insert into public.quiz_answers (question_id, answer_text, is_correct, order_index)
+    select v_question_id, a.value->>'answer_text', (a.value->>'is_correct')::boolean, a.ordinality - 1
+    from jsonb_array_elements(v_question->'answers') with ordinality as a(value, ordinality);
+  end loop;
+
+  return v_quiz_id;
+end;
+$$;
+
+-- Une tentative réussie sur un quiz qui n'est plus actif ne compte pas :
+-- rebuild_user_module_progress ne la compterait pas non plus.
+create or replace function public.record_module_progress(
+  p_user_id uuid,
+  p_module_id bigint,
+  p_quiz_id bigint,
+  p_score numeric,
+  p_max_score numeric
+)
+returns void
+language sql
+as $$
+  insert into public.user_module_progress (user_id, module_id, quiz_id, score, max_score, passed, updated_at)
+  select p_user_id, q.module_id, q.id, p_score, p_max_score, true, now()
+  from public.quizzes q
+  where q.id = p_quiz_id and q.module_id = p_module_id and q.is_active
+  on conflict (user_id, module_id) do update
+    set quiz_id = excluded.quiz_id,
+        score = excluded.score,
+        max_score = excluded.max_score,
+        passed = true,
+        updated_at = now()
+    where public.user_module_progress.quiz_id <> excluded.quiz_id
+       or public.user_module_progress.score <= excluded.score;
+$$;
+
+-- Réaligne la projection sur la règle du quiz actif unique.
+select public.rebuild_user_module_progress();
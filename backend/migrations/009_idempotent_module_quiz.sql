@@ -0,0 +1,73 @@
+-- Sauvegarde idempotente du quiz d'un module par génération de contenu.
+-- La reprise d'une génération (POST /agent/content/{thread_id}/resume) ré-exécute les
+-- tâches du super-step interrompu, y compris un quiz déjà enregistré : avec la même
+-- p_generation_key (thread_id de la génération), le quiz existant est renvoyé au lieu
+-- d'en créer (et d'en activer) un second.
+alter table public.quizzes add column if not exists generation_key text;
+
+create unique index if not exists quizzes_module_generation_key
+  on public.quizzes (module_id, generation_key)
+  where generation_key is not null;
+
+-- La signature change : l'ancienne version rendrait l'appel RPC ambigu.
+drop function if exists public.save_module_quiz(bigint, jsonb, integer, integer);
+
+create or replace function public.save_module_quiz(
+  p_module_id bigint,
+  p_quiz jsonb,
+  p_passing_score integer default 70,
+  p_max_attempts integer default 3,
+  p_generation_key text default null
+)
+returns bigint
+language plpgsql
+as $$
+declare
+  v_quiz_id bigint;
+  v_question jsonb;
+  v_question_index bigint;
+  v_question_id bigint;
+begin
+  perform pg_advisory_xact_lock(hashtextextended('save_module_quiz:' || p_module_id::text, 0));
+
+  if p_generation_key is not null then
+    select id into v_quiz_id
+    from public.quizzes
+    where module_id = p_module_id and generation_key = p_generation_key;
+
+    if v_quiz_id is not null then
+      return v_quiz_id;
+    end if;
+  end if;
+
+  update public.quizzes
+  set is_active = false
+  where module_id = p_module_id and is_active;
+
+  insert into public.quizzes (module_id, title, description, passing_score, max_attempts, is_active, generation_key)
+  values (p_module_id, p_quiz->>'title', p_quiz->>'description', p_passing_score, p_max_attempts, true, p_generation_key)
+  returning id into v_quiz_id;
+
+  for v_question, v_question_index in
+    select q.value, q.ordinality - 1
+    from jsonb_array_elements(p_quiz->'questions') with ordinality as q(value, ordinality)
+  loop
+    insert into public.quiz_questions (quiz_id, question_text, question_type, points, order_index, explanation)
+    values (
+      v_quiz_id,
+      v_question->>'question_text',
+      coalesce(v_question->>'question_type', 'multiple_choice'),
+      1,
+      v_question_index,
+      coalesce(v_question->>'explanation', '')
+    )
+    returning id into v_question_id;
+
+    insert into public.quiz_answers (question_id, answer_text, is_correct, order_index)
+    select v_question_id, a.value->>'answer_text', (a.value->>'is_correct')::boolean, a.ordinality - 1
+    from jsonb_array_elements(v_question->'answers') with ordinality as a(value, ordinality);
+  end loop;
+
+  return v_quiz_id;
+end;
+$$;
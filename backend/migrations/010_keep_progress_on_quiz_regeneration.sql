@@ -0,0 +1,69 @@
+-- Progression conservée quand le quiz d'un module est remplacé.
+-- Jusqu'ici, le déclencheur de 006 supprimait la progression liée à un quiz désactivé
+-- ou remplacé : chaque régénération du contenu (save_module_quiz désactive l'ancien
+-- quiz puis en insère un nouveau) effaçait la réussite de tous les apprenants du
+-- module, même quand la génération relancée était identique.
+--
+-- Désormais, un module réussi le reste :
+-- - à l'activation d'un nouveau quiz, la progression du module est rattachée à ce quiz ;
+-- - la désactivation d'un quiz ne supprime plus rien ;
+-- - rebuild_user_module_progress compte les tentatives réussies sur tous les quiz du
+--   module, actifs ou non.
+-- Les nouvelles tentatives restent comptées uniquement sur le quiz actif
+-- (record_module_progress, voir 008).
+--
+-- Exiger une nouvelle réussite après un changement de quiz est une action explicite :
+-- supprimer les lignes de user_module_progress du module concerné.
+create or replace function public.reset_module_progress_on_quiz_change()
+returns trigger
+language plpgsql
+as $$
+begin
+  if new.is_active then
+    update public.user_module_progress
+    set quiz_id = new.id,
+        updated_at = now()
+    where module_id = new.module_id and quiz_id <> new.id;
+  end if;
+  return new;
+end;
+$$;
+
+-- Régénère la projection depuis user_quiz_attempts (tous les utilisateurs, ou un seul).
+-- La meilleure tentative réussie sur le quiz actif est préférée ; à défaut, celle d'un
+-- ancien quiz du module, rattachée au quiz actif.
+create or replace function public.rebuild_user_module_progress(p_user_id uuid default null)
+returns integer
+language plpgsql
+as $$
+declare
+  v_count integer;
+begin
+  delete from public.user_module_progress
+  where p_user_id is null or user_id = p_user_id;
+
+  with best_attempts as (
+    select distinct on (a.user_id, a.quiz_id)
+      a.user_id, a.quiz_id, a.score, a.max_score, a.passed
+    from public.user_quiz_attempts a
+    where a.completed_at is not null
+      and (p_user_id is null or a.user_id = p_user_id)
+    order by a.user_id, a.quiz_id, a.score desc
+  )
+  insert into public.user_module_progress (user_id, module_id, quiz_id, score, max_score, passed, updated_at)
+  select distinct on (b.user_id, q.module_id)
+    b.user_id, q.module_id, coalesce(active.id, q.id), b.score, b.max_score, true, now()
+  from best_attempts b
+  join public.quizzes q on q.id = b.quiz_id
+  left join public.quizzes active on active.module_id = q.module_id and active.is_active
+  where b.passed
+     or (b.max_score > 0 and b.score::numeric / b.max_score * 100 >= q.passing_score)
+  order by b.user_id, q.module_id, q.is_active desc, b.score desc, q.id desc;
+
+  get diagnostics v_count = row_count;
+  return v_count;
+end;
+$$;
+
+-- Restaure la progression effacée par les régénérations précédentes.
+select public.rebuild_user_module_progress();
@@ -0,0 +1,89 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Génération de contenu ---
+# Nombre maximum de leçons générées en parallèle par le content graph.
+LESSON_GENERATION_CONCURRENCY = int(os.getenv("LESSON_GENERATION_CONCURRENCY", "5"))
+
+# --- Checkpointers LangGraph ---
+# "sqlite" (défaut, un fichier par graph), "postgres" ou "memory".
+CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "sqlite")
+CHECKPOINT_SQLITE_DIR = os.getenv("CHECKPOINT_SQLITE_DIR", "data/checkpoints")
+CHECKPOINT_POSTGRES_URL = os.getenv("CHECKPOINT_POSTGRES_URL")
+# Bornes du checkpointer du chat creator : les threads inactifs depuis plus de
+# CHAT_THREAD_TTL_SECONDS, ou au-delà des CHAT_MAX_THREADS plus récents, sont supprimés.
+CHAT_THREAD_TTL_SECONDS = int(os.getenv("CHAT_THREAD_TTL_SECONDS", str(7 * 24 * 3600)))
+CHAT_MAX_THREADS = int(os.getenv("CHAT_MAX_THREADS", "1000"))
+# Bornes du checkpointer de la génération de contenu : un thread terminé est supprimé
+# aussitôt, ces bornes ne concernent que les générations échouées jamais reprises.
+CONTENT_GENERATION_THREAD_TTL_SECONDS = int(os.getenv("CONTENT_GENERATION_THREAD_TTL_SECONDS", str(7 * 24 * 3600)))
+CONTENT_GENERATION_MAX_THREADS = int(os.getenv("CONTENT_GENERATION_MAX_THREADS", "200"))
+
+# --- Connaissances du chat creator ---
+# Les sources ingérées sont découpées en chunks de KNOWLEDGE_CHUNK_WORDS mots ;
+# seuls les KNOWLEDGE_TOP_K chunks les plus pertinents (BM25) sont injectés à chaque tour.
+KNOWLEDGE_CHUNK_WORDS = int(os.getenv("KNOWLEDGE_CHUNK_WORDS", "200"))
+KNOWLEDGE_CHUNK_OVERLAP = int(os.getenv("KNOWLEDGE_CHUNK_OVERLAP", "40"))
+KNOWLEDGE_TOP_K = int(os.getenv("KNOWLEDGE_TOP_K", "6"))
+# Volume maximum (tokens estimés) des sources conservées sur une conversation :
+# au-delà, les sources les moins pertinentes sont évincées.
+KNOWLEDGE_MAX_TOKENS = int(os.getenv("KNOWLEDGE_MAX_TOKENS", "50000"))
+# Récupération des pages Notion : appels simultanés, timeout par requête HTTP, et durée
+# pendant laquelle une page déjà récupérée est resservie depuis le cache.
+NOTION_FETCH_CONCURRENCY = int(os.getenv("NOTION_FETCH_CONCURRENCY", "5"))
+NOTION_FETCH_TIMEOUT_SECONDS = float(os.getenv("NOTION_FETCH_TIMEOUT_SECONDS", "20"))
+NOTION_PAGE_CACHE_TTL_SECONDS = int(os.getenv("NOTION_PAGE_CACHE_TTL_SECONDS", "600"))
+# Durée de validité de l'index des titres de documents (@-mentions) d'un utilisateur,
+# invalidé à chaque création / mise à jour / suppression de document.
+MENTION_INDEX_TTL_SECONDS = int(os.getenv("MENTION_INDEX_TTL_SECONDS", "300"))
+
+# --- Cache des réponses LLM (génération des leçons et quiz) ---
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+
+# Nombre de leçons générées accumulées avant une sauvegarde groupée en base
+# (le reliquat est sauvegardé à la finalisation).
+LESSON_SAVE_BATCH_SIZE = int(os.getenv("LESSON_SAVE_BATCH_SIZE", "20"))
+
+# --- Documents ---
+# Nombre de processus dédiés à l'extraction de texte des documents uploadés.
+DOCUMENT_PARSE_WORKERS = int(os.getenv("DOCUMENT_PARSE_WORKERS", str(os.cpu_count() or 2)))
+# Découpage du texte extrait dans document_chunks : taille d'un chunk (caractères),
+# nombre de chunks par insertion, et taille de l'aperçu gardé dans documents.contents.
+DOCUMENT_CHUNK_CHARS = int(os.getenv("DOCUMENT_CHUNK_CHARS", "4000"))
+DOCUMENT_CHUNK_BATCH_SIZE = int(os.getenv("DOCUMENT_CHUNK_BATCH_SIZE", "50"))
+DOCUMENT_PREVIEW_CHARS = int(os.getenv("DOCUMENT_PREVIEW_CHARS", "20000"))
+# Chunks lus par requête pour reconstituer un document : au plus le max-rows de
+# PostgREST (1000 par défaut), au-delà duquel les réponses sont tronquées.
+DOCUMENT_CHUNK_PAGE_SIZE = int(os.getenv("DOCUMENT_CHUNK_PAGE_SIZE", "1000"))
+# Les extractions tournent dans le pool de processus du worker : un document encore
+# 'processing' après ce délai (worker redémarré) passe en 'failed' à sa consultation.
+DOCUMENT_PROCESSING_TIMEOUT_SECONDS = int(os.getenv("DOCUMENT_PROCESSING_TIMEOUT_SECONDS", "1800"))
+
+# --- Progression ---
+# Cache de la progression calculée par (utilisateur, formation). Avec
+# PROGRESSION_CACHE_REDIS_URL, le cache est partagé entre workers (paquet 'redis') ;
+# sans, chaque worker n'invalide que son propre cache : à configurer dès que l'API
+# tourne avec plusieurs workers.
+PROGRESSION_CACHE_TTL_SECONDS = int(os.getenv("PROGRESSION_CACHE_TTL_SECONDS", "300"))
+PROGRESSION_CACHE_MAX_ENTRIES = int(os.getenv("PROGRESSION_CACHE_MAX_ENTRIES", "5000"))
+PROGRESSION_CACHE_REDIS_URL = os.getenv("PROGRESSION_CACHE_REDIS_URL")
+
+# --- Quiz ---
+# Cache des quiz compilés (questions + corrigé). Un quiz n'est jamais modifié après
+# save_module_quiz : seul le quiz actif d'un module change, et ce pointeur expire
+# après QUIZ_CACHE_TTL_SECONDS. Avec QUIZ_CACHE_REDIS_URL, le cache est partagé
+# entre workers (paquet 'redis').
+QUIZ_CACHE_TTL_SECONDS = int(os.getenv("QUIZ_CACHE_TTL_SECONDS", "300"))
+QUIZ_CACHE_MAX_ENTRIES = int(os.getenv("QUIZ_CACHE_MAX_ENTRIES", "2000"))
+QUIZ_CACHE_REDIS_URL = os.getenv("QUIZ_CACHE_REDIS_URL")
+
+# --- Contrôle d'accès aux modules ---
+# Cache par utilisateur (formations assignées) et par module (formations qui le
+# contiennent), invalidé par les routes d'assignation et de suppression. Le statut
+# administrateur est relu à chaque vérification.
+ACCESS_CACHE_TTL_SECONDS = int(os.getenv("ACCESS_CACHE_TTL_SECONDS", "60"))
+ACCESS_CACHE_MAX_ENTRIES = int(os.getenv("ACCESS_CACHE_MAX_ENTRIES", "5000"))
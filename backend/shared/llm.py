@@ -4,11 +4,13 @@ from langchain_openai import ChatOpenAI
 from langchain_mistralai import ChatMistralAI
 from langchain_groq import ChatGroq  # <-- Import de Groq
 from dotenv import load_dotenv
+from shared.config import LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES
+from shared.llm_cache import SQLiteLRUCache
 
 load_dotenv()
 
 
-def get_llm(model_identifier, streaming=True):
+def get_llm(model_identifier, streaming=True, cache=None):
     """
     Initialise et retourne un client de modèle de langage basé sur le fournisseur.
 
@@ -17,6 +19,7 @@ def get_llm(model_identifier, streaming=True):
                                 ex: "openai/gpt-4o" ou
                                 "groq/meta-llama/llama-4-scout-17b-16e-instruct".
         streaming (bool): Indique si les réponses en streaming sont activées.
+        cache (BaseCache | None): Cache de réponses propre à ce client (aucun par défaut).
     """
     try:
         provider, model_name = model_identifier.split("/", 1)
@@ -29,6 +32,7 @@ def get_llm(model_identifier, streaming=True):
     params = {
         "temperature": 0,
         "streaming": streaming,
+        "cache": cache,
     }
 
     if provider == "anthropic":
@@ -65,3 +69,10 @@ print(f"Utilisation du modèle : {llm_model_identifier}")
 # Obtient les instances avec et sans streaming du LLM
 llm = get_llm(llm_model_identifier, streaming=True)
 llm_not_streaming = get_llm(llm_model_identifier, streaming=False)
+
+# Client avec cache de réponses pour la génération des leçons et des quiz :
+# à temperature=0, un prompt identique redonne la même sortie.
+llm_response_cache = (
+    SQLiteLRUCache(LLM_CACHE_PATH, max_entries=LLM_CACHE_MAX_ENTRIES) if LLM_CACHE_ENABLED else None
+)
+llm_cached = get_llm(llm_model_identifier, streaming=True, cache=llm_response_cache)
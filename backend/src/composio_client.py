@@ -1,6 +1,10 @@
 import os
 from dotenv import load_dotenv
 from composio import Composio
+# Raised by composio_fetch when a request exceeds its timeout; re-exported so callers
+# do not depend on the underlying HTTP client package.
+from composio_client import APITimeoutError
+from shared.config import NOTION_FETCH_TIMEOUT_SECONDS
 
 # Load environment variables from a .env file
 load_dotenv()
@@ -14,6 +18,15 @@ if not COMPOSIO_API_KEY:
 # A single, shared instance of the Composio client, initialized with the key.
 composio = Composio(api_key=COMPOSIO_API_KEY)
 
+# Client used to fetch knowledge sources (Notion pages) while a user waits: each
+# HTTP request is bounded by NOTION_FETCH_TIMEOUT_SECONDS and not retried, so a
+# slow page cannot hold a fetch slot (NOTION_FETCH_CONCURRENCY) indefinitely.
+composio_fetch = Composio(
+    api_key=COMPOSIO_API_KEY,
+    timeout=NOTION_FETCH_TIMEOUT_SECONDS,
+    max_retries=0,
+)
+
 
 # --- Auth Configs ---
 # Load Auth Config IDs for various toolkits from the environment.
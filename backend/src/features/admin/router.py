@@ -4,6 +4,7 @@ from src.supabase_client import supabase
 from supabase import create_client, Client 
 from src.features.auth.dependencies import get_current_admin_user
 from src.features.formations.schema import Formation as FormationSchema
+from src.features.formations.access_cache import access_cache
 from . import schema
 from uuid import UUID
 from typing import List
@@ -321,6 +322,7 @@ def unassign_formation_from_user(user_id: UUID, formation_id: int, admin_user: d
             .delete()
             .match({'user_id': str(user_id), 'formation_id': formation_id})
             .execute())
+        access_cache.invalidate_user(str(user_id))
         return
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -503,11 +505,13 @@ def delete_user(user_id: UUID, admin_user: dict = Depends(get_current_admin_user
         # Delete documents created by the user
         supabase.table('documents').delete().eq('profile_id', user_id_str).execute()
         
-        # Delete quiz attempts
+        # Delete quiz attempts and the progress derived from them
         supabase.table('user_quiz_attempts').delete().eq('user_id', user_id_str).execute()
+        supabase.table('user_module_progress').delete().eq('user_id', user_id_str).execute()
         
         # Delete course assignments
         supabase.table('user_formations').delete().eq('user_id', user_id_str).execute()
+        access_cache.invalidate_user(user_id_str)
         
         # Delete management records
         supabase.table('managed_users').delete().eq('user_id', user_id_str).execute()
@@ -1,20 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Body
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Body, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import AsyncGenerator, Dict, Any, List
 import json
-import asyncio
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AIMessageChunk, HumanMessage
 from src.features.auth.dependencies import get_current_user, get_current_admin_user
 from fastapi import HTTPException, status, Body
 try:
-    from src.features.creator_agent.service.graph_generate_content import graph as content_graph
+    from src.features.creator_agent.service.graph_generate_content import (
+        graph as content_graph,
+        release_thread as release_content_thread,
+    )
     print("✅ Content graph importé avec succès")
 except Exception as e:
     print(f"❌ Erreur lors de l'import du content graph: {e}")
     content_graph = None
 import uuid
 
+from shared.config import LESSON_GENERATION_CONCURRENCY
+from shared.llm import llm_response_cache
 from src.features.creator_agent.service.graph import graph
 
 router = APIRouter(
@@ -154,15 +158,21 @@ class ChatStreamService:
         self.processor = StreamEventProcessor()
     
     async def stream_graph_state(self, message: str, user_id: str) -> AsyncGenerator[str, None]:
-        """Stream events as the graph processes the message."""
+        """
+        Stream events as the graph processes the message.
+
+        The graph stream is closed explicitly when this generator is closed (client
+        disconnected), so the running graph step is cancelled right away instead of
+        whenever the stream is garbage collected.
+        """
+        new_input = {"messages": [HumanMessage(content=message)], "user_id": user_id}
+        stream = graph.astream(
+            new_input,
+            self.processor.config,
+            stream_mode=["values", "messages", "updates"]
+        )
         try:
-            new_input = {"messages": [HumanMessage(content=message)], "user_id": user_id}
-            
-            async for mode, chunk in graph.astream(
-                new_input,
-                self.processor.config,
-                stream_mode=["values", "messages", "updates"]
-            ):
+            async for mode, chunk in stream:
                 event_data = self._process_stream_event(mode, chunk)
                 if event_data:
                     yield event_data
@@ -170,6 +180,8 @@ class ChatStreamService:
         except Exception as e:
             error_data = {"type": "error", "data": str(e)}
             yield self.processor._format_sse_data('error', error_data)
+        finally:
+            await stream.aclose()
     
     def _process_stream_event(self, mode: str, chunk) -> str:
         """Route stream events to appropriate processors."""
@@ -190,28 +202,28 @@ class ChatAPIHandler:
     def __init__(self):
         self.chat_service = ChatStreamService()
     
-    def create_sync_generator(self, message: str, user_id: str):
-        """Create synchronous generator for FastAPI StreamingResponse."""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        async def async_generator():
-            async for chunk in self.chat_service.stream_graph_state(message, user_id):
-                yield chunk
-        
-        gen = async_generator()
+    async def create_async_generator(self, message: str, user_id: str, request: Request) -> AsyncGenerator[str, None]:
+        """
+        Stream the graph events directly on the server event loop.
+
+        Each chunk is only produced once the previous one has been sent (backpressure).
+        When the client goes away, Starlette cancels this generator; closing the graph
+        stream then cancels the running LLM call.
+        """
+        stream = self.chat_service.stream_graph_state(message, user_id)
         try:
-            while True:
-                yield loop.run_until_complete(gen.__anext__())
-        except StopAsyncIteration:
-            pass
+            async for chunk in stream:
+                if await request.is_disconnected():
+                    print(f"--- [CHAT] Client déconnecté, arrêt du stream pour l'utilisateur {user_id} ---")
+                    break
+                yield chunk
         finally:
-            loop.close()
+            await stream.aclose()
     
-    def get_streaming_response(self, message: str, user_id: str) -> StreamingResponse:
+    def get_streaming_response(self, message: str, user_id: str, request: Request) -> StreamingResponse:
         """Create StreamingResponse with proper headers."""
         return StreamingResponse(
-            self.create_sync_generator(message, user_id),
+            self.create_async_generator(message, user_id, request),
             media_type="text/plain",
             headers={
                 "Cache-Control": "no-cache",
@@ -226,10 +238,10 @@ chat_handler = ChatAPIHandler()
 
 
 @router.post("/chat")
-async def chat_stream(request: ChatRequest,  current_user: dict = Depends(get_current_user)):
+async def chat_stream(request: ChatRequest, http_request: Request, current_user: dict = Depends(get_current_user)):
     """Streaming chat endpoint that processes messages through the graph."""
     user_id = str(current_user.get("sub") or current_user.get("id"))
-    return chat_handler.get_streaming_response(request.message, user_id)
+    return chat_handler.get_streaming_response(request.message, user_id, http_request)
 
 @router.post("/runs/stream")
 async def langgraph_stream(request: LangGraphRunRequest, current_user: dict = Depends(get_current_user)):
@@ -534,24 +546,42 @@ async def generate_structure(
 
 class GenerateContentRequest(BaseModel):
     structure: Dict[str, Any]
+
+# thread_id des générations en cours dans CE worker : le garde-fou contre une double
+# reprise ne vaut qu'au sein d'un processus. Avec plusieurs workers, une reprise
+# concurrente reste possible ; les écritures de la génération sont idempotentes
+# (leçons par id, quiz par thread_id, voir migrations/009_idempotent_module_quiz.sql).
+running_generations: set[str] = set()
     
-async def run_generation_in_background(structure: Dict[str, Any]):
+async def run_generation_in_background(structure: Dict[str, Any] | None, thread_id: str):
     """
     Cette fonction exécute la longue tâche de génération de contenu en arrière-plan.
+    Avec `structure=None`, le graph reprend le thread depuis son dernier checkpoint.
     """
+    running_generations.add(thread_id)
     try:
         if content_graph is None:
             raise Exception("Content graph non disponible - erreur d'import")
             
-        print("--- [BACKGROUND TASK] Démarrage de la génération du contenu... ---")
-        print(f"--- Structure reçue: {structure.get('title', 'Pas de titre')} avec {len(structure.get('modules', []))} modules ---")
+        if structure is not None:
+            print("--- [BACKGROUND TASK] Démarrage de la génération du contenu... ---")
+            print(f"--- Structure reçue: {structure.get('title', 'Pas de titre')} avec {len(structure.get('modules', []))} modules ---")
+            state = {"course_structure": structure}
+        else:
+            print(f"--- [BACKGROUND TASK] Reprise de la génération du thread {thread_id}... ---")
+            state = None
         
-        state = {"course_structure": structure}
-        # La configuration pour la limite de récursion est toujours nécessaire
-        config = {"recursion_limit": 100} 
+        # La configuration pour la limite de récursion est toujours nécessaire,
+        # max_concurrency borne le nombre de leçons générées en parallèle
+        config = {
+            "configurable": {"thread_id": thread_id},
+            "recursion_limit": 100,
+            "max_concurrency": LESSON_GENERATION_CONCURRENCY,
+        }
         
         result = await content_graph.ainvoke(state, config=config)
         print(f"--- [BACKGROUND TASK] Résultat: {result} ---")
+        await release_content_thread(thread_id)
         
         print("--- [BACKGROUND TASK] Génération du contenu terminée avec succès. ---")
 
@@ -560,6 +590,8 @@ async def run_generation_in_background(structure: Dict[str, Any]):
         print(f"--- [ERREUR BACKGROUND TASK] La génération a échoué : {str(e)} ---")
         import traceback
         print(f"--- [STACK TRACE] {traceback.format_exc()} ---")
+    finally:
+        running_generations.discard(thread_id)
 
 
 @router.post("/content", status_code=status.HTTP_202_ACCEPTED) 
@@ -570,16 +602,56 @@ async def generate_all_lessons(
 ):
     """
     Lance la génération du contenu en tâche de fond et répond immédiatement.
+    Le thread_id retourné permet de reprendre la génération si elle est interrompue.
     """
+    thread_id = f"content_gen_{uuid.uuid4()}"
     # Planifie l'exécution de la fonction `run_generation_in_background` après avoir envoyé la réponse
-    background_tasks.add_task(run_generation_in_background, req.structure)
+    background_tasks.add_task(run_generation_in_background, req.structure, thread_id)
     
     # Répond immédiatement au client
     return {
         "message": "La génération du contenu a été lancée. "
-                   "Les leçons apparaîtront dans la base de données dans quelques minutes."
+                   "Les leçons apparaîtront dans la base de données dans quelques minutes.",
+        "thread_id": thread_id
     }
 
+@router.post("/content/{thread_id}/resume", status_code=status.HTTP_202_ACCEPTED)
+async def resume_content_generation(
+    thread_id: str,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Reprend une génération interrompue depuis son dernier checkpoint
+    (current_index/outputs) sans régénérer les leçons déjà produites.
+    """
+    if content_graph is None:
+        raise HTTPException(status_code=500, detail="Content graph non disponible - erreur d'import")
+
+    if thread_id in running_generations:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Cette génération est déjà en cours")
+
+    snapshot = await content_graph.aget_state({"configurable": {"thread_id": thread_id}})
+    if not snapshot.values:
+        raise HTTPException(status_code=404, detail="Aucune génération trouvée pour ce thread_id")
+    if not snapshot.next:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Cette génération est déjà terminée")
+
+    background_tasks.add_task(run_generation_in_background, None, thread_id)
+
+    return {
+        "message": "La génération du contenu a été reprise.",
+        "thread_id": thread_id,
+        "generated_outputs": len(snapshot.values.get("outputs") or {})
+    }
+
+@router.get("/llm-cache/stats")
+async def get_llm_cache_stats(current_user: dict = Depends(get_current_admin_user)):
+    """(Admin only) Compteurs du cache des réponses LLM de génération de contenu."""
+    if llm_response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **llm_response_cache.stats()}
+
 @router.post("/content/stream")
 async def generate_all_lessons_stream(
     req: GenerateContentRequest,
@@ -595,7 +667,11 @@ async def generate_all_lessons_stream(
         try:
             # Generate unique thread ID for this generation session
             thread_id = f"content_gen_{uuid.uuid4()}"
-            config = {"configurable": {"thread_id": thread_id}, "recursion_limit": 100}
+            config = {
+                "configurable": {"thread_id": thread_id},
+                "recursion_limit": 100,
+                "max_concurrency": LESSON_GENERATION_CONCURRENCY,
+            }
             
             # Initial state with course structure
             initial_state = {
@@ -610,13 +686,26 @@ async def generate_all_lessons_stream(
             async for mode, chunk in content_graph.astream(
                 initial_state,
                 config,
-                stream_mode=["values", "messages", "updates", "debug"]
+                stream_mode=["values", "messages", "updates", "debug", "custom"]
             ):
-                if mode == "messages":
+                if mode == "custom" and isinstance(chunk, dict) and chunk.get("type") == "lesson_chunk":
+                    # Stream incremental lesson HTML, tagged with its lesson_id
+                    chunk_data = {
+                        "lesson_id": chunk["lesson_id"],
+                        "chunk": chunk["chunk"],
+                        "thread_id": thread_id
+                    }
+                    yield f"data: {json.dumps(['lesson_chunk', chunk_data])}\n\n"
+
+                elif mode == "messages":
                     # Stream individual tokens/messages
-                    token, _ = chunk
+                    token, metadata = chunk
                     if hasattr(token, 'type') and token.type == 'tool':
                         continue
+                    # Les tokens des leçons sont déjà envoyés en lesson_chunk
+                    # (les messages de statut du nœud, eux, ne sont pas des chunks)
+                    if metadata.get("langgraph_node") == "generate_lesson" and isinstance(token, AIMessageChunk):
+                        continue
                     token_text = token.content if hasattr(token, "content") else str(token)
                     yield f"data: {json.dumps(['messages', token_text])}\n\n"
                     
@@ -669,6 +758,8 @@ async def generate_all_lessons_stream(
                     }
                     yield f"data: {json.dumps(['debug', debug_info])}\n\n"
             
+            await release_content_thread(thread_id)
+
             # Send completion status
             yield f"data: {json.dumps(['status', {'message': 'Content generation completed successfully!', 'completed': True, 'thread_id': thread_id}])}\n\n"
             
@@ -2,13 +2,18 @@ from langgraph.graph import END, START, StateGraph
 from .nodes.generate import generate
 from .nodes.ingest_knowledge import ingest_knowledge
 from .state import State
-from langgraph.checkpoint.memory import MemorySaver
+from shared.config import CHAT_THREAD_TTL_SECONDS, CHAT_MAX_THREADS
+from src.shared.checkpointer import create_checkpointer
 from .nodes.tools import tool_node
 from langchain_core.messages import BaseMessage
 from .nodes.create_structure import create_structure
 
 workflow = StateGraph(State)
-memory = MemorySaver()
+memory = create_checkpointer(
+    "creator_chat",
+    ttl_seconds=CHAT_THREAD_TTL_SECONDS,
+    max_threads=CHAT_MAX_THREADS,
+)
 
 # ===========================================
 # Define the nodes
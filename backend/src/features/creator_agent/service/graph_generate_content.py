@@ -1,17 +1,30 @@
 # src/features/creator_agent/service/graph.py
 from langgraph.graph import StateGraph, END, START
-from src.features.creator_agent.service.state import State
-from src.features.creator_agent.service.nodes.prepare_submodules import prepare
+from langgraph.types import Send
+from langchain_core.runnables import RunnableConfig
+from src.features.creator_agent.service.state import State, QuizTask
+from shared.config import CONTENT_GENERATION_THREAD_TTL_SECONDS, CONTENT_GENERATION_MAX_THREADS
+from src.shared.checkpointer import create_checkpointer
+from src.features.creator_agent.service.nodes.prepare_submodules import prepare, module_bounds
 from src.features.creator_agent.service.nodes.generate_lesson import generate_lesson
-from src.features.creator_agent.service.nodes.save_to_supabase import save
+from src.features.creator_agent.service.nodes.save_to_supabase import save, flush_lessons, pending_lessons
 from src.features.creator_agent.service.nodes.generate_quiz import generate_quiz
 from src.features.creator_agent.service.nodes.save_quiz_to_supabase import save_quiz_to_supabase
 
 def finalize_formation(state: State) -> State:
     """Finalise la formation en mettant à jour has_content = true"""
+    print("🎯 Finalisation de la formation...")
+
+    # Vider le buffer d'écriture des leçons avant de marquer la formation comme terminée.
+    # Un échec lève une exception : has_content n'est pas mis à jour et le thread
+    # s'arrête avant 'finalize', ce qui permet de le reprendre depuis son checkpoint.
+    flushed = flush_lessons(
+        pending_lessons(state["submodules"], state.get("outputs") or {}, state.get("saved_lessons") or []),
+        state.get("outputs") or {},
+        raise_on_error=True
+    )
+
     try:
-        print("🎯 Finalisation de la formation...")
-        
         # Obtenir formation_id depuis le premier module
         if state["submodules"]:
             first_module = state["submodules"][0]
@@ -39,7 +52,8 @@ def finalize_formation(state: State) -> State:
                 print(f"--- [BACKGROUND TASK] Génération du contenu terminée avec succès. Formation {formation_id} finalisée. ---")
                 
                 return {
-                    "messages": [final_message],
+                    "messages": flushed["messages"] + [final_message],
+                    "saved_lessons": flushed["saved_lessons"],
                     "formation_completed": {
                         "formation_id": formation_id,
                         "total_lessons": total_lessons,
@@ -48,7 +62,10 @@ def finalize_formation(state: State) -> State:
                 }
             else:
                 print("❌ Impossible de trouver la formation_id pour finaliser")
-                return {"messages": [AIMessage(content="❌ Erreur lors de la finalisation")]}
+                return {
+                    "messages": flushed["messages"] + [AIMessage(content="❌ Erreur lors de la finalisation")],
+                    "saved_lessons": flushed["saved_lessons"]
+                }
         else:
             print("❌ Aucun module trouvé pour finaliser")
             return {"messages": [AIMessage(content="❌ Aucun contenu à finaliser")]}
@@ -58,70 +75,112 @@ def finalize_formation(state: State) -> State:
         from langchain_core.messages import AIMessage
         return {"messages": [AIMessage(content=f"❌ Erreur lors de la finalisation: {str(e)}")]}
 
+def module_quiz(task: QuizTask, config: RunnableConfig) -> State:
+    """
+    Génère puis sauvegarde le quiz d'un module. Envoyé en même temps que les leçons
+    du module suivant, ce qui retire la latence du quiz du chemin critique.
+    Le thread_id sert de clé d'idempotence : une reprise qui ré-exécute cette tâche
+    ne crée pas de second quiz pour le module.
+    """
+    generated = generate_quiz(task)
+    quiz_outputs = generated.get("outputs", {})
+    saved = save_quiz_to_supabase(
+        {**task, "outputs": {**task["outputs"], **quiz_outputs}},
+        generation_key=config.get("configurable", {}).get("thread_id")
+    )
+    return {
+        "messages": generated["messages"] + saved["messages"],
+        "outputs": quiz_outputs
+    }
+
 workflow = StateGraph(State)
 
 # ↓↓↓  Nœuds
 workflow.add_node("prepare", prepare)
 workflow.add_node("generate_lesson", generate_lesson)
 workflow.add_node("save", save)
-workflow.add_node("generate_quiz", generate_quiz)
-workflow.add_node("save_quiz", save_quiz_to_supabase)
+workflow.add_node("quiz", module_quiz)
 workflow.add_node("finalize", finalize_formation)
 
-# ↓↓↓  Logique de boucle
-def has_more(state: State) -> str:
-    if state["current_index"] < len(state["submodules"]):
-        return "loop"
-    return "finalize"
+# ↓↓↓  Logique de boucle (un module par itération)
+def dispatch(state: State) -> list[Send] | str:
+    """
+    Envoie en parallèle les leçons du module courant et le quiz du module précédent.
+    Les leçons et quiz déjà présents dans `outputs` (reprise d'un thread) sont ignorés.
+    Quand il ne reste plus de leçons, seul le dernier quiz part ; 'finalize' suivra.
+    """
+    submodules = state["submodules"]
+    current_index = state["current_index"]
+    outputs = state.get("outputs") or {}
+    if not submodules:
+        return "finalize"
 
-def increment_index(state: State) -> State:
-    return {"current_index": state["current_index"] + 1}
+    sends = []
+    if current_index > 0:
+        quiz_start, quiz_end = module_bounds(submodules, current_index - 1)
+        if f"quiz_{submodules[quiz_start]['module_id']}" not in outputs:
+            module_outputs = {
+                sub["lesson_id"]: outputs[sub["lesson_id"]]
+                for sub in submodules[quiz_start:quiz_end]
+                if sub["lesson_id"] in outputs
+            }
+            sends.append(Send("quiz", {
+                "submodules": submodules,
+                "current_index": quiz_start,
+                "outputs": module_outputs
+            }))
 
-def should_generate_quiz(state: State) -> str:
-    """Détermine si on doit générer un quiz après cette leçon"""
-    # FIX: Use dictionary key access instead of attribute access
-    current_index = state["current_index"]
-    
-    # Si c'est la dernière leçon de toute la formation
-    if current_index >= len(state["submodules"]) - 1:
-        return "generate_quiz"
-    
-    # Vérifier si la prochaine leçon est dans un module différent
-    current_module = state["submodules"][current_index]["module_id"]
-    next_module = state["submodules"][current_index + 1]["module_id"]
-    
-    if current_module != next_module:
-        return "generate_quiz"
-    
-    return "loop"
+    if current_index < len(submodules):
+        start, end = module_bounds(submodules, current_index)
+        pending = [i for i in range(start, end) if submodules[i]["lesson_id"] not in outputs]
+        if pending:
+            sends.extend(
+                Send("generate_lesson", {"submodule": submodules[i], "position": i, "total": len(submodules)})
+                for i in pending
+            )
+        else:
+            # Toutes les leçons du module existent déjà : on passe directement à la sauvegarde
+            sends.append(Send("save", state))
+    elif not sends:
+        return "finalize"
+    return sends
+
+def next_module(state: State) -> State:
+    """Avance l'index au début du module suivant."""
+    _, end = module_bounds(state["submodules"], state["current_index"])
+    return {"current_index": end}
+
+def after_quiz(state: State) -> str:
+    """Le dernier quiz (plus aucune leçon à générer) déclenche la finalisation."""
+    if state["current_index"] >= len(state["submodules"]):
+        return "finalize"
+    return END
+
+workflow.add_node("loop", next_module)
 
 workflow.add_edge(START, "prepare")
-workflow.add_edge("prepare", "generate_lesson")
+workflow.add_conditional_edges("prepare", dispatch, ["generate_lesson", "save", "quiz", "finalize"])
+# Les leçons du module sont jointes avant la sauvegarde, puis on passe au module suivant
 workflow.add_edge("generate_lesson", "save")
-# Après sauvegarde, décider si on génère un quiz ou on continue
-workflow.add_conditional_edges(
-    "save",
-    should_generate_quiz,
-    {
-        "generate_quiz": "generate_quiz",       # générer quiz de fin de module
-        "loop": "loop"                          # continuer avec la prochaine leçon
-    }
-)
-
-# Après génération du quiz, le sauvegarder puis continuer
-workflow.add_edge("generate_quiz", "save_quiz")
-workflow.add_edge("save_quiz", "loop")
-
-workflow.add_conditional_edges(
-    "loop",
-    has_more,
-    {
-        "loop": "generate_lesson",              # continue
-        "finalize": "finalize"                  # finaliser
-    }
-)
-workflow.add_node("loop", increment_index)      # nœud d’incrémentation
+workflow.add_edge("save", "loop")
+workflow.add_conditional_edges("loop", dispatch, ["generate_lesson", "save", "quiz", "finalize"])
+
+# Chaque quiz termine sa branche, sauf le dernier qui attend la fin de tous les autres
+workflow.add_conditional_edges("quiz", after_quiz, ["finalize", END])
 
 workflow.add_edge("finalize", END)              # fin après finalisation
 
-graph = workflow.compile()
+# Checkpointer durable : une génération interrompue (redémarrage du worker) peut être
+# reprise depuis le dernier super-step sauvegardé via son thread_id.
+# Les threads terminés sont supprimés par le router (release_thread) ; les bornes
+# évincent les générations échouées qui ne sont jamais reprises.
+graph = workflow.compile(checkpointer=create_checkpointer(
+    "content_generation",
+    ttl_seconds=CONTENT_GENERATION_THREAD_TTL_SECONDS,
+    max_threads=CONTENT_GENERATION_MAX_THREADS,
+))
+
+
+async def release_thread(thread_id: str) -> None:
+    """Supprime les checkpoints d'une génération terminée : il n'y a plus rien à reprendre."""
+    await graph.checkpointer.adelete_thread(thread_id)
@@ -1,9 +1,13 @@
 # src/features/creator_agent/service/nodes/generate_lesson.py
+from langchain_core.callbacks import AsyncCallbackHandler
 from langchain_core.messages import AIMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from shared.llm import llm
-from src.features.creator_agent.service.state import State
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import merge_configs
+from langgraph.config import get_stream_writer
+from shared.llm import llm_cached
+from src.features.creator_agent.service.state import State, LessonTask
 
 # --- prompt and chain definitions are unchanged ---
 prompt = ChatPromptTemplate.from_template(
@@ -20,15 +24,35 @@ Return *only* well-formatted **HTML** (no markdown, no explanations).
 Use <h2>, <h3>, <p>, <ul><li>, etc.
 """
 )
-chain = prompt | llm | StrOutputParser()
+chain = prompt | llm_cached | StrOutputParser()
 # ---
 
-def generate_lesson(state: State) -> State:
-    submodules = state.get("submodules", [])
-    current_index = state.get("current_index", 0)
-    outputs = state.get("outputs", {})
 
-    sub = submodules[current_index]
+class LessonChunkStreamer(AsyncCallbackHandler):
+    """
+    Relaie chaque token du LLM sur le stream 'custom' du graph, sous forme
+    d'événement `lesson_chunk` portant le lesson_id.
+
+    llm_cached est créé avec streaming=True : `ainvoke` (et donc le cache LLM)
+    émet on_llm_new_token pour chaque token, sauf quand la réponse vient du cache.
+    """
+
+    def __init__(self, lesson_id: str, writer):
+        self.lesson_id = lesson_id
+        self.writer = writer
+        self.streamed = False
+
+    async def on_llm_new_token(self, token: str, **kwargs) -> None:
+        if token:
+            self.streamed = True
+            self.writer({"type": "lesson_chunk", "lesson_id": self.lesson_id, "chunk": token})
+
+
+async def generate_lesson(task: LessonTask, config: RunnableConfig) -> State:
+    """Génère une leçon ; exécuté en parallèle pour chaque leçon du module courant (Send)."""
+    sub = task["submodule"]
+    position = task["position"]
+    total = task["total"]
     lesson_id = sub.get("lesson_id")
     lesson_title = sub.get("lesson_title")
     
@@ -36,28 +60,31 @@ def generate_lesson(state: State) -> State:
     
     # Start message for streaming
     start_msg = AIMessage(
-        content=f"🔄 Génération en cours: {lesson_title} ({current_index + 1}/{len(submodules)})"
+        content=f"🔄 Génération en cours: {lesson_title} ({position + 1}/{total})"
     )
     
-    html = chain.invoke(sub)
+    writer = get_stream_writer()
+    streamer = LessonChunkStreamer(lesson_id, writer)
+    html = await chain.ainvoke(sub, merge_configs(config, {"callbacks": [streamer]}))
+    if not streamer.streamed:
+        # Réponse servie par le cache : un seul chunk avec toute la leçon
+        writer({"type": "lesson_chunk", "lesson_id": lesson_id, "chunk": html})
 
     print(f"--- Contenu HTML généré pour {lesson_title} ---")
     print(html[:500] + "..." if len(html) > 500 else html) # Affiche un aperçu
 
     # Completion message with more detail
     completion_msg = AIMessage(
-        content=f"✅ Leçon terminée: {lesson_title} | {len(html)} caractères générés | Progression: {current_index + 1}/{len(submodules)} leçons"
+        content=f"✅ Leçon terminée: {lesson_title} | {len(html)} caractères générés | Progression: {position + 1}/{total} leçons"
     )
 
-    new_outputs = {**outputs, lesson_id: html}
-
     return {
         "messages": [start_msg, completion_msg],
-        "outputs": new_outputs,
+        "outputs": {lesson_id: html},
         "lesson_generated": {
             "lesson_id": lesson_id,
             "lesson_title": lesson_title, 
             "content_length": len(html),
-            "progress": f"{current_index + 1}/{len(submodules)}"
+            "progress": f"{position + 1}/{total}"
         }
     }
\ No newline at end of file
@@ -4,7 +4,7 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 from typing import List
-from shared.llm import llm
+from shared.llm import llm_cached
 from src.features.creator_agent.service.state import State
 import json
 
@@ -78,7 +78,7 @@ Crée un quiz de 5 questions à choix multiples basé sur le contenu des leçons
     
     module_title = current_submodule.get("module_title", "Module")
     
-    chain = prompt | llm | parser
+    chain = prompt | llm_cached | parser
     
     try:
         print(f"--- Génération du quiz pour le module : {module_title} ---")
@@ -100,7 +100,7 @@ Crée un quiz de 5 questions à choix multiples basé sur le contenu des leçons
 
         quiz_key = f"quiz_{current_module_id}"
         # FIX: Use dictionary key access for 'outputs'
-        new_outputs = {**state['outputs'], quiz_key: quiz_data.model_dump_json()}
+        new_outputs = {quiz_key: quiz_data.model_dump_json()}
         
         # Completion message with more detail
         completion_msg = AIMessage(
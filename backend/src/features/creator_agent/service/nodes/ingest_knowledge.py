@@ -1,9 +1,22 @@
+import asyncio
 import re
-from typing import List, Dict
+import time
+from collections import OrderedDict
+from typing import Any, List, Dict, Tuple
 from urllib.parse import urlparse
 
-from src.composio_client import composio, COMPOSIO_NOTION_AUTH_CONFIG_ID
+from langchain_core.messages import HumanMessage
+
+from shared.config import (
+    KNOWLEDGE_TOP_K,
+    KNOWLEDGE_MAX_TOKENS,
+    NOTION_FETCH_CONCURRENCY,
+    NOTION_FETCH_TIMEOUT_SECONDS,
+    NOTION_PAGE_CACHE_TTL_SECONDS,
+)
+from src.composio_client import composio_fetch, APITimeoutError, COMPOSIO_NOTION_AUTH_CONFIG_ID
 from ..state import State
+from ..retrieval import cap_chunks, chunk_text, content_hash, select_chunks
 from src.features.documents.service import DocumentService
 
 
@@ -40,26 +53,116 @@ def _get_urls_from_message(message_content: str) -> List[str]:
     # Simple regex to find URLs
     return re.findall(r"http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+", message_content)
 
-def ingest_knowledge(state: State) -> Dict[str, str]:
+def _message_text(message) -> str:
+    """Returns the text of a message whose content is either a string or a list of parts."""
+    if isinstance(message.content, list):
+        return " ".join([item['text'] for item in message.content if 'text' in item])
+    return message.content
+
+def _retrieval_query(messages: List[Any], turns: int = 3) -> str:
+    """Builds the retrieval query from the last user turns, so short follow-ups keep their context."""
+    human_texts = [_message_text(m) for m in messages if isinstance(m, HumanMessage)]
+    return " ".join(human_texts[-turns:])
+
+class NotionPageCache:
+    """
+    In-process cache of fetched Notion pages, keyed by (user, page ID).
+
+    A page mentioned again within NOTION_PAGE_CACHE_TTL_SECONDS is served without a
+    new fetch. The least recently used pages are dropped beyond `max_entries`.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+
+    def get(self, user_id: str, page_id: str) -> str | None:
+        entry = self._entries.get((user_id, page_id))
+        if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+            return None
+        self._entries.move_to_end((user_id, page_id))
+        return entry[1]
+
+    def put(self, user_id: str, page_id: str, content: str) -> None:
+        self._entries[(user_id, page_id)] = (time.monotonic(), content)
+        self._entries.move_to_end((user_id, page_id))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+notion_page_cache = NotionPageCache(NOTION_PAGE_CACHE_TTL_SECONDS)
+
+
+async def _fetch_notion_page(url: str, page_id: str, user_id: str, semaphore: asyncio.Semaphore) -> Tuple[List, List]:
+    """Fetches one Notion page (or serves it from the cache). Returns (sources, notices)."""
+    cached = notion_page_cache.get(user_id, page_id)
+    if cached is not None:
+        print(f"Notion page {page_id} served from cache")
+        return [(f"notion:{page_id}", cached)], []
+
+    # The timeout is enforced by the HTTP client (composio_fetch): the thread, and so
+    # the semaphore slot, is released as soon as a request times out.
+    async with semaphore:
+        try:
+            # Based on user's prompt, we guess the tool name and parameters.
+            result = await asyncio.to_thread(
+                composio_fetch.tools.execute,
+                "NOTION_FETCH_NOTION_BLOCK",
+                user_id=user_id,
+                arguments={"block_id": page_id},
+            )
+        except APITimeoutError:
+            print(f"Timeout fetching Notion page {page_id} after {NOTION_FETCH_TIMEOUT_SECONDS}s")
+            return [], [f"Timed out fetching content for {url}."]
+        except Exception as e:
+            print(f"Error executing Composio tool for Notion page {page_id}: {e}")
+            return [], [f"Error fetching content for {url}."]
+
+    print(f"Composio result: {str(result)[:500]}")
+    text = str(result) # Make sure it's a string
+    notion_page_cache.put(user_id, page_id, text)
+    return [(f"notion:{page_id}", text)], []
+
+def _ingest_document_mentions(content: str, user_id: str) -> Tuple[List, List]:
+    """Resolves @-mentions against the user's document titles. Returns (sources, notices)."""
+    doc_service = DocumentService()
+    try:
+        # Only the mentioned documents are loaded; titles come from a per-user index.
+        documents = doc_service.resolve_mentions(user_id=user_id, content=content)
+    except Exception as e:
+        print(f"Error fetching user documents for @-mentions: {e}")
+        return [], ["Error processing document mentions."]
+
+    for doc in documents:
+        print(f"Ingesting content from document: '{doc.title}'")
+    return [(f"document:{doc.id}", doc.contents or "") for doc in documents], []
+
+async def ingest_knowledge(state: State) -> Dict[str, Any]:
     """
     Ingests knowledge from sources specified in the user's message.
     Supports Notion pages (via URL) and internal documents (via @mention).
+
+    All sources are fetched concurrently (at most NOTION_FETCH_CONCURRENCY Notion
+    pages at a time, each with a timeout); recently fetched pages come from a cache.
+
+    Ingested sources are split into chunks kept in `knowledge_chunks`; only the
+    top-k chunks relevant to the current turn are injected in `knowledge`.
+    Sources already ingested with the same content (by source ID or content hash)
+    are skipped, and the chunks are capped at KNOWLEDGE_MAX_TOKENS.
     """
     print("---INGESTING KNOWLEDGE---")
     if not state.get("messages"):
         print("No messages in state, skipping knowledge ingestion.")
         return {}
 
-    last_message = state["messages"][-1]
-    
-    # Check if content is a list of dicts with 'text' key, or just a string
-    if isinstance(last_message.content, list):
-        content = " ".join([item['text'] for item in last_message.content if 'text' in item])
-    else:
-        content = last_message.content
+    content = _message_text(state["messages"][-1])
 
-    ingested_content = []
+    # (source_id, text) of each ingested source, and notices for this turn only
+    ingested_sources = []
+    notices = []
     user_id = state.get("user_id")
+    fetches = []
 
     # 1. Ingest from URLs
     urls = _get_urls_from_message(content)
@@ -67,68 +170,58 @@ def ingest_knowledge(state: State) -> Dict[str, str]:
         print(f"Found URLs: {urls}")
         if not user_id:
             print("User ID not found in state, skipping Notion URL ingestion.")
-            ingested_content.append("Could not process URLs: user not identified.")
+            notices.append("Could not process URLs: user not identified.")
         else:
+            semaphore = asyncio.Semaphore(NOTION_FETCH_CONCURRENCY)
             for url in urls:
                 page_id = _extract_notion_page_id(url)
                 if page_id:
                     print(f"Extracted Notion page ID: {page_id}")
-                    try:
-                        # Based on user's prompt, we guess the tool name and parameters.
-                        result = composio.tools.execute(
-                            "NOTION_FETCH_NOTION_BLOCK",
-                            user_id=user_id,
-                            arguments={"block_id": page_id},
-                        )
-                        print(f"Composio result: {result}")
-                        ingested_content.append(str(result)) # Make sure it's a string
-                    except Exception as e:
-                        print(f"Error executing Composio tool for Notion page {page_id}: {e}")
-                        ingested_content.append(f"Error fetching content for {url}.")
+                    fetches.append(_fetch_notion_page(url, page_id, user_id, semaphore))
                 else:
                     print(f"URL is not a recognizable Notion page URL: {url}")
                     # For now, we only handle Notion. We could add other handlers here.
-                    ingested_content.append(f"Unsupported URL: {url}")
+                    notices.append(f"Unsupported URL: {url}")
 
     # 2. Ingest from @-mentioned documents by looking for exact title matches
     if "@" in content:
         if not user_id:
             print("User ID not found in state, skipping document mention ingestion.")
-            ingested_content.append("Could not process document mentions: user not identified.")
+            notices.append("Could not process document mentions: user not identified.")
         else:
-            doc_service = DocumentService()
-            try:
-                user_documents = doc_service.get_user_documents(user_id=user_id)
-                
-                # Sort documents by title length (descending) to match longer, more specific titles first.
-                # This prevents a doc named "report" from matching inside "@final-report".
-                sorted_docs = sorted(user_documents, key=lambda d: len(d.title), reverse=True)
-                
-                content_to_scan = content
-                for doc in sorted_docs:
-                    mention = f"@{doc.title}"
-                    if mention in content_to_scan:
-                        print(f"Ingesting content from document: '{doc.title}'")
-                        ingested_content.append(doc.contents)
-                        # Remove the mention so it's not matched again by a shorter title
-                        content_to_scan = content_to_scan.replace(mention, "", 1)
-                        
-            except Exception as e:
-                print(f"Error fetching user documents for @-mentions: {e}")
-                ingested_content.append("Error processing document mentions.")
+            fetches.append(asyncio.to_thread(_ingest_document_mentions, content, user_id))
 
+    for sources, fetch_notices in await asyncio.gather(*fetches):
+        ingested_sources.extend(sources)
+        notices.extend(fetch_notices)
 
-    
-    current_knowledge = state.get("knowledge", "") or ""
-    
-    new_knowledge = "\n".join(ingested_content)
-    
-    updated_knowledge = f"{current_knowledge}\n\n{new_knowledge}".strip()
+    chunks = list(state.get("knowledge_chunks") or [])
+    sources = dict(state.get("knowledge_sources") or {})
+    added = []
+    for source_id, text in ingested_sources:
+        digest = content_hash(text)
+        if digest in sources.values():
+            print(f"Skipping already ingested source: {source_id}")
+            continue
+        if source_id in sources:
+            # The source changed since its last ingestion: replace its chunks
+            chunks = [chunk for chunk in chunks if chunk["source"] != source_id]
+        sources[source_id] = digest
+        added.append(source_id)
+        chunks.extend({"source": source_id, "text": chunk} for chunk in chunk_text(text))
 
-    print(f"Updated knowledge: {updated_knowledge[:500]}...")
+    query = _retrieval_query(state["messages"])
+    chunks, evicted = cap_chunks(chunks, query, KNOWLEDGE_MAX_TOKENS, keep=added)
+    for source_id in evicted:
+        print(f"Evicting least relevant source from knowledge: {source_id}")
+        sources.pop(source_id, None)
+
+    # Only the chunks relevant to the current turn go into the prompts
+    relevant = select_chunks(chunks, query, KNOWLEDGE_TOP_K)
+    knowledge = "\n\n---\n\n".join([*notices, *(chunk["text"] for chunk in relevant)])
+
+    print(f"Knowledge: {len(relevant)}/{len(chunks)} chunks injected, {len(knowledge)} chars")
     
     print("---FINISHED INGESTING KNOWLEDGE---")
     
-    output = {"knowledge": updated_knowledge, **state}
-        
-    return output
\ No newline at end of file
+    return {"knowledge": knowledge, "knowledge_chunks": chunks, "knowledge_sources": sources}
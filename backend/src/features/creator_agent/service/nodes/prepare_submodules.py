@@ -1,5 +1,5 @@
 # src/features/creator_agent/service/nodes/prepare_submodules.py
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from langchain_core.messages import AIMessage
 from src.features.creator_agent.service.state import State
 
@@ -15,6 +15,16 @@ def extract_all_submodules(structure: Dict[str, Any]) -> List[Dict[str, Any]]:
                          "lesson_description": lesson["description"]})
     return subs
 
+def module_bounds(submodules: List[Dict[str, Any]], index: int) -> Tuple[int, int]:
+    """Retourne (début, fin exclue) des leçons du module contenant la leçon `index`."""
+    module_id = submodules[index]["module_id"]
+    start, end = index, index
+    while start > 0 and submodules[start - 1]["module_id"] == module_id:
+        start -= 1
+    while end < len(submodules) and submodules[end]["module_id"] == module_id:
+        end += 1
+    return start, end
+
 def prepare(state: State) -> State:
     course_structure = state.get("course_structure")
     if not course_structure:
@@ -1,12 +1,19 @@
 # src/features/creator_agent/service/nodes/save_quiz_to_supabase.py
 import json
+from typing import Optional
 from src.supabase_client import supabase
+from src.features.quiz.quiz_cache import quiz_cache
+from src.features.formations.progression_service import ProgressionService
 from langchain_core.messages import AIMessage
 from src.features.creator_agent.service.state import State
 
 
-def save_quiz_to_supabase(state: State) -> State:
-    """Sauvegarde le quiz généré dans la base de données Supabase"""
+def save_quiz_to_supabase(state: State, generation_key: Optional[str] = None) -> State:
+    """
+    Sauvegarde le quiz généré dans la base de données Supabase.
+    Avec `generation_key` (thread_id de la génération), un second appel pour le même
+    module renvoie le quiz déjà enregistré (reprise d'une génération interrompue).
+    """
     
     try:
         print("🔄 Début de la sauvegarde du quiz en base de données...")
@@ -25,45 +32,23 @@ def save_quiz_to_supabase(state: State) -> State:
         
         print(f"📋 Quiz trouvé pour le module {module_id}, sauvegarde en cours...")
         
-        # 1. Insérer le quiz principal
-        quiz_insert_data = {
-            "module_id": numeric_module_id,
-            "title": quiz_data["title"],
-            "description": quiz_data["description"],
-            "passing_score": 70,  # Score par défaut
-            "max_attempts": 3,    # Tentatives par défaut
-            "is_active": True
-        }
-        
-        print(f"💾 Insertion du quiz principal pour module_id={numeric_module_id}")
-        quiz_result = supabase.table("quizzes").insert(quiz_insert_data).execute()
-        quiz_id = quiz_result.data[0]["id"]
-        print(f"✅ Quiz principal créé avec l'ID: {quiz_id}")
-        
-        # 2. Insérer les questions
-        for question_index, question in enumerate(quiz_data["questions"]):
-            question_insert_data = {
-                "quiz_id": quiz_id,
-                "question_text": question["question_text"],
-                "question_type": question["question_type"],
-                "points": 1,  # Points par défaut
-                "order_index": question_index,
-                "explanation": question.get("explanation", "")
-            }
-            
-            question_result = supabase.table("quiz_questions").insert(question_insert_data).execute()
-            question_id = question_result.data[0]["id"]
-            
-            # 3. Insérer les réponses pour chaque question
-            for answer_index, answer in enumerate(question["answers"]):
-                answer_insert_data = {
-                    "question_id": question_id,
-                    "answer_text": answer["answer_text"],
-                    "is_correct": answer["is_correct"],
-                    "order_index": answer_index
-                }
-                
-                supabase.table("quiz_answers").insert(answer_insert_data).execute()
+        # Quiz, questions et réponses sont insérés en un seul appel RPC (une transaction),
+        # qui désactive l'ancien quiz du module et est idempotent par generation_key :
+        # voir migrations/008_single_active_quiz.sql et 009_idempotent_module_quiz.sql
+        print(f"💾 Insertion du quiz complet pour module_id={numeric_module_id}")
+        quiz_result = supabase.rpc("save_module_quiz", {
+            "p_module_id": numeric_module_id,
+            "p_quiz": quiz_data,
+            "p_passing_score": 70,  # Score par défaut
+            "p_max_attempts": 3,    # Tentatives par défaut
+            "p_generation_key": generation_key
+        }).execute()
+        quiz_id = quiz_result.data
+        # save_module_quiz a remplacé le quiz actif du module (sauf si ce quiz était déjà
+        # enregistré) : les lectures suivantes rechargent le quiz actif depuis la base
+        quiz_cache.invalidate_module(numeric_module_id)
+        # L'ancien quiz désactivé, la progression liée est effacée (migrations/006)
+        ProgressionService.invalidate_module_formations(numeric_module_id)
         
         print(f"🎉 Quiz complètement sauvegardé! ID={quiz_id}, {len(quiz_data['questions'])} questions")
         
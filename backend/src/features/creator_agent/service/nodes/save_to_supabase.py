@@ -1,55 +1,79 @@
 # backend/src/features/creator_agent/service/nodes/save_to_supabase.py
-from langgraph.graph import END
+from typing import Any, Dict, List
 from src.supabase_client import supabase
 from langchain_core.messages import AIMessage
+from shared.config import LESSON_SAVE_BATCH_SIZE
 from src.features.creator_agent.service.state import State
+from src.features.creator_agent.service.nodes.prepare_submodules import module_bounds
 
-def save(state: State) -> State:
-    submodules = state.get("submodules", [])
-    current_index = state.get("current_index", 0)
-    outputs = state.get("outputs", {})
-    
-    if current_index >= len(submodules):
-        return {"messages": [AIMessage(content="💾 Erreur : Index invalide pour les sous-modules.")]}
 
-    lesson_info = submodules[current_index]
-    lesson_id = lesson_info.get("lesson_id")
-    lesson_title = lesson_info.get("lesson_title")
-    html_content = outputs.get(lesson_id)
+def pending_lessons(submodules: List[Dict[str, Any]], outputs: Dict[str, str], saved: List[str]) -> List[Dict[str, Any]]:
+    """Leçons générées (présentes dans outputs) mais pas encore sauvegardées en base."""
+    saved_ids = set(saved)
+    return [
+        sub for sub in submodules
+        if sub["lesson_id"] in outputs and sub["lesson_id"] not in saved_ids
+    ]
 
-    if not all([lesson_id, html_content]):
-        return {"messages": [AIMessage(content=f"💾 Erreur : Données manquantes pour la leçon {lesson_id}. Sauvegarde ignorée.")]}
+def flush_lessons(lessons: List[Dict[str, Any]], outputs: Dict[str, str], raise_on_error: bool = False) -> State:
+    """
+    Sauvegarde en un seul appel RPC le contenu de toutes les leçons du buffer
+    (voir migrations/001_update_submodules_content.sql).
+    Avec raise_on_error, un échec lève une RuntimeError au lieu d'être signalé
+    dans les messages.
+    """
+    if not lessons:
+        return {"messages": [], "saved_lessons": []}
 
-    try:
-        numeric_id = int(lesson_id.split('_')[1])
-        
-        # Start save message
-        start_save_msg = AIMessage(
-            content=f"💾 Sauvegarde en cours: {lesson_title} ({current_index + 1}/{len(submodules)})"
-        )
-        
-        supabase.table("submodules").update({"content": html_content}).eq("id", numeric_id).execute()
-        
-        # Success save message
-        save_success_msg = AIMessage(
-            content=f"✅💾 Leçon sauvegardée: {lesson_title} | Base de données mise à jour"
-        )
-        
-        messages = [start_save_msg, save_success_msg]
-        
-        # Note: La finalisation de la formation se fait maintenant dans le node 'finalize'
-        # pour s'assurer qu'elle se produit après tous les quiz
+    lesson_ids = [sub["lesson_id"] for sub in lessons]
+    rows = [
+        {"id": int(sub["lesson_id"].split('_')[1]), "content": outputs[sub["lesson_id"]]}
+        for sub in lessons
+    ]
 
+    try:
+        supabase.rpc("update_submodules_content", {"p_lessons": rows}).execute()
     except Exception as e:
-        error_message = f"💾 Erreur lors de la sauvegarde pour la leçon {lesson_id}: {str(e)}"
+        # Les leçons restent dans le buffer : depuis 'save', le flush suivant ou
+        # 'finalize' retentera la sauvegarde ; depuis 'finalize', l'erreur remonte
+        error_message = f"💾 Erreur lors de la sauvegarde groupée de {len(rows)} leçons: {str(e)}"
         print(f"--- [ERREUR] {error_message} ---")
-        return {"messages": [AIMessage(content=error_message)]}
+        if raise_on_error:
+            raise RuntimeError(error_message) from e
+        return {"messages": [AIMessage(content=error_message)], "saved_lessons": []}
 
     return {
-        "messages": messages,
+        "messages": [
+            AIMessage(content=f"✅💾 {len(rows)} leçons sauvegardées | Base de données mise à jour")
+        ],
+        "saved_lessons": lesson_ids,
         "lesson_saved": {
-            "lesson_id": lesson_id,
-            "lesson_title": lesson_title,
-            "progress": f"{current_index + 1}/{len(submodules)}"
+            "lesson_ids": lesson_ids,
+            "count": len(lesson_ids)
+        }
+    }
+
+def save(state: State) -> State:
+    """
+    Ajoute les leçons du module courant au buffer d'écriture, et le vide en base
+    dès qu'il atteint LESSON_SAVE_BATCH_SIZE leçons. Le reliquat est sauvegardé
+    par le node 'finalize'.
+    """
+    submodules = state.get("submodules", [])
+    current_index = state.get("current_index", 0)
+    outputs = state.get("outputs", {})
+
+    if current_index >= len(submodules):
+        return {"messages": [AIMessage(content="💾 Erreur : Index invalide pour les sous-modules.")]}
+
+    _, end = module_bounds(submodules, current_index)
+    buffered = pending_lessons(submodules[:end], outputs, state.get("saved_lessons") or [])
+
+    if len(buffered) < LESSON_SAVE_BATCH_SIZE:
+        return {
+            "messages": [AIMessage(content=f"🗂️ {len(buffered)} leçon(s) en attente de sauvegarde groupée ({end}/{len(submodules)})")]
         }
-    }
\ No newline at end of file
+
+    # Note: La finalisation de la formation se fait dans le node 'finalize'
+    # pour s'assurer qu'elle se produit après tous les quiz
+    return flush_lessons(buffered, outputs)
@@ -0,0 +1,129 @@
+import hashlib
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from shared.config import KNOWLEDGE_CHUNK_WORDS, KNOWLEDGE_CHUNK_OVERLAP
+
+
+def tokenize(text: str) -> List[str]:
+    """Découpe un texte en termes normalisés (minuscules, mots d'au moins 2 caractères)."""
+    return [token for token in re.findall(r"\w+", text.lower()) if len(token) > 1]
+
+
+def content_hash(text: str) -> str:
+    """Empreinte du contenu d'une source, pour détecter les ré-ingestions."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimation grossière du nombre de tokens (~4 caractères par token)."""
+    return len(text) // 4
+
+
+def chunk_text(
+    text: str,
+    chunk_words: int = KNOWLEDGE_CHUNK_WORDS,
+    overlap: int = KNOWLEDGE_CHUNK_OVERLAP,
+) -> List[str]:
+    """
+    Découpe un document en fenêtres glissantes de `chunk_words` mots,
+    avec `overlap` mots de recouvrement entre deux chunks consécutifs.
+    """
+    words = text.split()
+    if not words:
+        return []
+    step = max(chunk_words - overlap, 1)
+    return [
+        " ".join(words[start:start + chunk_words])
+        for start in range(0, max(len(words) - overlap, 1), step)
+    ]
+
+
+class BM25Index:
+    """Index BM25 en mémoire sur une liste de chunks."""
+
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(tokenize(doc)) for doc in documents]
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+        doc_freqs: Counter = Counter()
+        for tf in self.term_freqs:
+            doc_freqs.update(tf.keys())
+        n = len(documents)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in doc_freqs.items()
+        }
+
+    def score(self, query_terms: List[str], index: int) -> float:
+        tf = self.term_freqs[index]
+        norm = self.k1 * (1 - self.b + self.b * self.lengths[index] / (self.avg_length or 1))
+        return sum(
+            self.idf[term] * tf[term] * (self.k1 + 1) / (tf[term] + norm)
+            for term in query_terms if term in tf
+        )
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Retourne les `k` meilleurs (index, score) ayant un score strictement positif."""
+        query_terms = set(tokenize(query))
+        scored = [(i, self.score(query_terms, i)) for i in range(len(self.term_freqs))]
+        scored = [item for item in scored if item[1] > 0]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:k]
+
+
+def select_chunks(chunks: List[Dict[str, str]], query: str, k: int) -> List[Dict[str, str]]:
+    """
+    Sélectionne les `k` chunks les plus pertinents pour la requête, restitués dans
+    l'ordre des documents. Si aucun chunk ne correspond (ex. "ok, vas-y"), les
+    premiers chunks sont utilisés.
+    """
+    if len(chunks) <= k:
+        return chunks
+    hits = BM25Index([chunk["text"] for chunk in chunks]).search(query, k)
+    if not hits:
+        return chunks[:k]
+    return [chunks[i] for i in sorted(i for i, _ in hits)]
+
+
+def cap_chunks(
+    chunks: List[Dict[str, str]],
+    query: str,
+    max_tokens: int,
+    keep: Iterable[str] = (),
+) -> Tuple[List[Dict[str, str]], Set[str]]:
+    """
+    Borne le volume total des chunks à `max_tokens` en évinçant des sources entières,
+    les moins pertinentes pour la requête d'abord (score BM25 cumulé de leurs chunks).
+    Les sources de `keep` (ingérées à ce tour) sont évincées en dernier.
+
+    Returns:
+        (chunks conservés, identifiants des sources évincées)
+    """
+    tokens_by_source: Dict[str, int] = defaultdict(int)
+    for chunk in chunks:
+        tokens_by_source[chunk["source"]] += estimate_tokens(chunk["text"])
+    total = sum(tokens_by_source.values())
+    if total <= max_tokens:
+        return chunks, set()
+
+    index = BM25Index([chunk["text"] for chunk in chunks])
+    query_terms = set(tokenize(query))
+    relevance: Dict[str, float] = defaultdict(float)
+    for i, chunk in enumerate(chunks):
+        relevance[chunk["source"]] += index.score(query_terms, i)
+
+    keep = set(keep)
+    evicted: Set[str] = set()
+    for source in sorted(tokens_by_source, key=lambda src: (src in keep, relevance[src])):
+        if total <= max_tokens:
+            break
+        evicted.add(source)
+        total -= tokens_by_source[source]
+
+    return [chunk for chunk in chunks if chunk["source"] not in evicted], evicted
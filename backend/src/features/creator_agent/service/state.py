@@ -6,16 +6,41 @@ from langgraph.graph.message import add_messages
 import operator
 
 
+def merge_outputs(left: Dict[str, str] | None, right: Dict[str, str] | None) -> Dict[str, str]:
+    """Fusionne les sorties produites en parallèle (leçons et quiz) par clé."""
+    return {**(left or {}), **(right or {})}
+
+
 class State(TypedDict):
 
     messages: Annotated[list[BaseMessage], add_messages]
 
     user_id: Optional[str] = None
     knowledge: Optional[str] = None
+    knowledge_chunks: Optional[List[Dict[str, str]]] = None
+    knowledge_sources: Optional[Dict[str, str]] = None  # source_id -> hash du contenu
     confidence_score: Optional[int] = None
     course_structure: Optional[Dict[str, Any]] = None
     
     submodules: Optional[List[Dict[str, Any]]] = None
     current_index: int = 0                       
-    outputs: Dict[str, str] = {}   
+    outputs: Annotated[Dict[str, str], merge_outputs] = {}
+    saved_lessons: Annotated[List[str], operator.add] = []
+
+
+class LessonTask(TypedDict):
+    """Charge utile envoyée (via Send) à chaque génération de leçon parallèle."""
+
+    submodule: Dict[str, Any]
+    position: int
+    total: int
     
+
+
+
+class QuizTask(TypedDict):
+    """Charge utile envoyée (via Send) pour générer et sauvegarder le quiz d'un module."""
+
+    submodules: List[Dict[str, Any]]
+    current_index: int
+    outputs: Dict[str, str]
@@ -1,5 +1,8 @@
 from src.supabase_client import supabase
 from src.features.formations.schema import FormationStructureCreate, ModuleStructure
+from src.features.formations.progression_cache import progression_cache
+from src.features.formations.access_cache import access_cache
+from src.features.quiz.quiz_cache import quiz_cache
 
 def apply_course_changes(formation_id: int, proposed_structure: FormationStructureCreate):
     """
@@ -30,6 +33,8 @@ def apply_course_changes(formation_id: int, proposed_structure: FormationStructu
             for module_id in modules_to_delete:
                 supabase.table("formation_modules").delete().eq("module_id", module_id).execute()
                 supabase.table("modules").delete().eq("id", module_id).execute()
+                quiz_cache.invalidate_module(module_id)
+                access_cache.invalidate_module(module_id)
 
         # --- Lessons Processing for each module ---
         for module_data in proposed_structure.modules:
@@ -69,4 +74,7 @@ def apply_course_changes(formation_id: int, proposed_structure: FormationStructu
         return {"status": "success", "message": "Course updated successfully."}
 
     except Exception as e:
-        return {"status": "error", "message": f"An error occurred: {str(e)}"} 
\ No newline at end of file
+        return {"status": "error", "message": f"An error occurred: {str(e)}"}
+    finally:
+        # Modules may have been reordered or deleted, even on partial failure
+        progression_cache.invalidate_formation(formation_id) 
\ No newline at end of file
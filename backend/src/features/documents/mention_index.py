@@ -0,0 +1,83 @@
+# backend/src/features/documents/mention_index.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from shared.config import MENTION_INDEX_TTL_SECONDS
+
+
+class MentionIndex:
+    """
+    Trie des titres de documents d'un utilisateur, pour résoudre les @-mentions
+    d'un message en un seul parcours, sans charger le contenu des documents.
+    """
+
+    _END = "\0"
+
+    def __init__(self, titles: List[Tuple[int, str]]):
+        self.root: Dict = {}
+        for document_id, title in titles:
+            if not title:
+                continue
+            node = self.root
+            for char in title:
+                node = node.setdefault(char, {})
+            node[self._END] = document_id
+
+    def find(self, content: str) -> List[int]:
+        """
+        Retourne les ids des documents mentionnés ("@<titre>"), dans l'ordre du message.
+        À chaque '@', le titre le plus long est retenu : "@final-report" ne correspond
+        pas aussi au document "final".
+        """
+        found: List[int] = []
+        position = content.find("@")
+        while position != -1:
+            node, match, match_end = self.root, None, position + 1
+            for i in range(position + 1, len(content)):
+                node = node.get(content[i])
+                if node is None:
+                    break
+                if self._END in node:
+                    match, match_end = node[self._END], i + 1
+            if match is not None and match not in found:
+                found.append(match)
+            position = content.find("@", match_end)
+        return found
+
+
+class MentionIndexCache:
+    """
+    Index des @-mentions par utilisateur. Invalidé par le DocumentService à chaque
+    création / mise à jour / suppression ; le TTL couvre les modifications faites
+    par un autre worker.
+    """
+
+    def __init__(self, ttl_seconds: float, max_users: int = 512):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, MentionIndex]]" = OrderedDict()
+
+    def get(self, user_id: str) -> Optional[MentionIndex]:
+        with self._lock:
+            entry = self._entries.get(str(user_id))
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                return None
+            self._entries.move_to_end(str(user_id))
+            return entry[1]
+
+    def put(self, user_id: str, index: MentionIndex) -> None:
+        with self._lock:
+            self._entries[str(user_id)] = (time.monotonic(), index)
+            self._entries.move_to_end(str(user_id))
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+
+mention_index_cache = MentionIndexCache(MENTION_INDEX_TTL_SECONDS)
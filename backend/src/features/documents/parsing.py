@@ -0,0 +1,126 @@
+# backend/src/features/documents/parsing.py
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from shared.config import (
+    DOCUMENT_PARSE_WORKERS,
+    DOCUMENT_CHUNK_CHARS,
+    DOCUMENT_CHUNK_BATCH_SIZE,
+    DOCUMENT_PREVIEW_CHARS,
+)
+
+_SPOOL_BLOCK_SIZE = 1024 * 1024
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """
+    Pool de processus partagé pour l'extraction de texte (unstructured, OCR).
+    Créé au premier upload ; "spawn" évite de forker le serveur et ses threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=DOCUMENT_PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def spool_upload(file: BinaryIO, suffix: str = "") -> Tuple[str, str]:
+    """
+    Copie l'upload sur disque par blocs.
+
+    Returns:
+        (chemin du fichier temporaire, empreinte sha256 du contenu)
+    """
+    file.seek(0)
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        for block in iter(lambda: file.read(_SPOOL_BLOCK_SIZE), b""):
+            digest.update(block)
+            tmp.write(block)
+        return tmp.name, digest.hexdigest()
+
+
+def _page_number(element: Any) -> Optional[int]:
+    metadata = getattr(element, "metadata", None)
+    return getattr(metadata, "page_number", None)
+
+
+def ingest_document(path: str, content_type: Optional[str], document_id: int) -> Dict[str, Any]:
+    """
+    Exécuté dans un processus du pool : extrait le texte du fichier et l'écrit dans
+    `document_chunks` au fil de l'eau, par lots de DOCUMENT_CHUNK_BATCH_SIZE chunks
+    d'au plus ~DOCUMENT_CHUNK_CHARS caractères (un chunk ne chevauche pas deux pages).
+
+    Seul un aperçu borné du texte (DOCUMENT_PREVIEW_CHARS) est renvoyé au serveur.
+    """
+    from unstructured.partition.auto import partition
+    from src.supabase_client import supabase
+
+    try:
+        elements = partition(filename=path, content_type=content_type)
+    finally:
+        os.remove(path)
+
+    # Une nouvelle extraction remplace les chunks d'une tentative précédente
+    supabase.table('document_chunks').delete().eq('document_id', document_id).execute()
+
+    batch: List[Dict[str, Any]] = []
+    parts: List[str] = []
+    size, page, chunk_count, preview = 0, None, 0, []
+    preview_size = 0
+
+    def close_chunk() -> None:
+        nonlocal parts, size, chunk_count
+        if parts:
+            batch.append({
+                'document_id': document_id,
+                'chunk_index': chunk_count,
+                'page_number': page,
+                'content': "\n\n".join(parts),
+            })
+            chunk_count += 1
+        parts, size = [], 0
+
+    def flush_batch() -> None:
+        if batch:
+            supabase.table('document_chunks').insert(batch).execute()
+            batch.clear()
+
+    for element in elements:
+        text = str(element)
+        if not text:
+            continue
+        element_page = _page_number(element)
+        if parts and (element_page != page or size + len(text) > DOCUMENT_CHUNK_CHARS):
+            close_chunk()
+            if len(batch) >= DOCUMENT_CHUNK_BATCH_SIZE:
+                flush_batch()
+        page = element_page
+        parts.append(text)
+        size += len(text)
+        if preview_size < DOCUMENT_PREVIEW_CHARS:
+            preview.append(text[:DOCUMENT_PREVIEW_CHARS - preview_size])
+            preview_size += len(preview[-1])
+
+    close_chunk()
+    flush_batch()
+    return {'chunk_count': chunk_count, 'preview': "\n\n".join(preview)}
+
+
+def submit_ingestion(path: str, content_type: Optional[str], document_id: int) -> Future:
+    try:
+        return get_parse_pool().submit(ingest_document, path, content_type, document_id)
+    except Exception:
+        os.remove(path)
+        raise
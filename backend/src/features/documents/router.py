@@ -14,7 +14,7 @@ router = APIRouter(
 def get_document_service():
     return DocumentService()
 
-@router.post("/", response_model=schema.Document, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=schema.Document, status_code=status.HTTP_202_ACCEPTED)
 def create_document(
     title: str = Form(...),
     file: UploadFile = File(...),
@@ -23,7 +23,8 @@ def create_document(
 ):
     """
     Crée un nouveau document en uploadant un fichier.
-    Le contenu est automatiquement extrait par le parser.
+    Le contenu est extrait en arrière-plan : le document est retourné avec le statut
+    'processing', à suivre via GET /documents/{document_id}/status.
     """
     try:
         user_id = current_user.get('sub')
@@ -57,6 +58,29 @@ def get_user_documents(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An unexpected error occurred: {str(e)}")
 
 
+@router.get("/{document_id}/status", response_model=schema.DocumentStatus)
+def get_document_status(
+    document_id: int,
+    current_user: dict = Depends(get_current_user),
+    service: DocumentService = Depends(get_document_service)
+):
+    """
+    Récupère le statut d'extraction d'un document ('processing', 'ready' ou 'failed').
+    """
+    try:
+        user_id = current_user.get('sub')
+        if not user_id:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+
+        return service.get_document_status(user_id=user_id, document_id=document_id)
+    except DocumentNotFound as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except DocumentServiceError as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An unexpected error occurred: {str(e)}")
+
+
 @router.get("/{document_id}", response_model=schema.Document)
 def get_document(
     document_id: int,
@@ -13,7 +13,8 @@ class DocumentCreate(BaseModel):
 class Document(BaseModel):
     id: int
     title: str
-    contents: str
+    contents: Optional[str] = None  # texte complet, ou aperçu dans les listes (voir document_chunks)
+    status: str = "ready"  # 'processing' pendant l'extraction, puis 'ready' ou 'failed'
     profile_id: UUID
     created_at: datetime
 
@@ -21,6 +22,19 @@ class Document(BaseModel):
         from_attributes = True
 
 
+# Schéma pour le suivi de l'extraction d'un document uploadé
+class DocumentStatus(BaseModel):
+    id: int
+    status: str
+    error: Optional[str] = None
+
+
+# Schéma réduit (sans le contenu) pour l'index des @-mentions
+class DocumentTitle(BaseModel):
+    id: int
+    title: str
+
+
 # Schéma pour la mise à jour d'un document
 class DocumentUpdate(BaseModel):
     title: Optional[str] = None
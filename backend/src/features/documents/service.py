@@ -1,11 +1,16 @@
 # backend/src/features/documents/service.py
 import logging
-from typing import List
+import os
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import Future
+from typing import Dict, List, Optional
 from fastapi import UploadFile
-from unstructured.partition.auto import partition
 from postgrest import APIResponse
+from shared.config import DOCUMENT_CHUNK_PAGE_SIZE, DOCUMENT_PROCESSING_TIMEOUT_SECONDS
 from src.supabase_client import supabase
 from . import schema
+from .mention_index import MentionIndex, mention_index_cache
+from .parsing import spool_upload, submit_ingestion
 
 class DocumentNotFound(Exception):
     pass
@@ -22,25 +27,146 @@ class DocumentService:
         self.supabase = supabase
 
     def create_document(self, user_id: str, title: str, file: UploadFile) -> schema.Document:
+        """
+        Crée le document avec le statut 'processing' et lance l'extraction du texte
+        dans le pool de processus ; le statut passe à 'ready' (ou 'failed') à la fin.
+        Le texte est stocké dans document_chunks, documents.contents n'en garde qu'un aperçu.
+
+        Si l'utilisateur a déjà extrait un fichier identique (même sha256), ses chunks
+        sont recopiés et le document est 'ready' immédiatement, sans nouvelle extraction ;
+        si la copie échoue, le fichier est extrait normalement.
+        """
+        path = None
         try:
-            elements = partition(file=file.file, content_type=file.content_type)
-            extracted_content = "\n\n".join([str(el) for el in elements])
+            suffix = os.path.splitext(file.filename or "")[1]
+            path, content_hash = spool_upload(file.file, suffix=suffix)
+            extraction = self._find_extraction(user_id, content_hash)
 
             response: APIResponse = self.supabase.table('documents').insert({
                 'title': title,
-                'contents': extracted_content,
+                'status': 'processing',
+                'content_hash': content_hash,
                 'profile_id': user_id
             }).execute()
 
             if not response.data:
                  raise DocumentServiceError("Failed to create document: no data returned from Supabase.")
 
-            return schema.Document.model_validate(response.data[0])
+            document = schema.Document.model_validate(response.data[0])
+            mention_index_cache.invalidate(user_id)
+
+            if extraction and self._reuse_extraction(user_id, document.id, extraction):
+                os.remove(path)
+                return document.model_copy(update={'contents': extraction['contents'], 'status': 'ready'})
+
+            future = submit_ingestion(path, file.content_type, document.id)
+            future.add_done_callback(
+                lambda f: self._complete_extraction(user_id, document.id, f)
+            )
+            return document
 
         except Exception as e:
+            if path and os.path.exists(path):
+                os.remove(path)
             logging.error(f"An error occurred in DocumentService.create_document: {e}", exc_info=True)
             raise DocumentServiceError(str(e)) from e
 
+    def _find_extraction(self, user_id: str, content_hash: str) -> Optional[dict]:
+        """Document de l'utilisateur déjà extrait à partir d'un fichier de même empreinte, s'il existe."""
+        response: APIResponse = self.supabase.table('documents').select('id, contents').eq('profile_id', user_id).eq('content_hash', content_hash).eq('status', 'ready').limit(1).execute()
+        return response.data[0] if response.data else None
+
+    def _reuse_extraction(self, user_id: str, document_id: int, extraction: dict) -> bool:
+        """
+        Recopie les chunks d'une extraction existante puis passe le document à 'ready'.
+        Renvoie False si la copie échoue : le document reste 'processing' et doit être
+        extrait (ingest_document remplace les chunks éventuellement copiés).
+        """
+        try:
+            logging.info(f"Document {document_id}: reusing extraction of document {extraction['id']}")
+            self.supabase.rpc("copy_document_chunks", {
+                "p_source_id": extraction['id'],
+                "p_target_id": document_id
+            }).execute()
+            self.supabase.table('documents').update({
+                'contents': extraction['contents'],
+                'status': 'ready',
+                'error': None
+            }).eq('id', document_id).eq('profile_id', user_id).execute()
+            return True
+        except Exception as e:
+            logging.error(f"Document {document_id}: copy of extraction {extraction['id']} failed, parsing again: {e}", exc_info=True)
+            return False
+
+    def _complete_extraction(self, user_id: str, document_id: int, future: Future) -> None:
+        """Enregistre le résultat de l'extraction (appelé quand le job du pool se termine)."""
+        try:
+            result = future.result()
+            update = {'contents': result['preview'], 'status': 'ready', 'error': None}
+        except Exception as e:
+            logging.error(f"Document {document_id} parsing failed: {e}", exc_info=True)
+            update = {'status': 'failed', 'error': str(e)}
+
+        try:
+            self.supabase.table('documents').update(update).eq('id', document_id).eq('profile_id', user_id).execute()
+        except Exception as e:
+            logging.error(f"An error occurred in DocumentService._complete_extraction: {e}", exc_info=True)
+
+    def get_document_status(self, user_id: str, document_id: int) -> schema.DocumentStatus:
+        """
+        Statut de l'extraction. Un document 'processing' depuis plus de
+        DOCUMENT_PROCESSING_TIMEOUT_SECONDS a perdu son job (le pool de processus ne
+        survit pas à un redémarrage du worker) : il passe en 'failed'.
+        """
+        try:
+            response: APIResponse = self.supabase.table('documents').select('id, status, error, created_at').eq('id', document_id).eq('profile_id', user_id).execute()
+            if response.data and self._is_stale(response.data[0]):
+                error = "Extraction interrompue, veuillez ré-uploader le document."
+                logging.warning(f"Document {document_id}: extraction timed out, marking as failed")
+                self.supabase.table('documents').update({'status': 'failed', 'error': error}).eq('id', document_id).eq('profile_id', user_id).eq('status', 'processing').execute()
+                response.data[0].update({'status': 'failed', 'error': error})
+        except Exception as e:
+            logging.error(f"An error occurred in DocumentService.get_document_status: {e}", exc_info=True)
+            raise DocumentServiceError(str(e)) from e
+
+        if not response.data:
+            raise DocumentNotFound("Document not found")
+        return schema.DocumentStatus.model_validate(response.data[0])
+
+    @staticmethod
+    def _is_stale(document: dict) -> bool:
+        """Le document est-il 'processing' depuis plus de DOCUMENT_PROCESSING_TIMEOUT_SECONDS ?"""
+        if document.get('status') != 'processing' or not document.get('created_at'):
+            return False
+        created_at = datetime.fromisoformat(document['created_at'])
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) - created_at > timedelta(seconds=DOCUMENT_PROCESSING_TIMEOUT_SECONDS)
+
+    def _chunked_contents(self, document_ids: List[int]) -> Dict[int, str]:
+        """
+        Reconstitue le texte complet des documents à partir de leurs chunks, lus par
+        pages de DOCUMENT_CHUNK_PAGE_SIZE jusqu'à une page incomplète.
+        """
+        parts: Dict[int, List[str]] = {}
+        offset = 0
+        while True:
+            response: APIResponse = (
+                self.supabase.table('document_chunks')
+                .select('document_id, content')
+                .in_('document_id', document_ids)
+                .order('document_id')
+                .order('chunk_index')
+                .range(offset, offset + DOCUMENT_CHUNK_PAGE_SIZE - 1)
+                .execute()
+            )
+            for row in response.data:
+                parts.setdefault(row['document_id'], []).append(row['content'])
+            if len(response.data) < DOCUMENT_CHUNK_PAGE_SIZE:
+                break
+            offset += DOCUMENT_CHUNK_PAGE_SIZE
+        return {document_id: "\n\n".join(chunks) for document_id, chunks in parts.items()}
+
     def get_user_documents(self, user_id: str) -> List[schema.Document]:
         try:
             response: APIResponse = self.supabase.table('documents').select('*').eq('profile_id', user_id).execute()
@@ -49,14 +175,54 @@ class DocumentService:
             logging.error(f"An error occurred in DocumentService.get_user_documents: {e}", exc_info=True)
             raise DocumentServiceError(str(e)) from e
 
-    def get_document(self, user_id: str, document_id: int) -> schema.Document:
+    def get_user_document_titles(self, user_id: str) -> List[schema.DocumentTitle]:
+        try:
+            response: APIResponse = self.supabase.table('documents').select('id, title').eq('profile_id', user_id).execute()
+            return [schema.DocumentTitle.model_validate(doc) for doc in response.data]
+        except Exception as e:
+            logging.error(f"An error occurred in DocumentService.get_user_document_titles: {e}", exc_info=True)
+            raise DocumentServiceError(str(e)) from e
+
+    def resolve_mentions(self, user_id: str, content: str) -> List[schema.Document]:
+        """
+        Retourne les documents mentionnés ("@<titre>") dans `content`, dans l'ordre du message.
+        Les titres sont indexés par utilisateur (mention_index_cache) ; seul le contenu des
+        documents mentionnés est chargé.
+        """
+        index = mention_index_cache.get(user_id)
+        if index is None:
+            titles = self.get_user_document_titles(user_id)
+            index = MentionIndex([(doc.id, doc.title) for doc in titles])
+            mention_index_cache.put(user_id, index)
+
+        document_ids = index.find(content)
+        if not document_ids:
+            return []
+
+        try:
+            response: APIResponse = self.supabase.table('documents').select('*').eq('profile_id', user_id).in_('id', document_ids).execute()
+            documents = {doc['id']: schema.Document.model_validate(doc) for doc in response.data}
+            # Les documents découpés en chunks n'ont qu'un aperçu dans 'contents'
+            for document_id, contents in self._chunked_contents(list(documents)).items():
+                documents[document_id].contents = contents
+            return [documents[document_id] for document_id in document_ids if document_id in documents]
+        except Exception as e:
+            logging.error(f"An error occurred in DocumentService.resolve_mentions: {e}", exc_info=True)
+            raise DocumentServiceError(str(e)) from e
+
+    def get_document(self, user_id: str, document_id: int, with_contents: bool = True) -> schema.Document:
         try:
             response: APIResponse = self.supabase.table('documents').select('*').eq('id', document_id).eq('profile_id', user_id).single().execute()
             
             if not response.data:
                 raise DocumentNotFound("Document not found")
                 
-            return schema.Document.model_validate(response.data)
+            document = schema.Document.model_validate(response.data)
+            if with_contents:
+                contents = self._chunked_contents([document.id]).get(document.id)
+                if contents is not None:
+                    document.contents = contents
+            return document
         except Exception as e:
             if "jsonb_path_query_first" in str(e) or "List" in str(e): # More robust error check for PostgREST single()
                  raise DocumentNotFound("Document not found") from e
@@ -64,7 +230,7 @@ class DocumentService:
             raise DocumentServiceError(str(e)) from e
 
     def update_document(self, user_id: str, document_id: int, document_update: schema.DocumentUpdate) -> schema.Document:
-        self.get_document(user_id, document_id)
+        self.get_document(user_id, document_id, with_contents=False)
 
         update_data = document_update.dict(exclude_unset=True)
 
@@ -72,21 +238,28 @@ class DocumentService:
             raise NoFieldsToUpdate("No fields to update")
             
         try:
+            if 'contents' in update_data:
+                # Le contenu édité remplace le texte extrait : il ne correspond plus au fichier
+                self.supabase.table('document_chunks').delete().eq('document_id', document_id).execute()
+                update_data['content_hash'] = None
+
             response: APIResponse = self.supabase.table('documents').update(update_data).eq('id', document_id).eq('profile_id', user_id).execute()
             
             if not response.data:
                 raise DocumentServiceError("Failed to update document: no data returned from Supabase.")
 
+            mention_index_cache.invalidate(user_id)
             return schema.Document.model_validate(response.data[0])
         except Exception as e:
             logging.error(f"An error occurred in DocumentService.update_document: {e}", exc_info=True)
             raise DocumentServiceError(str(e)) from e
 
     def delete_document(self, user_id: str, document_id: int) -> None:
-        self.get_document(user_id, document_id)
+        self.get_document(user_id, document_id, with_contents=False)
 
         try:
             self.supabase.table('documents').delete().eq('id', document_id).eq('profile_id', user_id).execute()
+            mention_index_cache.invalidate(user_id)
         except Exception as e:
             logging.error(f"An error occurred in DocumentService.delete_document: {e}", exc_info=True)
             raise DocumentServiceError(str(e)) from e 
\ No newline at end of file
@@ -0,0 +1,75 @@
+# features/formations/access_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, FrozenSet, Hashable, Optional, Tuple
+
+from shared.config import ACCESS_CACHE_TTL_SECONDS, ACCESS_CACHE_MAX_ENTRIES
+
+
+class _TTLCache:
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class AccessCache:
+    """
+    Cache en mémoire des données d'autorisation :
+    - par utilisateur : formations assignées ;
+    - par module : formations qui le contiennent.
+
+    Invalidé par l'assignation / désassignation de formations, la suppression d'un
+    utilisateur et la suppression de modules ; le TTL couvre les autres workers.
+    Le statut administrateur n'est pas mis en cache (voir AccessService._is_admin).
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self._users = _TTLCache(ttl_seconds, max_entries)
+        self._modules = _TTLCache(ttl_seconds, max_entries)
+
+    def get_user_formations(self, user_id: str) -> Optional[FrozenSet[int]]:
+        return self._users.get(str(user_id))
+
+    def put_user_formations(self, user_id: str, formation_ids: FrozenSet[int]) -> None:
+        self._users.put(str(user_id), formation_ids)
+
+    def get_module_formations(self, module_id: int) -> Optional[FrozenSet[int]]:
+        return self._modules.get(int(module_id))
+
+    def put_module_formations(self, module_id: int, formation_ids: FrozenSet[int]) -> None:
+        self._modules.put(int(module_id), formation_ids)
+
+    def invalidate_user(self, user_id: str) -> None:
+        self._users.invalidate(str(user_id))
+
+    def invalidate_module(self, module_id: int) -> None:
+        self._modules.invalidate(int(module_id))
+
+
+access_cache = AccessCache(ACCESS_CACHE_TTL_SECONDS, ACCESS_CACHE_MAX_ENTRIES)
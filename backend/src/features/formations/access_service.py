@@ -0,0 +1,115 @@
+# features/formations/access_service.py
+
+from collections import defaultdict
+from typing import Dict, FrozenSet, List
+from src.supabase_client import supabase
+from .access_cache import access_cache
+from .progression_service import ProgressionService
+
+# Résultats de AccessService.resolve_modules
+MODULE_ACCESSIBLE = "accessible"
+MODULE_NOT_FOUND = "not_found"          # le module n'appartient à aucune formation
+FORMATION_NOT_ASSIGNED = "not_assigned"  # aucune formation du module n'est assignée
+MODULE_LOCKED = "locked"                 # les modules précédents ne sont pas réussis
+
+
+class AccessService:
+    """
+    Répond à « l'utilisateur U peut-il agir sur le module M ? » à partir de données
+    en cache (access_cache, progression_cache) : quand le cache est chaud, seule la
+    lecture du statut administrateur reste une requête.
+    """
+
+    @staticmethod
+    def _is_admin(user_id: str) -> bool:
+        """
+        Statut administrateur, lu à chaque vérification : il n'est pas mis en cache
+        car il peut être retiré à tout moment, directement dans la table profiles.
+        """
+        response = supabase.table('profiles').select('is_admin').eq('id', user_id).execute()
+        return bool(response.data and response.data[0].get('is_admin', False))
+
+    @staticmethod
+    def _load_user_formations(user_id: str) -> FrozenSet[int]:
+        """Formations assignées à l'utilisateur (cache, sinon une requête)."""
+        cached = access_cache.get_user_formations(user_id)
+        if cached is not None:
+            return cached
+
+        response = supabase.table('user_formations').select('formation_id').eq('user_id', user_id).execute()
+        formation_ids = frozenset(row['formation_id'] for row in response.data or [])
+        access_cache.put_user_formations(user_id, formation_ids)
+        return formation_ids
+
+    @staticmethod
+    def _load_module_formations(module_ids: List[int]) -> Dict[int, FrozenSet[int]]:
+        """Formations contenant chaque module (cache, sinon une requête pour les absents)."""
+        formations: Dict[int, FrozenSet[int]] = {}
+        for module_id in module_ids:
+            cached = access_cache.get_module_formations(module_id)
+            if cached is not None:
+                formations[module_id] = cached
+
+        missing = [module_id for module_id in module_ids if module_id not in formations]
+        if missing:
+            response = supabase.table('formation_modules').select('module_id, formation_id').in_('module_id', missing).execute()
+            found: Dict[int, set] = defaultdict(set)
+            for row in response.data or []:
+                found[row['module_id']].add(row['formation_id'])
+            # Un module sans formation n'est pas mis en cache : il peut y être ajouté
+            for module_id, formation_ids in found.items():
+                formations[module_id] = frozenset(formation_ids)
+                access_cache.put_module_formations(module_id, formations[module_id])
+
+        return formations
+
+    @staticmethod
+    def is_assigned(user_id: str, formation_id: int) -> bool:
+        """La formation est-elle assignée à l'utilisateur ?"""
+        return formation_id in AccessService._load_user_formations(user_id)
+
+    @staticmethod
+    def resolve_modules(user_id: str, module_ids: List[int]) -> Dict[int, str]:
+        """
+        Résout l'accès de l'utilisateur à plusieurs modules en une passe.
+        Un administrateur accède à tous les modules ; sinon, un module est accessible
+        s'il l'est selon la progression dans au moins une formation assignée.
+
+        Returns:
+            Dict[int, str]: Pour chaque module, MODULE_ACCESSIBLE, MODULE_NOT_FOUND,
+            FORMATION_NOT_ASSIGNED ou MODULE_LOCKED
+        """
+        if AccessService._is_admin(user_id):
+            return {module_id: MODULE_ACCESSIBLE for module_id in module_ids}
+
+        user_formations = AccessService._load_user_formations(user_id)
+
+        module_formations = AccessService._load_module_formations(module_ids)
+        accessible_by_formation: Dict[int, List[int]] = {}
+        access: Dict[int, str] = {}
+
+        for module_id in module_ids:
+            formation_ids = module_formations.get(module_id)
+            if not formation_ids:
+                access[module_id] = MODULE_NOT_FOUND
+                continue
+
+            assigned = sorted(formation_ids & user_formations)
+            if not assigned:
+                access[module_id] = FORMATION_NOT_ASSIGNED
+                continue
+
+            access[module_id] = MODULE_LOCKED
+            for formation_id in assigned:
+                if formation_id not in accessible_by_formation:
+                    accessible_by_formation[formation_id] = ProgressionService.get_accessible_modules(user_id, formation_id)
+                if module_id in accessible_by_formation[formation_id]:
+                    access[module_id] = MODULE_ACCESSIBLE
+                    break
+
+        return access
+
+    @staticmethod
+    def resolve_module(user_id: str, module_id: int) -> str:
+        """Accès de l'utilisateur à un module (voir resolve_modules)."""
+        return AccessService.resolve_modules(user_id, [module_id])[module_id]
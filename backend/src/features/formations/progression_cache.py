@@ -0,0 +1,142 @@
+# features/formations/progression_cache.py
+
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from shared.config import (
+    PROGRESSION_CACHE_TTL_SECONDS,
+    PROGRESSION_CACHE_MAX_ENTRIES,
+    PROGRESSION_CACHE_REDIS_URL,
+)
+
+
+class ProgressionCache:
+    """
+    Cache en mémoire (TTL + LRU) de la progression calculée, par (user_id, formation_id).
+
+    Invalidé par /quiz/submit (utilisateur), par les routes de modules et par
+    apply_course_changes (formation), mais seulement dans le worker qui traite la
+    requête : avec plusieurs workers, les autres peuvent servir une progression périmée
+    (module suivant encore verrouillé) pendant PROGRESSION_CACHE_TTL_SECONDS. Dans ce
+    cas, configurer PROGRESSION_CACHE_REDIS_URL (RedisProgressionCache).
+
+    get et put copient la progression : les appelants peuvent modifier le dict reçu.
+
+    Chaque invalidation incrémente la génération de l'utilisateur ou de la formation.
+    put reçoit la version lue (version) avant le calcul et ignore une progression
+    calculée pendant une invalidation, qui serait sinon mise en cache périmée.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._user_generations: Dict[str, int] = {}
+        self._formation_generations: Dict[int, int] = {}
+
+    def version(self, user_id: str, formation_id: int) -> Hashable:
+        """Version courante de l'entrée, à lire avant de calculer la progression."""
+        with self._lock:
+            return (
+                self._user_generations.get(str(user_id), 0),
+                self._formation_generations.get(int(formation_id), 0),
+            )
+
+    def get(self, user_id: str, formation_id: int) -> Optional[Dict[str, Any]]:
+        key = (str(user_id), int(formation_id))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(entry[1])
+
+    def put(self, user_id: str, formation_id: int, progression: Dict[str, Any], version: Hashable) -> None:
+        key = (str(user_id), int(formation_id))
+        with self._lock:
+            current = (
+                self._user_generations.get(key[0], 0),
+                self._formation_generations.get(key[1], 0),
+            )
+            if current != version:
+                return
+            self._entries[key] = (time.monotonic(), copy.deepcopy(progression))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: str) -> None:
+        with self._lock:
+            self._user_generations[str(user_id)] = self._user_generations.get(str(user_id), 0) + 1
+            for key in [key for key in self._entries if key[0] == str(user_id)]:
+                del self._entries[key]
+
+    def invalidate_formation(self, formation_id: int) -> None:
+        with self._lock:
+            self._formation_generations[int(formation_id)] = self._formation_generations.get(int(formation_id), 0) + 1
+            for key in [key for key in self._entries if key[1] == int(formation_id)]:
+                del self._entries[key]
+
+
+class RedisProgressionCache:
+    """
+    Cache de progression partagé entre workers (Redis).
+
+    Chaque clé inclut un numéro de génération de l'utilisateur et de la formation :
+    invalider revient à incrémenter la génération, les anciennes entrées expirent
+    d'elles-mêmes (TTL). La version est la clé lue avant le calcul : une progression
+    calculée pendant une invalidation est écrite sous l'ancienne génération, jamais relue.
+    """
+
+    def __init__(self, url: str, ttl_seconds: float):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("PROGRESSION_CACHE_REDIS_URL nécessite le paquet 'redis'.") from e
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = int(ttl_seconds)
+
+    def _key(self, user_id: str, formation_id: int) -> str:
+        user_gen, formation_gen = self.client.mget(
+            f"progression:gen:user:{user_id}",
+            f"progression:gen:formation:{formation_id}",
+        )
+        return (
+            f"progression:{user_id}:{formation_id}:"
+            f"{int(user_gen or 0)}:{int(formation_gen or 0)}"
+        )
+
+    def get(self, user_id: str, formation_id: int) -> Optional[Dict[str, Any]]:
+        value = self.client.get(self._key(user_id, formation_id))
+        return json.loads(value) if value else None
+
+    def version(self, user_id: str, formation_id: int) -> Hashable:
+        """Version courante de l'entrée, à lire avant de calculer la progression."""
+        return self._key(user_id, formation_id)
+
+    def put(self, user_id: str, formation_id: int, progression: Dict[str, Any], version: Hashable) -> None:
+        self.client.set(version, json.dumps(progression), ex=self.ttl_seconds)
+
+    def invalidate_user(self, user_id: str) -> None:
+        self.client.incr(f"progression:gen:user:{user_id}")
+
+    def invalidate_formation(self, formation_id: int) -> None:
+        self.client.incr(f"progression:gen:formation:{formation_id}")
+
+
+def create_progression_cache():
+    if PROGRESSION_CACHE_REDIS_URL:
+        return RedisProgressionCache(PROGRESSION_CACHE_REDIS_URL, PROGRESSION_CACHE_TTL_SECONDS)
+    return ProgressionCache(PROGRESSION_CACHE_TTL_SECONDS, PROGRESSION_CACHE_MAX_ENTRIES)
+
+
+progression_cache = create_progression_cache()
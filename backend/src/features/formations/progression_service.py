@@ -1,129 +1,136 @@
 # features/formations/progression_service.py
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Set
 from src.supabase_client import supabase
+from .progression_cache import progression_cache
 
 class ProgressionService:
     """Service pour gérer la progression séquentielle dans les formations."""
     
     @staticmethod
-    def get_accessible_modules(user_id: str, formation_id: int) -> List[int]:
+    def _load_formation_modules(formation_id: int) -> List[Dict[str, Any]]:
+        """Modules de la formation, triés par index."""
+        modules_response = supabase.table('formation_modules').select(
+            'modules(id, titre, index)'
+        ).eq('formation_id', formation_id).execute()
+        
+        modules = [fm['modules'] for fm in modules_response.data or [] if fm['modules']]
+        return sorted(modules, key=lambda m: m.get('index', 0))
+    
+    @staticmethod
+    def _load_passed_modules(user_id: str, module_ids: List[int]) -> Set[int]:
         """
-        Calcule quels modules sont accessibles pour un utilisateur dans une formation.
-        Un module est accessible si :
-        - C'est le premier module (index 0)
-        - L'utilisateur a réussi le quiz du module précédent
+        Modules dont l'utilisateur a réussi le quiz, lus dans la projection
+        user_module_progress (voir migrations/006_user_module_progress.sql).
+        Un module sans quiz ne peut pas être réussi.
+        """
+        if not module_ids:
+            return set()
         
-        Returns:
-            List[int]: Liste des IDs des modules accessibles
+        progress_response = supabase.table('user_module_progress').select(
+            'module_id'
+        ).eq('user_id', user_id).in_('module_id', module_ids).eq('passed', True).execute()
+        
+        return {row['module_id'] for row in progress_response.data or []}
+    
+    @staticmethod
+    def invalidate_user(user_id: str) -> None:
         """
-        try:
-            
-            # 1. Récupérer tous les modules de la formation, triés par index
-            modules_response = supabase.table('formation_modules').select(
-                'modules(id, titre, index)'
-            ).eq('formation_id', formation_id).execute()
-            
-            if not modules_response.data:
-                return []
-                
-            # Extraire et trier les modules par index
-            modules = [fm['modules'] for fm in modules_response.data if fm['modules']]
-            modules = sorted(modules, key=lambda m: m.get('index', 0))
-            
-            
-            
-            if not modules:
-                print("❌ Aucun module trouvé")
-                return []
-            
-            # 2. Le premier module est toujours accessible
-            accessible_modules = [modules[0]['id']]
-            
-            
-            # 3. Pour chaque module suivant, vérifier si le quiz du module précédent est réussi
-            for i in range(1, len(modules)):
-                previous_module = modules[i-1]
-                current_module = modules[i]
-                
-                
-                
-                # Vérifier si l'utilisateur a réussi le quiz du module précédent
-                quiz_passed = ProgressionService._has_passed_module_quiz(user_id, previous_module['id'])
-                
-                
-                if quiz_passed:
-                    accessible_modules.append(current_module['id'])
-                    
-                else:
-                    
-                    # Si le quiz précédent n'est pas réussi, arrêter la progression
-                    break
-            
-            
-            return accessible_modules
-            
-        except Exception as e:
-            print(f"Erreur lors du calcul des modules accessibles: {str(e)}")
+        Invalide la progression en cache d'un utilisateur après une tentative réussie
+        (la projection est mise à jour par submit_quiz_attempt).
+        """
+        progression_cache.invalidate_user(user_id)
+    
+    @staticmethod
+    def invalidate_module_formations(module_id: int) -> None:
+        """Invalide la progression en cache des formations contenant ce module."""
+        response = supabase.table('formation_modules').select('formation_id').eq('module_id', module_id).execute()
+        for row in response.data or []:
+            progression_cache.invalidate_formation(row['formation_id'])
+    
+    @staticmethod
+    def _accessible_module_ids(modules: List[Dict[str, Any]], passed: Set[int]) -> List[int]:
+        """
+        Le premier module est toujours accessible ; chaque module suivant l'est si le
+        quiz du module précédent est réussi. La progression s'arrête au premier échec.
+        """
+        if not modules:
             return []
+        accessible_modules = [modules[0]['id']]
+        for previous_module, current_module in zip(modules, modules[1:]):
+            if previous_module['id'] not in passed:
+                break
+            accessible_modules.append(current_module['id'])
+        return accessible_modules
     
     @staticmethod
-    def _has_passed_module_quiz(user_id: str, module_id: int) -> bool:
+    def _empty_summary() -> Dict[str, Any]:
+        return {
+            'total_modules': 0,
+            'accessible_modules_count': 0,
+            'completed_modules': 0,
+            'current_module_index': 0,
+            'progress_percentage': 0
+        }
+    
+    @staticmethod
+    def get_progression(user_id: str, formation_id: int) -> Dict[str, Any]:
         """
-        Vérifie si l'utilisateur a réussi le quiz d'un module donné.
+        Calcule en une seule passe la progression de l'utilisateur dans une formation
+        (mise en cache par utilisateur et formation, voir progression_cache).
         
-        Args:
-            user_id (str): ID de l'utilisateur
-            module_id (int): ID du module
-            
         Returns:
-            bool: True si l'utilisateur a réussi le quiz, False sinon
+            Dict avec :
+            - 'accessible_modules' (List[int]) : IDs des modules accessibles, dans l'ordre
+            - 'completed_modules' (List[int]) : IDs des modules comptés comme complétés
+            - 'summary' (Dict) : résumé (voir get_user_progress_summary)
         """
+        cached = progression_cache.get(user_id, formation_id)
+        if cached is not None:
+            return cached
+        
+        # Lue avant le calcul : si la progression est invalidée entre-temps, elle n'est
+        # pas mise en cache
+        version = progression_cache.version(user_id, formation_id)
         try:
-            
-            
-            # 1. Récupérer le quiz du module
-            quiz_response = supabase.table('quizzes').select('id, passing_score').eq(
-                'module_id', module_id
-            ).eq('is_active', True).execute()
-            
-            if not quiz_response.data:
-                
-                # Pas de quiz pour ce module = ne peut pas être réussi
-                # Un module doit avoir un quiz pour débloquer le suivant
-                return False
-            
-            quiz = quiz_response.data[0]
-            quiz_id = quiz['id']
-            passing_score = quiz['passing_score']
-            
-            # 2. Récupérer la meilleure tentative de l'utilisateur pour ce quiz
-            attempts_response = supabase.table('user_quiz_attempts').select(
-                'score, max_score, passed'
-            ).eq('user_id', user_id).eq('quiz_id', quiz_id).not_.is_(
-                'completed_at', 'null'
-            ).order('score', desc=True).limit(1).execute()
-            
-            if not attempts_response.data:
-                # Aucune tentative complétée = pas réussi
-                return False
-            
-            best_attempt = attempts_response.data[0]
-            
-            # 3. Vérifier si le score est suffisant
-            if best_attempt['passed']:
-                return True
-            
-            # Calculer le pourcentage si 'passed' n'est pas fiable
-            if best_attempt['max_score'] and best_attempt['max_score'] > 0:
-                percentage = (best_attempt['score'] / best_attempt['max_score']) * 100
-                return percentage >= passing_score
-            
-            return False
-            
+            modules = ProgressionService._load_formation_modules(formation_id)
+            passed = ProgressionService._load_passed_modules(user_id, [m['id'] for m in modules])
         except Exception as e:
-            print(f"Erreur lors de la vérification du quiz: {str(e)}")
-            return False
+            print(f"Erreur lors du calcul de la progression: {str(e)}")
+            return {'accessible_modules': [], 'completed_modules': [], 'summary': ProgressionService._empty_summary()}
+        
+        total_modules = len(modules)
+        accessible_modules = ProgressionService._accessible_module_ids(modules, passed)
+        
+        # Modules complétés : ceux avec quiz réussi, sauf le dernier accessible
+        completed_modules = [module_id for module_id in accessible_modules[:-1] if module_id in passed]
+        
+        progression = {
+            'accessible_modules': accessible_modules,
+            'completed_modules': completed_modules,
+            'summary': {
+                'total_modules': total_modules,
+                'accessible_modules_count': len(accessible_modules),
+                'completed_modules': len(completed_modules),
+                'current_module_index': len(accessible_modules) - 1 if accessible_modules else 0,
+                'progress_percentage': int((len(completed_modules) / total_modules * 100)) if total_modules > 0 else 0
+            }
+        }
+        progression_cache.put(user_id, formation_id, progression, version)
+        return progression
+    
+    @staticmethod
+    def get_accessible_modules(user_id: str, formation_id: int) -> List[int]:
+        """
+        Calcule quels modules sont accessibles pour un utilisateur dans une formation.
+        Un module est accessible si :
+        - C'est le premier module (index 0)
+        - L'utilisateur a réussi le quiz du module précédent
+        
+        Returns:
+            List[int]: Liste des IDs des modules accessibles
+        """
+        return ProgressionService.get_progression(user_id, formation_id)['accessible_modules']
     
     @staticmethod
     def get_user_progress_summary(user_id: str, formation_id: int) -> Dict[str, Any]:
@@ -133,39 +140,4 @@ class ProgressionService:
         Returns:
             Dict contenant les informations de progression
         """
-        try:
-            # Récupérer tous les modules
-            modules_response = supabase.table('formation_modules').select(
-                'modules(id, titre, index)'
-            ).eq('formation_id', formation_id).execute()
-            
-            modules = [fm['modules'] for fm in modules_response.data if fm['modules']]
-            modules = sorted(modules, key=lambda m: m.get('index', 0))
-            
-            total_modules = len(modules)
-            accessible_modules = ProgressionService.get_accessible_modules(user_id, formation_id)
-            completed_modules = 0
-            
-            # Compter les modules complétés (ceux avec quiz réussi sauf le dernier accessible)
-            for module in modules:
-                if module['id'] in accessible_modules[:-1]:  # Exclure le dernier module accessible
-                    if ProgressionService._has_passed_module_quiz(user_id, module['id']):
-                        completed_modules += 1
-            
-            return {
-                'total_modules': total_modules,
-                'accessible_modules_count': len(accessible_modules),
-                'completed_modules': completed_modules,
-                'current_module_index': len(accessible_modules) - 1 if accessible_modules else 0,
-                'progress_percentage': int((completed_modules / total_modules * 100)) if total_modules > 0 else 0
-            }
-            
-        except Exception as e:
-            print(f"Erreur lors du calcul du résumé de progression: {str(e)}")
-            return {
-                'total_modules': 0,
-                'accessible_modules_count': 0,
-                'completed_modules': 0,
-                'current_module_index': 0,
-                'progress_percentage': 0
-            }
\ No newline at end of file
+        return ProgressionService.get_progression(user_id, formation_id)['summary']
@@ -0,0 +1,26 @@
+# features/formations/rebuild_progress.py
+"""
+Régénère la projection user_module_progress à partir de user_quiz_attempts.
+
+Usage (depuis backend/) :
+    python -m src.features.formations.rebuild_progress [--user-id <uuid>]
+"""
+import argparse
+
+from src.supabase_client import supabase
+
+
+def rebuild_progress(user_id: str | None = None) -> int:
+    """Reconstruit la projection (tous les utilisateurs, ou un seul) ; retourne le nombre de lignes."""
+    response = supabase.rpc('rebuild_user_module_progress', {'p_user_id': user_id}).execute()
+    return response.data or 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Régénère user_module_progress depuis les tentatives de quiz.")
+    parser.add_argument("--user-id", help="Limiter la reconstruction à un utilisateur")
+    args = parser.parse_args()
+
+    count = rebuild_progress(args.user_id)
+    target = f"l'utilisateur {args.user_id}" if args.user_id else "tous les utilisateurs"
+    print(f"✅ Progression reconstruite pour {target} : {count} module(s) réussi(s)")
@@ -6,6 +6,9 @@ from src.features.auth.dependencies import get_current_user, get_current_admin_u
 from postgrest.exceptions import APIError
 from . import schema
 from .progression_service import ProgressionService
+from .access_cache import access_cache
+from .access_service import AccessService
+from src.features.quiz.quiz_cache import quiz_cache
 
 router = APIRouter(
     prefix="/formations",
@@ -53,6 +56,7 @@ def assign_formation_to_user(
             'user_id': str(assignment.user_id),
             'formation_id': assignment.formation_id
         }).execute()
+        access_cache.invalidate_user(str(assignment.user_id))
         
         return {"message": "Formation assigned successfully", "data": response.data}
 
@@ -178,15 +182,12 @@ def get_formation_with_progression(
             raise HTTPException(status_code=401, detail="Token utilisateur invalide")
 
         # 1. Vérifier que l'utilisateur a accès à cette formation
-        user_formation_response = supabase.table('user_formations').select('*').eq(
-            'user_id', user_id
-        ).eq('formation_id', formation_id).execute()
-        
-        if not user_formation_response.data:
+        if not AccessService.is_assigned(user_id, formation_id):
             raise HTTPException(status_code=403, detail="Formation non assignée à cet utilisateur")
 
-        # 2. Récupérer les modules accessibles
-        accessible_module_ids = ProgressionService.get_accessible_modules(user_id, formation_id)
+        # 2. Calculer la progression (modules accessibles et résumé) en une seule passe
+        progression = ProgressionService.get_progression(user_id, formation_id)
+        accessible_module_ids = progression['accessible_modules']
         
         if not accessible_module_ids:
             raise HTTPException(status_code=404, detail="Aucun module accessible trouvé")
@@ -244,14 +245,11 @@ def get_formation_with_progression(
                 }
             )
 
-        # 6. Obtenir le résumé de progression
-        progress_summary = ProgressionService.get_user_progress_summary(user_id, formation_id)
-
         return {
             "title": data['nom'],
             "has_content": data["has_content"],
             "modules": formatted_modules,
-            "progression": progress_summary
+            "progression": progression['summary']
         }
 
     except HTTPException:
@@ -275,6 +273,8 @@ def update_module(module_id: int, payload: schema.ModuleUpdate,
                 .update(to_update) \
                 .eq("id", module_id) \
                 .execute()
+        # Un changement d'index modifie l'ordre de progression
+        ProgressionService.invalidate_module_formations(module_id)
     except APIError as e:
         raise HTTPException(status_code=500, detail=e.message)
 
@@ -284,12 +284,17 @@ router_sb = APIRouter(prefix="/submodules", tags=["Submodules"])
 def delete_module_endpoint(module_id: int, current_user: dict = Depends(get_current_admin_user)):
     """(Admin only) Deletes a module and its association from a formation."""
     try:
+        # Invalidate cached progression while the formation link still exists
+        ProgressionService.invalidate_module_formations(module_id)
+
         # First, delete the link in the formation_modules join table
         supabase.table("formation_modules").delete().eq("module_id", module_id).execute()
         
         # Then, delete the module itself. The database should cascade the delete
         # to the submodules table if the foreign key is set up with ON DELETE CASCADE.
         supabase.table("modules").delete().eq("id", module_id).execute()
+        quiz_cache.invalidate_module(module_id)
+        access_cache.invalidate_module(module_id)
             
         return
     except APIError as e:
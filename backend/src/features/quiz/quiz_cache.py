@@ -0,0 +1,200 @@
+# features/quiz/quiz_cache.py
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from shared.config import (
+    QUIZ_CACHE_TTL_SECONDS,
+    QUIZ_CACHE_MAX_ENTRIES,
+    QUIZ_CACHE_REDIS_URL,
+)
+
+# Version du format des quiz compilés : à incrémenter si compile_quiz change
+QUIZ_CACHE_VERSION = 1
+
+
+def compile_quiz(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compile une ligne embedded select (quiz -> quiz_questions -> quiz_answers).
+
+    Returns:
+        Dict: 'quiz' (champs du quiz), 'questions' (chacune avec 'answers', format de
+        l'API) et 'answer_key' ({question_id: {'points', 'correct_answer_ids'}})
+    """
+    questions = [
+        {
+            **{key: value for key, value in question.items() if key != 'quiz_answers'},
+            'answers': question.get('quiz_answers') or []
+        }
+        for question in row.get('quiz_questions') or []
+    ]
+    return {
+        'quiz': {key: value for key, value in row.items() if key != 'quiz_questions'},
+        'questions': questions,
+        'answer_key': {
+            question['id']: {
+                'points': question.get('points', 1),
+                'correct_answer_ids': frozenset(
+                    answer['id'] for answer in question['answers'] if answer.get('is_correct')
+                )
+            }
+            for question in questions
+        }
+    }
+
+
+class QuizCache:
+    """
+    Cache en mémoire des quiz compilés.
+
+    Un quiz n'est jamais modifié une fois écrit par save_module_quiz, hormis is_active :
+    une régénération crée un nouveau quiz (nouvel id) et désactive l'ancien. Les quiz
+    compilés sont donc conservés sans TTL (LRU) ; seul le pointeur module -> quiz actif
+    expire, et invalidate_module (save_quiz_to_supabase, suppression de modules) l'efface
+    avec le quiz qu'il désignait. Les entrées sont partagées : elles ne doivent pas être
+    modifiées.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._quizzes: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._modules: Dict[int, Tuple[float, int]] = {}
+
+    def get(self, quiz_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            compiled = self._quizzes.get(int(quiz_id))
+            if compiled is not None:
+                self._quizzes.move_to_end(int(quiz_id))
+            return compiled
+
+    def get_module_quiz(self, module_id: int) -> Optional[Dict[str, Any]]:
+        """Quiz actif compilé d'un module, s'il est en cache."""
+        with self._lock:
+            entry = self._modules.get(int(module_id))
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._modules[int(module_id)]
+                return None
+            compiled = self._quizzes.get(entry[1])
+            if compiled is not None:
+                self._quizzes.move_to_end(entry[1])
+            return compiled
+
+    def put(self, compiled: Dict[str, Any], active: bool = False) -> None:
+        """Met en cache un quiz compilé ; `active` en fait le quiz actif de son module."""
+        quiz_id = int(compiled['quiz']['id'])
+        with self._lock:
+            self._quizzes[quiz_id] = compiled
+            self._quizzes.move_to_end(quiz_id)
+            if active:
+                self._modules[int(compiled['quiz']['module_id'])] = (time.monotonic(), quiz_id)
+            while len(self._quizzes) > self.max_entries:
+                self._quizzes.popitem(last=False)
+
+    def invalidate_module(self, module_id: int) -> None:
+        """À appeler quand le quiz actif d'un module change (régénération, désactivation)."""
+        with self._lock:
+            entry = self._modules.pop(int(module_id), None)
+            if entry is not None:
+                # L'ancien quiz actif a été désactivé : sa copie compilée est périmée
+                self._quizzes.pop(entry[1], None)
+
+    def invalidate_quiz(self, quiz_id: int) -> None:
+        with self._lock:
+            compiled = self._quizzes.pop(int(quiz_id), None)
+            if compiled is not None:
+                self._modules.pop(int(compiled['quiz']['module_id']), None)
+
+
+class RedisQuizCache:
+    """
+    Cache des quiz compilés partagé entre workers (Redis). Les clés des quiz incluent
+    QUIZ_CACHE_VERSION ; le corrigé est sérialisé en listes.
+    """
+
+    # Les quiz compilés sont immuables : le TTL ne sert qu'à borner la mémoire
+    _QUIZ_TTL_SECONDS = 24 * 3600
+
+    def __init__(self, url: str, ttl_seconds: float):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("QUIZ_CACHE_REDIS_URL nécessite le paquet 'redis'.") from e
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = int(ttl_seconds)
+
+    @staticmethod
+    def _quiz_key(quiz_id: int) -> str:
+        return f"quiz:v{QUIZ_CACHE_VERSION}:{quiz_id}"
+
+    @staticmethod
+    def _module_key(module_id: int) -> str:
+        return f"quiz:module:{module_id}"
+
+    @staticmethod
+    def _loads(value: Optional[bytes]) -> Optional[Dict[str, Any]]:
+        if not value:
+            return None
+        compiled = json.loads(value)
+        compiled['answer_key'] = {
+            int(question_id): {
+                'points': question['points'],
+                'correct_answer_ids': frozenset(question['correct_answer_ids'])
+            }
+            for question_id, question in compiled['answer_key'].items()
+        }
+        return compiled
+
+    @staticmethod
+    def _dumps(compiled: Dict[str, Any]) -> str:
+        return json.dumps({
+            **compiled,
+            'answer_key': {
+                question_id: {
+                    'points': question['points'],
+                    'correct_answer_ids': sorted(question['correct_answer_ids'])
+                }
+                for question_id, question in compiled['answer_key'].items()
+            }
+        })
+
+    def get(self, quiz_id: int) -> Optional[Dict[str, Any]]:
+        return self._loads(self.client.get(self._quiz_key(quiz_id)))
+
+    def get_module_quiz(self, module_id: int) -> Optional[Dict[str, Any]]:
+        quiz_id = self.client.get(self._module_key(module_id))
+        return self.get(int(quiz_id)) if quiz_id else None
+
+    def put(self, compiled: Dict[str, Any], active: bool = False) -> None:
+        quiz_id = compiled['quiz']['id']
+        self.client.set(self._quiz_key(quiz_id), self._dumps(compiled), ex=self._QUIZ_TTL_SECONDS)
+        if active:
+            self.client.set(self._module_key(compiled['quiz']['module_id']), quiz_id, ex=self.ttl_seconds)
+
+    def invalidate_module(self, module_id: int) -> None:
+        quiz_id = self.client.get(self._module_key(module_id))
+        self.client.delete(self._module_key(module_id))
+        if quiz_id:
+            self.client.delete(self._quiz_key(int(quiz_id)))
+
+    def invalidate_quiz(self, quiz_id: int) -> None:
+        compiled = self.get(quiz_id)
+        self.client.delete(self._quiz_key(quiz_id))
+        if compiled is not None:
+            self.invalidate_module(compiled['quiz']['module_id'])
+
+
+def create_quiz_cache():
+    if QUIZ_CACHE_REDIS_URL:
+        return RedisQuizCache(QUIZ_CACHE_REDIS_URL, QUIZ_CACHE_TTL_SECONDS)
+    return QuizCache(QUIZ_CACHE_TTL_SECONDS, QUIZ_CACHE_MAX_ENTRIES)
+
+
+quiz_cache = create_quiz_cache()
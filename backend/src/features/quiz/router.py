@@ -1,7 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 from src.features.auth.dependencies import get_current_user
-from src.supabase_client import supabase
 from src.features.formations.progression_service import ProgressionService
+from src.features.formations.access_service import (
+    AccessService,
+    MODULE_NOT_FOUND,
+    FORMATION_NOT_ASSIGNED,
+    MODULE_LOCKED,
+)
+from .service import QuizService
 
 router = APIRouter(
     prefix="/quiz",
@@ -19,70 +25,26 @@ async def get_module_quiz(
         if not user_id:
             raise HTTPException(status_code=401, detail="Token utilisateur invalide")
 
-        # 1. Vérifier si l'utilisateur est admin
-        user_profile_response = supabase.table('profiles').select('is_admin').eq('id', user_id).execute()
-        is_admin = user_profile_response.data and user_profile_response.data[0].get('is_admin', False)
-        
-        if not is_admin:
-            # Si ce n'est pas un admin, appliquer les restrictions normales
-            # D'abord, trouver la formation qui contient ce module
-            formation_response = supabase.table("formation_modules").select("formation_id").eq("module_id", module_id).execute()
-            
-            if not formation_response.data:
-                raise HTTPException(status_code=404, detail="Module not found in any formation")
-            
-            formation_id = formation_response.data[0]["formation_id"]
-            
-            # Vérifier que l'utilisateur a accès à cette formation
-            user_formation_response = supabase.table('user_formations').select('*').eq(
-                'user_id', user_id
-            ).eq('formation_id', formation_id).execute()
-            
-            if not user_formation_response.data:
-                raise HTTPException(status_code=403, detail="Formation non assignée à cet utilisateur")
-
-            # Vérifier que le module est accessible selon la progression
-            accessible_modules = ProgressionService.get_accessible_modules(user_id, formation_id)
-            
-            if module_id not in accessible_modules:
-                raise HTTPException(status_code=403, detail="Module non accessible. Complétez les modules précédents.")
+        # 1. Vérifier l'accès au module (admin, formation assignée, progression)
+        access = AccessService.resolve_module(user_id, module_id)
+        
+        if access == MODULE_NOT_FOUND:
+            raise HTTPException(status_code=404, detail="Module not found in any formation")
+        if access == FORMATION_NOT_ASSIGNED:
+            raise HTTPException(status_code=403, detail="Formation non assignée à cet utilisateur")
+        if access == MODULE_LOCKED:
+            raise HTTPException(status_code=403, detail="Module non accessible. Complétez les modules précédents.")
 
-        # 2. Récupérer le quiz du module
-        quiz_response = supabase.table("quizzes").select("*").eq("module_id", module_id).eq("is_active", True).execute()
+        # 2. Récupérer le quiz du module avec ses questions et réponses (une requête)
+        quiz = QuizService.get_module_quiz(module_id)
         
-        if not quiz_response.data:
+        if not quiz:
             raise HTTPException(status_code=404, detail="Quiz not found for this module")
         
-        quiz = quiz_response.data[0]
-        quiz_id = quiz["id"]
-        
-        # Récupérer les questions du quiz avec leurs réponses
-        questions_response = supabase.table("quiz_questions").select("*").eq("quiz_id", quiz_id).order("order_index").execute()
-        
-        if not questions_response.data:
+        if not quiz["questions"]:
             raise HTTPException(status_code=404, detail="No questions found for this quiz")
         
-        # Pour chaque question, récupérer ses réponses
-        questions_with_answers = []
-        for question in questions_response.data:
-            question_id = question["id"]
-            
-            # Récupérer les réponses de la question
-            answers_response = supabase.table("quiz_answers").select("*").eq("question_id", question_id).order("order_index").execute()
-            
-            question_with_answers = {
-                **question,
-                "answers": answers_response.data or []
-            }
-            questions_with_answers.append(question_with_answers)
-        
-        # Construire la réponse finale
-        result = {
-            **quiz,
-            "questions": questions_with_answers
-        }
-        
-        return result
+        return quiz
         
     except HTTPException:
         raise
@@ -96,47 +58,12 @@ async def get_formation_quizzes(
 ):
     """Récupère tous les quiz d'une formation"""
     try:
-        # Récupérer tous les modules de la formation
-        modules_response = supabase.table("formation_modules").select("module_id").eq("formation_id", formation_id).execute()
+        # Récupérer les quiz de tous les modules de la formation (nombre constant de requêtes)
+        quizzes = QuizService.get_formation_quizzes(formation_id)
         
-        if not modules_response.data:
+        if quizzes is None:
             raise HTTPException(status_code=404, detail="No modules found for this formation")
         
-        module_ids = [module["module_id"] for module in modules_response.data]
-        
-        # Récupérer tous les quiz des modules
-        quizzes = []
-        for module_id in module_ids:
-            try:
-                quiz_response = supabase.table("quizzes").select("*").eq("module_id", module_id).eq("is_active", True).execute()
-                
-                if quiz_response.data:
-                    quiz = quiz_response.data[0]
-                    quiz_id = quiz["id"]
-                    
-                    # Récupérer les questions et réponses
-                    questions_response = supabase.table("quiz_questions").select("*").eq("quiz_id", quiz_id).order("order_index").execute()
-                    
-                    questions_with_answers = []
-                    for question in questions_response.data:
-                        answers_response = supabase.table("quiz_answers").select("*").eq("question_id", question["id"]).order("order_index").execute()
-                        question_with_answers = {
-                            **question,
-                            "answers": answers_response.data or []
-                        }
-                        questions_with_answers.append(question_with_answers)
-                    
-                    quiz_with_questions = {
-                        **quiz,
-                        "questions": questions_with_answers
-                    }
-                    quizzes.append(quiz_with_questions)
-                    
-            except Exception as e:
-                # Continue même si un quiz individuel pose problème
-                print(f"Error fetching quiz for module {module_id}: {e}")
-                continue
-        
         return quizzes
         
     except HTTPException:
@@ -162,118 +89,47 @@ async def submit_quiz(
         if not quiz_id or not answers:
             raise HTTPException(status_code=400, detail="quiz_id et answers sont requis")
 
-        # 1. Vérifier que le quiz existe et récupérer ses infos
-        quiz_response = supabase.table("quizzes").select("*").eq("id", quiz_id).execute()
-        if not quiz_response.data:
+        # 1. Récupérer le quiz et son corrigé (cache, sinon une requête)
+        compiled = QuizService.get_compiled_quiz(quiz_id)
+        if not compiled:
             raise HTTPException(status_code=404, detail="Quiz non trouvé")
         
-        quiz = quiz_response.data[0]
+        quiz = compiled["quiz"]
         module_id = quiz["module_id"]
         passing_score = quiz["passing_score"]
         
-        # 2. Vérifier si l'utilisateur est admin
-        user_profile_response = supabase.table('profiles').select('is_admin').eq('id', user_id).execute()
-        is_admin = user_profile_response.data and user_profile_response.data[0].get('is_admin', False)
+        # 2. Vérifier l'accès au module (admin, formation assignée, progression)
+        access = AccessService.resolve_module(user_id, module_id)
         
-        if not is_admin:
-            # Si ce n'est pas un admin, vérifier l'accès au module
-            formation_response = supabase.table("formation_modules").select("formation_id").eq("module_id", module_id).execute()
-            if not formation_response.data:
-                raise HTTPException(status_code=404, detail="Module non trouvé")
-            
-            formation_id = formation_response.data[0]["formation_id"]
-            
-            user_formation_response = supabase.table('user_formations').select('*').eq(
-                'user_id', user_id
-            ).eq('formation_id', formation_id).execute()
-            
-            if not user_formation_response.data:
-                raise HTTPException(status_code=403, detail="Formation non assignée")
-
-            accessible_modules = ProgressionService.get_accessible_modules(user_id, formation_id)
-            if module_id not in accessible_modules:
-                raise HTTPException(status_code=403, detail="Module non accessible")
+        if access == MODULE_NOT_FOUND:
+            raise HTTPException(status_code=404, detail="Module non trouvé")
+        if access == FORMATION_NOT_ASSIGNED:
+            raise HTTPException(status_code=403, detail="Formation non assignée")
+        if access == MODULE_LOCKED:
+            raise HTTPException(status_code=403, detail="Module non accessible")
 
-        # 3. Calculer le score
-        total_score = 0
-        max_score = 0
-        responses_to_save = []
-        
-        for answer_data in answers:
-            question_id = answer_data.get("question_id")
-            selected_answer_ids = answer_data.get("selected_answer_ids", [])
-            
-            # Récupérer la question
-            question_response = supabase.table("quiz_questions").select("*").eq("id", question_id).execute()
-            if not question_response.data:
-                continue
-                
-            question = question_response.data[0]
-            question_points = question.get("points", 1)
-            max_score += question_points
-            
-            # Récupérer les bonnes réponses
-            correct_answers_response = supabase.table("quiz_answers").select("id").eq(
-                "question_id", question_id
-            ).eq("is_correct", True).execute()
-            
-            correct_answer_ids = [ans["id"] for ans in correct_answers_response.data]
-            
-            # Vérifier si la réponse est correcte
-            is_correct = set(selected_answer_ids) == set(correct_answer_ids)
-            points_earned = question_points if is_correct else 0
-            total_score += points_earned
-            
-            responses_to_save.append({
-                "question_id": question_id,
-                "selected_answer_ids": selected_answer_ids,
-                "is_correct": is_correct,
-                "points_earned": points_earned
-            })
+        # 3. Calculer le score en mémoire
+        grading = QuizService.grade(compiled["answer_key"], answers)
+        total_score = grading["score"]
+        max_score = grading["max_score"]
 
         # 4. Calculer le pourcentage et déterminer si c'est réussi
         percentage = (total_score / max_score * 100) if max_score > 0 else 0
         passed = percentage >= passing_score
         
-        # 5. Compter les tentatives précédentes
-        previous_attempts_response = supabase.table("user_quiz_attempts").select("attempt_number").eq(
-            "user_id", user_id
-        ).eq("quiz_id", quiz_id).order("attempt_number", desc=True).limit(1).execute()
-        
-        attempt_number = 1
-        if previous_attempts_response.data:
-            attempt_number = previous_attempts_response.data[0]["attempt_number"] + 1
-        
-        # Vérifier le nombre maximum de tentatives
+        # 5. Sauvegarder la tentative, les réponses et la progression (une transaction)
         max_attempts = quiz.get("max_attempts", 3)
-        if attempt_number > max_attempts:
+        attempt = QuizService.save_attempt(user_id, quiz, total_score, max_score, passed, grading["responses"])
+        attempt_number = attempt["attempt_number"]
+        
+        if attempt["attempt_id"] is None:
             raise HTTPException(status_code=400, detail=f"Nombre maximum de tentatives atteint ({max_attempts})")
 
-        # 6. Sauvegarder la tentative
-        attempt_data = {
-            "user_id": user_id,
-            "quiz_id": quiz_id,
-            "score": total_score,
-            "max_score": max_score,
-            "passed": passed,
-            "completed_at": "now()",
-            "attempt_number": attempt_number
-        }
-        
-        attempt_response = supabase.table("user_quiz_attempts").insert(attempt_data).execute()
-        if not attempt_response.data:
-            raise HTTPException(status_code=500, detail="Erreur lors de la sauvegarde de la tentative")
-        
-        attempt_id = attempt_response.data[0]["id"]
-        
-        # 7. Sauvegarder les réponses individuelles
-        for response in responses_to_save:
-            response["attempt_id"] = attempt_id
-            
-        if responses_to_save:
-            supabase.table("user_quiz_responses").insert(responses_to_save).execute()
+        # 6. Invalider la progression en cache
+        if passed:
+            ProgressionService.invalidate_user(user_id)
 
-        # 8. Retourner le résultat
+        # 7. Retourner le résultat
         return {
             "score": total_score,
             "max_score": max_score,
@@ -0,0 +1,181 @@
+# features/quiz/service.py
+
+from typing import Any, Dict, List, Optional
+from src.supabase_client import supabase
+from .quiz_cache import compile_quiz, quiz_cache
+
+# Quiz avec ses questions et leurs réponses, en une seule requête (embedded select)
+QUIZ_TREE_SELECT = "*, quiz_questions(*, quiz_answers(*))"
+
+
+class QuizService:
+    """Service de lecture et de notation des quiz (quiz, questions et réponses)."""
+
+    @staticmethod
+    def _to_view(compiled: Dict[str, Any]) -> Dict[str, Any]:
+        """Format de l'API : les champs du quiz et 'questions' (chacune avec 'answers')."""
+        return {**compiled['quiz'], 'questions': compiled['questions']}
+
+    @staticmethod
+    def _load_module_quizzes(module_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Quiz actifs compilés des modules donnés : depuis le cache, puis en une seule
+        requête (questions et réponses triées par order_index) pour les modules absents.
+        """
+        quizzes: Dict[int, Dict[str, Any]] = {}
+        for module_id in module_ids:
+            compiled = quiz_cache.get_module_quiz(module_id)
+            if compiled is not None:
+                quizzes[module_id] = compiled
+
+        missing = [module_id for module_id in module_ids if module_id not in quizzes]
+        if not missing:
+            return quizzes
+
+        response = (
+            supabase.table("quizzes")
+            .select(QUIZ_TREE_SELECT)
+            .in_("module_id", missing)
+            .eq("is_active", True)
+            .order("id")
+            .order("order_index", foreign_table="quiz_questions")
+            .order("order_index", foreign_table="quiz_questions.quiz_answers")
+            .execute()
+        )
+
+        # Un seul quiz actif par module (index unique, migrations/008_single_active_quiz.sql)
+        for row in response.data or []:
+            if row["module_id"] not in quizzes:
+                compiled = compile_quiz(row)
+                quiz_cache.put(compiled, active=True)
+                quizzes[row["module_id"]] = compiled
+        return quizzes
+
+    @staticmethod
+    def get_module_quiz(module_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Récupère le quiz actif d'un module avec ses questions et réponses, triées par
+        order_index (cache, sinon une seule requête).
+
+        Returns:
+            Optional[Dict]: Le quiz avec 'questions' (chacune avec 'answers'), ou None
+        """
+        compiled = QuizService._load_module_quizzes([module_id]).get(module_id)
+        return QuizService._to_view(compiled) if compiled else None
+
+    @staticmethod
+    def get_formation_quizzes(formation_id: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Récupère les quiz actifs de tous les modules d'une formation en au plus deux
+        requêtes (modules, puis quiz absents du cache), l'arbre étant assemblé en mémoire.
+
+        Returns:
+            Optional[List[Dict]]: Un quiz par module (dans l'ordre des modules),
+            ou None si la formation n'a aucun module
+        """
+        modules_response = supabase.table("formation_modules").select("module_id").eq("formation_id", formation_id).execute()
+        if not modules_response.data:
+            return None
+
+        module_ids = [module["module_id"] for module in modules_response.data]
+        quizzes = QuizService._load_module_quizzes(module_ids)
+
+        return [
+            QuizService._to_view(quizzes[module_id])
+            for module_id in module_ids
+            if module_id in quizzes
+        ]
+
+    @staticmethod
+    def get_compiled_quiz(quiz_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Récupère un quiz compilé (cache, sinon une requête) : 'quiz', 'questions' et
+        'answer_key' ({question_id: {'points', 'correct_answer_ids'}}).
+        """
+        compiled = quiz_cache.get(quiz_id)
+        if compiled is not None:
+            return compiled
+
+        response = (
+            supabase.table("quizzes")
+            .select(QUIZ_TREE_SELECT)
+            .eq("id", quiz_id)
+            .order("order_index", foreign_table="quiz_questions")
+            .order("order_index", foreign_table="quiz_questions.quiz_answers")
+            .execute()
+        )
+        if not response.data:
+            return None
+
+        compiled = compile_quiz(response.data[0])
+        quiz_cache.put(compiled)
+        return compiled
+
+    @staticmethod
+    def grade(answer_key: Dict[int, Dict[str, Any]], answers: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Note les réponses soumises en mémoire à partir du corrigé. Les questions
+        inconnues du quiz sont ignorées, une question n'est comptée qu'une fois.
+
+        Returns:
+            Dict: 'score', 'max_score' et 'responses' (une ligne par question notée)
+        """
+        total_score = 0
+        max_score = 0
+        responses = []
+        graded = set()
+
+        for answer_data in answers:
+            question_id = answer_data.get("question_id")
+            question = answer_key.get(question_id)
+            if question is None or question_id in graded:
+                continue
+            graded.add(question_id)
+
+            selected_answer_ids = answer_data.get("selected_answer_ids", [])
+            question_points = question["points"]
+            max_score += question_points
+
+            is_correct = set(selected_answer_ids) == question["correct_answer_ids"]
+            points_earned = question_points if is_correct else 0
+            total_score += points_earned
+
+            responses.append({
+                "question_id": question_id,
+                "selected_answer_ids": selected_answer_ids,
+                "is_correct": is_correct,
+                "points_earned": points_earned
+            })
+
+        return {"score": total_score, "max_score": max_score, "responses": responses}
+
+    @staticmethod
+    def save_attempt(
+        user_id: str,
+        quiz: Dict[str, Any],
+        score: float,
+        max_score: float,
+        passed: bool,
+        responses: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Enregistre la tentative, ses réponses et, si elle est réussie, la progression du
+        module, en un seul appel transactionnel (migrations/007_submit_quiz_attempt.sql).
+
+        Returns:
+            Dict: 'attempt_id' (None si le nombre maximum de tentatives est atteint)
+            et 'attempt_number'
+        """
+        response = supabase.rpc('submit_quiz_attempt', {
+            'p_user_id': user_id,
+            'p_quiz_id': quiz['id'],
+            'p_module_id': quiz['module_id'],
+            'p_score': score,
+            'p_max_score': max_score,
+            'p_passed': passed,
+            'p_max_attempts': quiz.get('max_attempts', 3),
+            'p_responses': responses
+        }).execute()
+        if not response.data:
+            raise RuntimeError("submit_quiz_attempt n'a retourné aucune ligne")
+        return response.data[0]
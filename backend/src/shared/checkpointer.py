@@ -0,0 +1,313 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+from shared.config import CHECKPOINT_BACKEND, CHECKPOINT_SQLITE_DIR, CHECKPOINT_POSTGRES_URL
+
+
+def _thread_id(config: RunnableConfig) -> Optional[str]:
+    return (config.get("configurable") or {}).get("thread_id")
+
+
+class ThreadedCheckpointSaver(BaseCheckpointSaver):
+    """
+    Expose a synchronous checkpointer (SQLite, Postgres) to async graphs.
+
+    The async savers need a running event loop at construction time, which is not
+    available when graphs are compiled at import. The synchronous savers are
+    thread-safe, so the async interface simply runs them in a worker thread.
+    """
+
+    def __init__(self, saver: BaseCheckpointSaver):
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.saver.get_tuple(config)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        return self.saver.list(config, filter=filter, before=before, limit=limit)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.saver.put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.saver.put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.saver.delete_thread(thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        return self.saver.get_next_version(current, channel)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+class ThreadActivity:
+    """
+    Dernière activité de chaque thread, stockée à côté des checkpoints
+    (table checkpoint_thread_activity) pour être partagée entre workers.
+    """
+
+    def __init__(self, conn, placeholder: str = "?", table: str = "checkpoint_thread_activity"):
+        self.conn = conn
+        self.placeholder = placeholder
+        self.table = table
+        self._lock = threading.Lock()
+        self._execute(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoint_thread_activity (
+                thread_id TEXT PRIMARY KEY,
+                last_access DOUBLE PRECISION NOT NULL
+            )
+            """
+        )
+
+    def _execute(self, sql: str, params: Sequence[Any] = ()) -> list:
+        with self._lock:
+            sql = sql.replace("checkpoint_thread_activity", self.table).replace("?", self.placeholder)
+            cursor = self.conn.execute(sql, params)
+            rows = cursor.fetchall() if cursor.description else []
+            self.conn.commit()
+            return rows
+
+    def touch(self, thread_id: str) -> None:
+        self._execute(
+            """
+            INSERT INTO checkpoint_thread_activity (thread_id, last_access) VALUES (?, ?)
+            ON CONFLICT (thread_id) DO UPDATE SET last_access = excluded.last_access
+            """,
+            (thread_id, time.time()),
+        )
+
+    def stale(self, ttl_seconds: Optional[float], max_threads: Optional[int]) -> list[str]:
+        """Threads inactifs depuis plus de ttl_seconds, ou au-delà des max_threads plus récents."""
+        rows = self._execute(
+            "SELECT thread_id, last_access FROM checkpoint_thread_activity ORDER BY last_access DESC"
+        )
+        cutoff = time.time() - ttl_seconds if ttl_seconds else None
+        return [
+            thread_id for rank, (thread_id, last_access) in enumerate(rows)
+            if (max_threads is not None and rank >= max_threads)
+            or (cutoff is not None and last_access < cutoff)
+        ]
+
+    def forget(self, thread_id: str) -> None:
+        self._execute("DELETE FROM checkpoint_thread_activity WHERE thread_id = ?", (thread_id,))
+
+
+class BoundedCheckpointSaver(ThreadedCheckpointSaver):
+    """
+    Checkpointer dont le nombre de threads est borné.
+
+    Chaque écriture met à jour l'activité du thread ; au plus une fois par
+    `sweep_interval` secondes, les threads inactifs depuis `ttl_seconds` et ceux
+    au-delà des `max_threads` plus récents sont supprimés.
+    """
+
+    def __init__(
+        self,
+        saver: BaseCheckpointSaver,
+        activity: ThreadActivity,
+        ttl_seconds: Optional[float] = None,
+        max_threads: Optional[int] = None,
+        sweep_interval: float = 60,
+    ):
+        super().__init__(saver)
+        self.activity = activity
+        self.ttl_seconds = ttl_seconds
+        self.max_threads = max_threads
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        result = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = _thread_id(config)
+        if thread_id:
+            self.activity.touch(thread_id)
+        self.sweep()
+        return result
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        self.activity.forget(thread_id)
+
+    def sweep(self, force: bool = False) -> list[str]:
+        """Supprime les threads expirés ; retourne leurs identifiants."""
+        now = time.time()
+        if not force and now - self._last_sweep < self.sweep_interval:
+            return []
+        self._last_sweep = now
+
+        evicted = self.activity.stale(self.ttl_seconds, self.max_threads)
+        for thread_id in evicted:
+            self.delete_thread(thread_id)
+        if evicted:
+            print(f"🧹 {len(evicted)} thread(s) évincé(s) du checkpointer")
+        return evicted
+
+
+def _sqlite_path(name: str) -> str:
+    os.makedirs(CHECKPOINT_SQLITE_DIR, exist_ok=True)
+    return os.path.join(CHECKPOINT_SQLITE_DIR, f"{name}.sqlite")
+
+
+def _sqlite_saver(name: str) -> BaseCheckpointSaver:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    # check_same_thread=False est sûr : SqliteSaver sérialise les accès avec un verrou
+    conn = sqlite3.connect(_sqlite_path(name), check_same_thread=False)
+    saver = SqliteSaver(conn)
+    saver.setup()
+    return saver
+
+
+def _postgres_connection():
+    try:
+        from psycopg import Connection
+        from psycopg.rows import dict_row
+    except ImportError as e:
+        raise ImportError(
+            "CHECKPOINT_BACKEND=postgres nécessite 'langgraph-checkpoint-postgres' et 'psycopg'."
+        ) from e
+
+    if not CHECKPOINT_POSTGRES_URL:
+        raise ValueError("CHECKPOINT_POSTGRES_URL doit être défini pour CHECKPOINT_BACKEND=postgres.")
+
+    return Connection.connect(
+        CHECKPOINT_POSTGRES_URL, autocommit=True, prepare_threshold=0, row_factory=dict_row
+    )
+
+
+def _postgres_saver() -> BaseCheckpointSaver:
+    try:
+        from langgraph.checkpoint.postgres import PostgresSaver
+    except ImportError as e:
+        raise ImportError(
+            "CHECKPOINT_BACKEND=postgres nécessite 'langgraph-checkpoint-postgres' et 'psycopg'."
+        ) from e
+
+    saver = PostgresSaver(_postgres_connection())
+    saver.setup()
+    return saver
+
+
+def _thread_activity(name: str) -> ThreadActivity:
+    if CHECKPOINT_BACKEND == "memory":
+        return ThreadActivity(sqlite3.connect(":memory:", check_same_thread=False))
+    if CHECKPOINT_BACKEND == "sqlite":
+        return ThreadActivity(sqlite3.connect(_sqlite_path(name), check_same_thread=False))
+    if CHECKPOINT_BACKEND == "postgres":
+        from psycopg.rows import tuple_row
+
+        # Les checkpoints de tous les graphs partagent la base : une table d'activité
+        # par graph, pour que les bornes d'un graph n'évincent pas les threads d'un autre
+        conn = _postgres_connection()
+        conn.row_factory = tuple_row
+        return ThreadActivity(conn, placeholder="%s", table=f"checkpoint_thread_activity_{name}")
+    raise ValueError(f"CHECKPOINT_BACKEND '{CHECKPOINT_BACKEND}' n'est pas supporté")
+
+
+def create_checkpointer(
+    name: str,
+    ttl_seconds: Optional[float] = None,
+    max_threads: Optional[int] = None,
+) -> BaseCheckpointSaver:
+    """
+    Crée le checkpointer d'un graph selon CHECKPOINT_BACKEND.
+
+    Args:
+        name (str): Nom du graph, utilisé pour le fichier SQLite ("<name>.sqlite").
+        ttl_seconds (float, optional): Durée d'inactivité au-delà de laquelle un thread est supprimé.
+        max_threads (int, optional): Nombre maximum de threads conservés (les plus récents).
+
+    Returns:
+        BaseCheckpointSaver: "sqlite" (défaut) et "postgres" sont durables,
+                             "memory" garde l'état dans le processus.
+    """
+    if CHECKPOINT_BACKEND == "memory":
+        saver = MemorySaver()
+    elif CHECKPOINT_BACKEND == "sqlite":
+        saver = _sqlite_saver(name)
+    elif CHECKPOINT_BACKEND == "postgres":
+        saver = _postgres_saver()
+    else:
+        raise ValueError(f"CHECKPOINT_BACKEND '{CHECKPOINT_BACKEND}' n'est pas supporté")
+
+    if ttl_seconds is None and max_threads is None:
+        return saver if CHECKPOINT_BACKEND == "memory" else ThreadedCheckpointSaver(saver)
+    return BoundedCheckpointSaver(saver, _thread_activity(name), ttl_seconds, max_threads)
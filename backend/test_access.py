@@ -0,0 +1,101 @@
+"""
+Tests des vérifications d'accès aux modules (AccessService) et de leur cache.
+"""
+import pytest
+
+from src.features.formations import access_cache as access_cache_module
+from src.features.formations import access_service as access_service_module
+from src.features.formations import progression_service as progression_service_module
+from src.features.formations.access_cache import AccessCache
+from src.features.formations.access_service import (
+    AccessService,
+    FORMATION_NOT_ASSIGNED,
+    MODULE_ACCESSIBLE,
+    MODULE_LOCKED,
+    MODULE_NOT_FOUND,
+)
+from src.features.formations.progression_cache import ProgressionCache
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+
+@pytest.fixture
+def caches(monkeypatch):
+    access_cache = AccessCache(ttl_seconds=60, max_entries=10)
+    monkeypatch.setattr(access_service_module, "access_cache", access_cache)
+    monkeypatch.setattr(progression_service_module, "progression_cache", ProgressionCache(60, 10))
+    return access_cache
+
+
+def _formation(db, formation_id, module_count):
+    module_ids = []
+    for index in range(module_count):
+        module = db.insert_row("modules", {"titre": f"Module {index}", "index": index})
+        db.insert_row("formation_modules", {"formation_id": formation_id, "module_id": module["id"]})
+        module_ids.append(module["id"])
+    return module_ids
+
+
+def test_resolve_modules(supabase, caches):
+    supabase.insert_row("profiles", {"id": USER_ID, "is_admin": False})
+    module_ids = _formation(supabase, 1, 2)
+    other_module_ids = _formation(supabase, 2, 1)
+    supabase.insert_row("user_formations", {"user_id": USER_ID, "formation_id": 1})
+
+    access = AccessService.resolve_modules(USER_ID, [*module_ids, *other_module_ids, 999])
+
+    assert access == {
+        module_ids[0]: MODULE_ACCESSIBLE,
+        module_ids[1]: MODULE_LOCKED,
+        other_module_ids[0]: FORMATION_NOT_ASSIGNED,
+        999: MODULE_NOT_FOUND,
+    }
+
+
+def test_warm_cache_only_reads_admin_status(supabase, caches):
+    supabase.insert_row("profiles", {"id": USER_ID, "is_admin": False})
+    module_ids = _formation(supabase, 1, 2)
+    supabase.insert_row("user_formations", {"user_id": USER_ID, "formation_id": 1})
+    AccessService.resolve_module(USER_ID, module_ids[0])
+
+    supabase.calls.clear()
+    assert AccessService.resolve_module(USER_ID, module_ids[0]) == MODULE_ACCESSIBLE
+    assert supabase.calls == [("profiles", "select")]
+
+
+def test_assignment_visible_after_invalidation(supabase, caches):
+    supabase.insert_row("profiles", {"id": USER_ID, "is_admin": False})
+    module_ids = _formation(supabase, 1, 1)
+    assert not AccessService.is_assigned(USER_ID, 1)
+
+    supabase.insert_row("user_formations", {"user_id": USER_ID, "formation_id": 1})
+    assert not AccessService.is_assigned(USER_ID, 1)
+
+    caches.invalidate_user(USER_ID)
+    assert AccessService.is_assigned(USER_ID, 1)
+    assert AccessService.resolve_module(USER_ID, module_ids[0]) == MODULE_ACCESSIBLE
+
+
+def test_demoted_admin_loses_access_immediately(supabase, caches):
+    profile = supabase.insert_row("profiles", {"id": USER_ID, "is_admin": True})
+    module_ids = _formation(supabase, 1, 1)
+    assert AccessService.resolve_module(USER_ID, module_ids[0]) == MODULE_ACCESSIBLE
+
+    profile["is_admin"] = False
+    assert AccessService.resolve_module(USER_ID, module_ids[0]) == FORMATION_NOT_ASSIGNED
+
+
+def test_cache_entries_expire_and_evict(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(access_cache_module.time, "monotonic", lambda: now[0])
+    cache = AccessCache(ttl_seconds=60, max_entries=2)
+
+    cache.put_module_formations(1, frozenset({10}))
+    cache.put_module_formations(2, frozenset({20}))
+    cache.get_module_formations(1)
+    cache.put_module_formations(3, frozenset({30}))
+    assert cache.get_module_formations(2) is None
+    assert cache.get_module_formations(1) == frozenset({10})
+
+    now[0] += 61
+    assert cache.get_module_formations(1) is None
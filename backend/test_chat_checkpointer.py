@@ -0,0 +1,81 @@
+"""
+Tests du checkpointer borné du chat creator (BoundedCheckpointSaver).
+"""
+import operator
+import sqlite3
+from typing import Annotated, List, TypedDict
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+
+from src.shared import checkpointer as checkpointer_module
+from src.shared.checkpointer import BoundedCheckpointSaver, ThreadActivity
+
+
+class CounterState(TypedDict):
+    steps: Annotated[List[int], operator.add]
+
+
+def _graph(saver):
+    workflow = StateGraph(CounterState)
+    workflow.add_node("step", lambda state: {"steps": [len(state["steps"])]})
+    workflow.add_edge(START, "step")
+    workflow.add_edge("step", END)
+    return workflow.compile(checkpointer=saver)
+
+
+def _config(thread_id):
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def _bounded(ttl_seconds=None, max_threads=None, sweep_interval=0):
+    activity = ThreadActivity(sqlite3.connect(":memory:", check_same_thread=False))
+    return BoundedCheckpointSaver(MemorySaver(), activity, ttl_seconds, max_threads, sweep_interval=sweep_interval)
+
+
+def test_threads_bounded_to_most_recent(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(checkpointer_module.time, "time", lambda: now[0])
+    saver = _bounded(max_threads=2)
+    graph = _graph(saver)
+
+    for thread_id in ["a", "b", "c"]:
+        now[0] += 1
+        graph.invoke({"steps": []}, _config(thread_id))
+
+    assert saver.get_tuple(_config("a")) is None
+    assert saver.get_tuple(_config("b")) is not None
+    assert saver.get_tuple(_config("c")) is not None
+
+
+def test_inactive_threads_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(checkpointer_module.time, "time", lambda: now[0])
+    saver = _bounded(ttl_seconds=60)
+    graph = _graph(saver)
+
+    graph.invoke({"steps": []}, _config("ancien"))
+    now[0] += 30
+    graph.invoke({"steps": []}, _config("récent"))
+    now[0] += 45
+
+    assert saver.sweep(force=True) == ["ancien"]
+    assert saver.get_tuple(_config("ancien")) is None
+    assert saver.get_tuple(_config("récent")) is not None
+
+
+def test_sweep_runs_at_most_once_per_interval(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(checkpointer_module.time, "time", lambda: now[0])
+    saver = _bounded(max_threads=1, sweep_interval=60)
+    graph = _graph(saver)
+
+    graph.invoke({"steps": []}, _config("a"))
+    now[0] += 1
+    graph.invoke({"steps": []}, _config("b"))
+    assert saver.get_tuple(_config("a")) is not None
+
+    now[0] += 60
+    graph.invoke({"steps": []}, _config("b"))
+    assert saver.get_tuple(_config("a")) is None
+    assert saver.activity.stale(None, 1) == []
@@ -0,0 +1,53 @@
+"""
+Tests du streaming du chat creator (ChatAPIHandler) : arrêt à la déconnexion du client.
+"""
+import asyncio
+
+from src.features.creator_agent import router as router_module
+from src.features.creator_agent.router import ChatAPIHandler
+
+
+class FakeGraph:
+    """Graph dont le stream produit des tokens sans fin et note sa fermeture."""
+
+    def __init__(self):
+        self.sent = 0
+        self.closed = False
+
+    async def astream(self, input, config, stream_mode):
+        try:
+            while True:
+                await asyncio.sleep(0)
+                self.sent += 1
+                yield "values", {"step": self.sent}
+        finally:
+            self.closed = True
+
+
+class FakeRequest:
+    """Client qui se déconnecte après `connected_checks` vérifications."""
+
+    def __init__(self, connected_checks):
+        self.connected_checks = connected_checks
+
+    async def is_disconnected(self):
+        self.connected_checks -= 1
+        return self.connected_checks < 0
+
+
+def test_client_disconnect_stops_the_graph_stream(monkeypatch):
+    graph = FakeGraph()
+    monkeypatch.setattr(router_module, "graph", graph)
+
+    async def consume():
+        chunks = [chunk async for chunk in ChatAPIHandler().create_async_generator("Bonjour", "user", FakeRequest(2))]
+        # Fermé avant la fin de la boucle d'événements, pas à son arrêt
+        assert graph.closed is True
+        return chunks
+
+    chunks = asyncio.run(consume())
+
+    assert len(chunks) == 2
+    # Le troisième événement est produit mais jamais envoyé, puis le stream du graph est fermé
+    assert graph.sent == 3
+    assert graph.closed is True
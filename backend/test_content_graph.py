@@ -0,0 +1,53 @@
+"""
+Tests du graph de génération de contenu, piloté par le LLM factice (conftest).
+"""
+import asyncio
+import uuid
+
+from langchain_core.runnables import RunnableLambda
+
+from conftest import COURSE_STRUCTURE
+from src.features.creator_agent.service.graph_generate_content import dispatch, graph
+from src.features.creator_agent.service.nodes import generate_lesson as generate_lesson_module
+from src.features.creator_agent.service.nodes.prepare_submodules import extract_all_submodules, module_bounds
+
+SUBMODULES = extract_all_submodules(COURSE_STRUCTURE)
+
+
+def test_module_bounds():
+    assert module_bounds(SUBMODULES, 0) == (0, 2)
+    assert module_bounds(SUBMODULES, 1) == (0, 2)
+    assert module_bounds(SUBMODULES, 2) == (2, 3)
+    assert module_bounds(SUBMODULES, 4) == (3, 5)
+
+
+def test_dispatch_sends_one_task_per_lesson_of_the_module():
+    result = dispatch({"submodules": SUBMODULES, "current_index": 0, "outputs": {}})
+
+    assert [(send.node, send.arg["submodule"]["lesson_id"]) for send in result] == [
+        ("generate_lesson", "lesson_1"),
+        ("generate_lesson", "lesson_2"),
+    ]
+
+
+def test_lessons_of_a_module_generated_concurrently(supabase, monkeypatch):
+    running = [0]
+    peak = [0]
+
+    async def generate(sub):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        return f"<p>{sub['lesson_id']}</p>"
+
+    monkeypatch.setattr(generate_lesson_module, "chain", RunnableLambda(generate))
+    config = {"configurable": {"thread_id": f"test_{uuid.uuid4()}"}, "max_concurrency": 5}
+
+    state = asyncio.run(graph.ainvoke({"course_structure": COURSE_STRUCTURE}, config))
+
+    # Les 2 leçons d'un module partent ensemble (avec le quiz du module précédent)
+    assert peak[0] == 2
+    assert sorted(key for key in state["outputs"] if key.startswith("lesson_")) == [
+        "lesson_1", "lesson_2", "lesson_3", "lesson_4", "lesson_5"
+    ]
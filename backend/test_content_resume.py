@@ -0,0 +1,102 @@
+"""
+Tests de la reprise des générations de contenu depuis leur checkpoint, et de la
+suppression des threads terminés.
+"""
+import asyncio
+import operator
+import sqlite3
+import uuid
+from typing import Annotated, List, TypedDict
+
+from langchain_core.runnables import RunnableLambda
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import END, START, StateGraph
+
+from conftest import COURSE_STRUCTURE
+from shared.config import CONTENT_GENERATION_MAX_THREADS, CONTENT_GENERATION_THREAD_TTL_SECONDS
+from src.features.creator_agent.service.graph_generate_content import dispatch, graph, release_thread
+from src.features.creator_agent.service.nodes import generate_lesson as generate_lesson_module
+from src.features.creator_agent.service.nodes.prepare_submodules import extract_all_submodules
+from src.shared.checkpointer import BoundedCheckpointSaver, ThreadedCheckpointSaver
+
+SUBMODULES = extract_all_submodules(COURSE_STRUCTURE)
+
+
+class CounterState(TypedDict):
+    steps: Annotated[List[int], operator.add]
+
+
+def _sends(result):
+    return [(send.node, send.arg.get("submodule", {}).get("lesson_id")) for send in result]
+
+
+def test_dispatch_skips_work_already_in_outputs():
+    outputs = {"lesson_1": "", "lesson_2": "", "quiz_module_1": "{}", "lesson_4": ""}
+
+    # Reprise : le quiz du module 1 et la leçon 4 existent déjà
+    result = dispatch({"submodules": SUBMODULES, "current_index": 3, "outputs": outputs})
+    assert _sends(result) == [("quiz", None), ("generate_lesson", "lesson_5")]
+    assert result[0].arg["current_index"] == 2
+
+    # Toutes les leçons du module existent : sauvegarde directe
+    outputs.update({"lesson_3": "", "quiz_module_2": "{}"})
+    result = dispatch({"submodules": SUBMODULES, "current_index": 2, "outputs": outputs})
+    assert [send.node for send in result] == ["save"]
+
+
+def test_resume_skips_generated_lessons(supabase, monkeypatch):
+    generated = []
+
+    def generate(sub):
+        generated.append(sub["lesson_id"])
+        return f"<p>{sub['lesson_id']}</p>"
+
+    monkeypatch.setattr(generate_lesson_module, "chain", RunnableLambda(generate))
+    config = {"configurable": {"thread_id": f"test_{uuid.uuid4()}"}}
+
+    async def run():
+        # Interruption après la sauvegarde du module 1, puis reprise du thread
+        await graph.ainvoke({"course_structure": COURSE_STRUCTURE}, config, interrupt_before=["loop"])
+        assert sorted(generated) == ["lesson_1", "lesson_2"]
+        return await graph.ainvoke(None, config)
+
+    state = asyncio.run(run())
+
+    assert sorted(generated) == ["lesson_1", "lesson_2", "lesson_3", "lesson_4", "lesson_5"]
+    assert state["outputs"]["lesson_5"] == "<p>lesson_5</p>"
+
+
+def test_threaded_saver_runs_async_graphs(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "graph.sqlite"), check_same_thread=False)
+    sqlite_saver = SqliteSaver(conn)
+    sqlite_saver.setup()
+    workflow = StateGraph(CounterState)
+    workflow.add_node("step", lambda state: {"steps": [len(state["steps"])]})
+    workflow.add_edge(START, "step")
+    workflow.add_edge("step", END)
+    counter_graph = workflow.compile(checkpointer=ThreadedCheckpointSaver(sqlite_saver))
+    config = {"configurable": {"thread_id": "t"}}
+
+    asyncio.run(counter_graph.ainvoke({"steps": []}, config))
+    result = asyncio.run(counter_graph.ainvoke({"steps": []}, config))
+
+    # Le second appel reprend l'état du thread enregistré par le premier
+    assert result["steps"] == [0, 1]
+
+
+def test_finished_generation_thread_is_released(supabase):
+    config = {"configurable": {"thread_id": f"test_{uuid.uuid4()}"}}
+
+    async def run():
+        await graph.ainvoke({"course_structure": COURSE_STRUCTURE}, config)
+        assert (await graph.aget_state(config)).values
+        await release_thread(config["configurable"]["thread_id"])
+        return await graph.aget_state(config)
+
+    assert asyncio.run(run()).values == {}
+
+
+def test_generation_checkpointer_is_bounded():
+    assert isinstance(graph.checkpointer, BoundedCheckpointSaver)
+    assert graph.checkpointer.ttl_seconds == CONTENT_GENERATION_THREAD_TTL_SECONDS
+    assert graph.checkpointer.max_threads == CONTENT_GENERATION_MAX_THREADS
@@ -0,0 +1,139 @@
+"""
+Tests du service des documents (ré-utilisation des extractions, texte des chunks).
+"""
+import hashlib
+import io
+import os
+from concurrent.futures import Future
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import UploadFile
+
+from src.features.documents import service as service_module
+from src.features.documents.service import DocumentService
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+OTHER_USER_ID = "00000000-0000-0000-0000-000000000002"
+FILE_CONTENT = b"contenu du fichier"
+
+
+@pytest.fixture
+def ingestions(monkeypatch):
+    """Remplace le pool d'extraction : enregistre les documents soumis."""
+    submitted = []
+
+    def submit_ingestion(path, content_type, document_id):
+        os.remove(path)
+        submitted.append(document_id)
+        return Future()
+
+    monkeypatch.setattr(service_module, "submit_ingestion", submit_ingestion)
+    return submitted
+
+
+def _extracted_document(db, profile_id):
+    document = db.insert_row("documents", {
+        "title": "Source",
+        "contents": "Aperçu",
+        "status": "ready",
+        "content_hash": hashlib.sha256(FILE_CONTENT).hexdigest(),
+        "profile_id": profile_id,
+        "created_at": "2024-01-01T00:00:00",
+    })
+    db.insert_row("document_chunks", {"document_id": document["id"], "chunk_index": 0, "content": "Texte"})
+    return document
+
+
+def _upload():
+    return DocumentService().create_document(USER_ID, "Copie", UploadFile(io.BytesIO(FILE_CONTENT), filename="f.txt"))
+
+
+def _copy_document_chunks(db, params):
+    chunks = [row for row in db.tables["document_chunks"] if row["document_id"] == params["p_source_id"]]
+    for row in chunks:
+        db.insert_row("document_chunks", {"document_id": params["p_target_id"], "chunk_index": row["chunk_index"], "content": row["content"]})
+    return len(chunks)
+
+
+def _with_created_at(db):
+    # created_at est rempli par la base
+    original = db.insert_row
+
+    def insert_row(table, row):
+        return original(table, {"created_at": "2024-01-01T00:00:00", **row})
+
+    db.insert_row = insert_row
+
+
+def test_reuses_own_extraction(supabase, ingestions):
+    _with_created_at(supabase)
+    source = _extracted_document(supabase, USER_ID)
+    supabase.rpc_handlers["copy_document_chunks"] = _copy_document_chunks
+
+    document = _upload()
+
+    assert document.status == "ready" and document.contents == "Aperçu"
+    assert supabase.rpc_calls == [("copy_document_chunks", {"p_source_id": source["id"], "p_target_id": document.id})]
+    assert ingestions == []
+    row = next(row for row in supabase.tables["documents"] if row["id"] == document.id)
+    assert row["status"] == "ready"
+
+
+def test_ignores_other_users_extraction(supabase, ingestions):
+    _with_created_at(supabase)
+    _extracted_document(supabase, OTHER_USER_ID)
+
+    document = _upload()
+
+    assert document.status == "processing"
+    assert supabase.rpc_calls == []
+    assert ingestions == [document.id]
+
+
+def test_failed_copy_falls_back_to_parsing(supabase, ingestions):
+    _with_created_at(supabase)
+    _extracted_document(supabase, USER_ID)
+
+    def failing_copy(db, params):
+        raise RuntimeError("copy failed")
+
+    supabase.rpc_handlers["copy_document_chunks"] = failing_copy
+
+    document = _upload()
+
+    assert document.status == "processing"
+    assert ingestions == [document.id]
+    row = next(row for row in supabase.tables["documents"] if row["id"] == document.id)
+    assert row["status"] == "processing"
+
+
+def test_full_contents_read_past_max_rows(supabase, monkeypatch):
+    _with_created_at(supabase)
+    monkeypatch.setattr(service_module, "DOCUMENT_CHUNK_PAGE_SIZE", 4)
+    supabase.max_rows = 4
+    document = _extracted_document(supabase, USER_ID)
+    for chunk_index in range(1, 10):
+        supabase.insert_row("document_chunks", {"document_id": document["id"], "chunk_index": chunk_index, "content": f"Texte {chunk_index}"})
+
+    contents = DocumentService().get_document(USER_ID, document["id"]).contents
+
+    assert contents.split("\n\n") == ["Texte"] + [f"Texte {i}" for i in range(1, 10)]
+
+
+def test_stale_processing_document_marked_failed(supabase):
+    _with_created_at(supabase)
+    stale = supabase.insert_row("documents", {"title": "Ancien", "status": "processing", "profile_id": USER_ID})
+    recent = supabase.insert_row("documents", {
+        "title": "Récent",
+        "status": "processing",
+        "profile_id": USER_ID,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    })
+    service = DocumentService()
+
+    status = service.get_document_status(USER_ID, stale["id"])
+    assert status.status == "failed" and status.error
+    assert supabase.tables["documents"][0]["status"] == "failed"
+
+    assert service.get_document_status(USER_ID, recent["id"]).status == "processing"
@@ -0,0 +1,58 @@
+"""
+Tests du chargement des quiz d'une formation (QuizService.get_formation_quizzes).
+"""
+import json
+
+import pytest
+
+from conftest import QUIZ_JSON, insert_quiz
+from src.features.quiz import service as quiz_service_module
+from src.features.quiz.quiz_cache import QuizCache
+from src.features.quiz.service import QuizService
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    cache = QuizCache(ttl_seconds=60, max_entries=10)
+    monkeypatch.setattr(quiz_service_module, "quiz_cache", cache)
+    return cache
+
+
+def _formation(db, formation_id, module_ids):
+    for module_id in module_ids:
+        db.insert_row("formation_modules", {"formation_id": formation_id, "module_id": module_id})
+
+
+def test_quizzes_follow_module_order_and_skip_modules_without_quiz(supabase):
+    _formation(supabase, 7, [3, 1, 2])
+    first_quiz_id = insert_quiz(supabase, 1, json.loads(QUIZ_JSON))
+    third_quiz_id = insert_quiz(supabase, 3, json.loads(QUIZ_JSON))
+
+    quizzes = QuizService.get_formation_quizzes(7)
+
+    assert [quiz["id"] for quiz in quizzes] == [third_quiz_id, first_quiz_id]
+    assert [quiz["module_id"] for quiz in quizzes] == [3, 1]
+    assert all(len(quiz["questions"]) == 3 for quiz in quizzes)
+    assert all(len(question["answers"]) == 2 for question in quizzes[0]["questions"])
+
+
+def test_modules_missing_from_cache_loaded_in_one_query(supabase):
+    _formation(supabase, 7, [1, 2, 3])
+    for module_id in [1, 2, 3]:
+        insert_quiz(supabase, module_id, json.loads(QUIZ_JSON))
+    QuizService.get_module_quiz(2)
+
+    supabase.calls.clear()
+    quizzes = QuizService.get_formation_quizzes(7)
+
+    assert [quiz["module_id"] for quiz in quizzes] == [1, 2, 3]
+    assert supabase.calls == [("formation_modules", "select"), ("quizzes", "select")]
+
+    # Tous les quiz sont maintenant en cache
+    supabase.calls.clear()
+    QuizService.get_formation_quizzes(7)
+    assert supabase.calls == [("formation_modules", "select")]
+
+
+def test_formation_without_modules(supabase):
+    assert QuizService.get_formation_quizzes(7) is None
@@ -0,0 +1,66 @@
+"""
+Tests du streaming des leçons (événements lesson_chunk du stream 'custom').
+"""
+import asyncio
+import uuid
+
+from langchain_core.messages import AIMessageChunk
+from langchain_core.runnables import RunnableLambda
+
+from src.features.creator_agent.service.graph_generate_content import graph
+from src.features.creator_agent.service.nodes import generate_lesson as generate_lesson_module
+
+STRUCTURE = {
+    "title": "Formation",
+    "modules": [
+        {
+            "id": "module_1",
+            "title": "Module 1",
+            "lessons": [
+                {"id": "lesson_1", "title": "Leçon 1", "description": "Première leçon"},
+                {"id": "lesson_2", "title": "Leçon 2", "description": "Deuxième leçon"},
+            ],
+        },
+    ],
+}
+
+
+def _stream(stream_mode):
+    async def run():
+        config = {"configurable": {"thread_id": f"test_{uuid.uuid4()}"}}
+        return [event async for event in graph.astream({"course_structure": STRUCTURE}, config, stream_mode=stream_mode)]
+    return asyncio.run(run())
+
+
+def _lesson_chunks(events):
+    chunks = {}
+    for mode, chunk in events:
+        if mode == "custom" and chunk.get("type") == "lesson_chunk":
+            chunks.setdefault(chunk["lesson_id"], []).append(chunk["chunk"])
+    return chunks
+
+
+def test_lesson_tokens_streamed_as_lesson_chunks(supabase):
+    events = _stream(["custom", "messages", "values"])
+    outputs = [chunk for mode, chunk in events if mode == "values"][-1]["outputs"]
+
+    chunks = _lesson_chunks(events)
+    assert set(chunks) == {"lesson_1", "lesson_2"}
+    for lesson_id, lesson_chunks in chunks.items():
+        assert len(lesson_chunks) > 1
+        assert "".join(lesson_chunks) == outputs[lesson_id]
+
+    # Les tokens du nœud generate_lesson sont des chunks (filtrés du SSE 'messages')
+    lesson_tokens = [
+        token for mode, (token, metadata) in (event for event in events if event[0] == "messages")
+        if metadata.get("langgraph_node") == "generate_lesson" and isinstance(token, AIMessageChunk)
+    ]
+    assert sum(len(token.content) for token in lesson_tokens) == len(outputs["lesson_1"]) + len(outputs["lesson_2"])
+
+
+def test_cached_lesson_sent_as_single_chunk(supabase, monkeypatch):
+    # Réponse du cache LLM : aucun token n'est émis
+    monkeypatch.setattr(generate_lesson_module, "chain", RunnableLambda(lambda sub: f"<p>{sub['lesson_id']}</p>"))
+
+    chunks = _lesson_chunks(_stream(["custom"]))
+    assert chunks == {"lesson_1": ["<p>lesson_1</p>"], "lesson_2": ["<p>lesson_2</p>"]}
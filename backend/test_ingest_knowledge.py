@@ -0,0 +1,96 @@
+"""
+Tests de la déduplication et du plafond des connaissances ingérées (ingest_knowledge).
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from src.features.creator_agent.service.nodes import ingest_knowledge as ingest_module
+from src.features.creator_agent.service.nodes.ingest_knowledge import ingest_knowledge
+from src.features.creator_agent.service.retrieval import cap_chunks, content_hash
+from src.features.documents.service import DocumentService
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+PAGE_ID = "0" * 31 + "1"
+PAGE_URL = f"https://www.notion.so/Page-{PAGE_ID}"
+
+
+def _words(count, prefix="mot"):
+    return " ".join(f"{prefix}{i}" for i in range(count))
+
+
+@pytest.fixture
+def sources(monkeypatch):
+    """Contenu des pages Notion et des documents mentionnés, sans Composio ni base."""
+    pages = {}
+    documents = []
+
+    async def fetch_notion_page(url, page_id, user_id, semaphore):
+        return [(f"notion:{page_id}", pages[page_id])], []
+
+    def resolve_mentions(self, user_id, content):
+        return [document for document in documents if f"@{document.title}" in content]
+
+    monkeypatch.setattr(ingest_module, "_fetch_notion_page", fetch_notion_page)
+    monkeypatch.setattr(DocumentService, "resolve_mentions", resolve_mentions)
+    return SimpleNamespace(pages=pages, documents=documents)
+
+
+def _ingest(content, **state):
+    return asyncio.run(ingest_knowledge({"messages": [HumanMessage(content=content)], "user_id": USER_ID, **state}))
+
+
+def test_cap_chunks_evicts_least_relevant_sources():
+    chunks = [
+        {"source": "sécurité", "text": "consignes de sécurité du bâtiment " + _words(100)},
+        {"source": "paie", "text": "calendrier de paie et bulletins de salaire " + _words(100, "p")},
+        {"source": "nouveau", "text": "glossaire interne " + _words(100, "g")},
+    ]
+
+    kept, evicted = cap_chunks(chunks, "bulletins de salaire", max_tokens=350, keep=["nouveau"])
+
+    assert evicted == {"sécurité"}
+    assert [chunk["source"] for chunk in kept] == ["paie", "nouveau"]
+
+
+def test_cap_chunks_under_budget_is_unchanged():
+    chunks = [{"source": "a", "text": "court"}]
+
+    assert cap_chunks(chunks, "requête", max_tokens=100) == (chunks, set())
+
+
+def test_same_content_under_another_source_is_skipped(sources):
+    sources.documents.append(SimpleNamespace(id=1, title="Guide", contents="guide d'accueil"))
+    first = _ingest("Résume @Guide")
+
+    # La page Notion a le même contenu que le document déjà ingéré
+    sources.pages[PAGE_ID] = "guide d'accueil"
+    second = _ingest(f"Compare avec {PAGE_URL}", **first)
+
+    assert second["knowledge_sources"] == {"document:1": content_hash("guide d'accueil")}
+    assert second["knowledge_chunks"] == [{"source": "document:1", "text": "guide d'accueil"}]
+
+
+def test_changed_source_replaces_its_chunks(sources):
+    sources.pages[PAGE_ID] = "ancienne version"
+    first = _ingest(f"Lis {PAGE_URL}")
+
+    sources.pages[PAGE_ID] = "nouvelle version"
+    second = _ingest(f"Relis {PAGE_URL}", **first)
+
+    assert second["knowledge_sources"] == {f"notion:{PAGE_ID}": content_hash("nouvelle version")}
+    assert second["knowledge_chunks"] == [{"source": f"notion:{PAGE_ID}", "text": "nouvelle version"}]
+
+
+def test_evicted_sources_leave_knowledge_sources(sources, monkeypatch):
+    monkeypatch.setattr(ingest_module, "KNOWLEDGE_MAX_TOKENS", 200)
+    sources.documents.append(SimpleNamespace(id=1, title="Sécurité", contents="consignes de sécurité " + _words(100)))
+    sources.documents.append(SimpleNamespace(id=2, title="Paie", contents="bulletins de salaire " + _words(100, "p")))
+    first = _ingest("Lis @Sécurité")
+
+    second = _ingest("Explique les bulletins de salaire de @Paie", **first)
+
+    assert list(second["knowledge_sources"]) == ["document:2"]
+    assert {chunk["source"] for chunk in second["knowledge_chunks"]} == {"document:2"}
@@ -0,0 +1,39 @@
+"""
+Tests de la sélection des connaissances injectées dans le prompt (chunks, BM25).
+"""
+from src.features.creator_agent.service.retrieval import chunk_text, select_chunks
+
+
+def _words(count, prefix="mot"):
+    return " ".join(f"{prefix}{i}" for i in range(count))
+
+
+def test_chunk_text_sliding_windows():
+    chunks = chunk_text(_words(10), chunk_words=4, overlap=1)
+
+    assert chunks == ["mot0 mot1 mot2 mot3", "mot3 mot4 mot5 mot6", "mot6 mot7 mot8 mot9"]
+
+
+def test_chunk_text_short_and_empty_texts():
+    assert chunk_text("deux mots", chunk_words=4, overlap=1) == ["deux mots"]
+    assert chunk_text("   ", chunk_words=4, overlap=1) == []
+
+
+def test_select_chunks_keeps_document_order():
+    chunks = [
+        {"source": "a", "text": "onboarding des nouveaux employés"},
+        {"source": "a", "text": "politique de remboursement des frais"},
+        {"source": "b", "text": "congés payés et remboursement des frais de transport"},
+        {"source": "b", "text": "organigramme de l'entreprise"},
+    ]
+
+    selected = select_chunks(chunks, "remboursement des frais", 2)
+
+    assert selected == [chunks[1], chunks[2]]
+
+
+def test_select_chunks_without_match_uses_first_chunks():
+    chunks = [{"source": "a", "text": f"section {i}"} for i in range(5)]
+
+    assert select_chunks(chunks, "ok, vas-y", 2) == chunks[:2]
+    assert select_chunks(chunks[:2], "ok", 3) == chunks[:2]
@@ -0,0 +1,77 @@
+"""
+Tests de la sauvegarde groupée des leçons (buffer d'écriture) du graph de génération.
+"""
+import asyncio
+import uuid
+
+import pytest
+
+from conftest import COURSE_STRUCTURE
+from src.features.creator_agent.service.graph_generate_content import graph
+from src.features.creator_agent.service.nodes import save_to_supabase as save_module
+
+
+def _lesson_batches(supabase):
+    return [
+        [row["id"] for row in params["p_lessons"]]
+        for name, params in supabase.rpc_calls if name == "update_submodules_content"
+    ]
+
+
+def _formation(supabase):
+    supabase.insert_row("formations", {"id": 9, "has_content": False})
+    supabase.insert_row("formation_modules", {"formation_id": 9, "module_id": 1})
+
+
+def test_generation_saves_lessons_in_batches(supabase, monkeypatch):
+    monkeypatch.setattr(save_module, "LESSON_SAVE_BATCH_SIZE", 2)
+    _formation(supabase)
+    thread_id = f"test_{uuid.uuid4()}"
+
+    state = asyncio.run(graph.ainvoke({"course_structure": COURSE_STRUCTURE}, {"configurable": {"thread_id": thread_id}}))
+
+    # Module 1 atteint le seuil ; module 2 attend ; module 3 vide le buffer
+    assert _lesson_batches(supabase) == [[1, 2], [3, 4, 5]]
+    assert sorted(state["saved_lessons"]) == ["lesson_1", "lesson_2", "lesson_3", "lesson_4", "lesson_5"]
+
+    quiz_saves = [params for name, params in supabase.rpc_calls if name == "save_module_quiz"]
+    assert sorted(params["p_module_id"] for params in quiz_saves) == [1, 2, 3]
+    assert {params["p_generation_key"] for params in quiz_saves} == {thread_id}
+
+    assert supabase.tables["formations"][0]["has_content"] is True
+
+
+def test_finalize_flushes_remaining_lessons(supabase, monkeypatch):
+    monkeypatch.setattr(save_module, "LESSON_SAVE_BATCH_SIZE", 50)
+    _formation(supabase)
+
+    asyncio.run(graph.ainvoke({"course_structure": COURSE_STRUCTURE}, {"configurable": {"thread_id": f"test_{uuid.uuid4()}"}}))
+
+    assert _lesson_batches(supabase) == [[1, 2, 3, 4, 5]]
+
+
+def test_failed_final_flush_keeps_generation_resumable(supabase, monkeypatch):
+    monkeypatch.setattr(save_module, "LESSON_SAVE_BATCH_SIZE", 50)
+    _formation(supabase)
+    config = {"configurable": {"thread_id": f"test_{uuid.uuid4()}"}}
+
+    def unavailable(db, params):
+        raise ConnectionError("base indisponible")
+
+    supabase.rpc_handlers["update_submodules_content"] = unavailable
+    with pytest.raises(RuntimeError):
+        asyncio.run(graph.ainvoke({"course_structure": COURSE_STRUCTURE}, config))
+
+    assert supabase.tables["formations"][0]["has_content"] is False
+    snapshot = asyncio.run(graph.aget_state(config))
+    assert snapshot.next == ("finalize",)
+
+    # La reprise ne refait que la sauvegarde et la finalisation
+    del supabase.rpc_handlers["update_submodules_content"]
+    supabase.rpc_calls.clear()
+    state = asyncio.run(graph.ainvoke(None, config))
+
+    assert _lesson_batches(supabase) == [[1, 2, 3, 4, 5]]
+    assert [name for name, _ in supabase.rpc_calls] == ["update_submodules_content"]
+    assert sorted(state["saved_lessons"]) == ["lesson_1", "lesson_2", "lesson_3", "lesson_4", "lesson_5"]
+    assert supabase.tables["formations"][0]["has_content"] is True
@@ -0,0 +1,42 @@
+"""
+Tests du cache des réponses LLM de la génération de contenu (SQLiteLRUCache).
+"""
+import time
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from shared.llm_cache import SQLiteLRUCache
+
+
+def _generation(text):
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+def test_llm_cache_evicts_least_recently_read(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = SQLiteLRUCache(str(tmp_path / "llm_cache.sqlite"), max_entries=2)
+
+    for prompt in ["a", "b"]:
+        now[0] += 1
+        cache.update(prompt, "model", _generation(prompt))
+    now[0] += 1
+    assert cache.lookup("a", "model")[0].message.content == "a"
+    now[0] += 1
+    cache.update("c", "model", _generation("c"))
+
+    assert cache.lookup("b", "model") is None
+    assert cache.lookup("a", "model") is not None
+    assert cache.lookup("c", "model") is not None
+    assert cache.stats()["entries"] == 2
+
+
+def test_llm_cache_keyed_by_model_and_prompt(tmp_path):
+    cache = SQLiteLRUCache(str(tmp_path / "llm_cache.sqlite"))
+    cache.update("prompt", "model-a", _generation("réponse"))
+
+    assert cache.lookup("prompt", "model-b") is None
+    assert cache.lookup("autre prompt", "model-a") is None
+    assert cache.lookup("prompt", "model-a")[0].message.content == "réponse"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
@@ -0,0 +1,57 @@
+"""
+Tests de la résolution des @-mentions de documents (MentionIndex, DocumentService).
+"""
+import pytest
+
+from src.features.documents import service as service_module
+from src.features.documents.mention_index import MentionIndex, MentionIndexCache
+from src.features.documents.service import DocumentService
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+
+@pytest.fixture
+def index_cache(monkeypatch):
+    cache = MentionIndexCache(ttl_seconds=60)
+    monkeypatch.setattr(service_module, "mention_index_cache", cache)
+    return cache
+
+
+def _document(db, title, contents, profile_id):
+    db.insert_row("documents", {
+        "title": title,
+        "contents": contents,
+        "profile_id": profile_id,
+        "created_at": "2024-01-01T00:00:00",
+    })
+
+
+def test_mention_index_prefers_longest_title():
+    index = MentionIndex([(1, "final"), (2, "final-report"), (3, "Budget 2024")])
+
+    assert index.find("Compare @final-report avec @Budget 2024 et @final.") == [2, 3, 1]
+
+
+def test_mention_index_ignores_unknown_and_repeated_mentions():
+    index = MentionIndex([(1, "guide"), (2, "")])
+
+    assert index.find("@inconnu, @guide puis encore @guide") == [1]
+    assert index.find("aucune mention") == []
+
+
+def test_resolve_mentions_loads_only_mentioned_documents(supabase, index_cache):
+    for title in ["Guide", "Budget", "Non mentionné"]:
+        _document(supabase, title, f"Contenu {title}", USER_ID)
+    _document(supabase, "Guide", "Autre", "autre")
+    service = DocumentService()
+
+    documents = service.resolve_mentions(USER_ID, "Résume @Budget puis @Guide")
+
+    assert [document.title for document in documents] == ["Budget", "Guide"]
+    assert [document.contents for document in documents] == ["Contenu Budget", "Contenu Guide"]
+
+    # L'index des titres est en cache : seul le document mentionné est relu
+    supabase.calls.clear()
+    assert [document.id for document in service.resolve_mentions(USER_ID, "@Guide")] == [1]
+    assert supabase.calls.count(("documents", "select")) == 1
+    assert service.resolve_mentions(USER_ID, "aucune mention") == []
@@ -0,0 +1,79 @@
+"""
+Tests de la récupération des pages Notion dans ingest_knowledge (concurrence,
+délai dépassé, cache des pages).
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from src.composio_client import APITimeoutError
+from src.features.creator_agent.service.nodes import ingest_knowledge as ingest_module
+from src.features.creator_agent.service.nodes.ingest_knowledge import NotionPageCache, ingest_knowledge
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+PAGE_IDS = [f"{index:032x}" for index in range(1, 6)]
+
+
+@pytest.fixture
+def page_cache(monkeypatch):
+    cache = NotionPageCache(ttl_seconds=60)
+    monkeypatch.setattr(ingest_module, "notion_page_cache", cache)
+    return cache
+
+
+def _ingest(page_ids):
+    urls = " ".join(f"https://www.notion.so/Page-{page_id}" for page_id in page_ids)
+    state = {"messages": [HumanMessage(content=f"Utilise {urls}")], "user_id": USER_ID}
+    return asyncio.run(ingest_knowledge(state))
+
+
+def test_fetches_bounded_by_concurrency_limit(page_cache, monkeypatch):
+    monkeypatch.setattr(ingest_module, "NOTION_FETCH_CONCURRENCY", 2)
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def execute(slug, user_id, arguments):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return f"contenu de la page {arguments['block_id']}"
+
+    monkeypatch.setattr(ingest_module.composio_fetch.tools, "execute", execute)
+    result = _ingest(PAGE_IDS)
+
+    assert peak[0] == 2
+    assert sorted(result["knowledge_sources"]) == sorted(f"notion:{page_id}" for page_id in PAGE_IDS)
+
+
+def test_timed_out_fetch_is_reported(page_cache, monkeypatch):
+    def execute(slug, user_id, arguments):
+        raise APITimeoutError("délai dépassé")
+
+    monkeypatch.setattr(ingest_module.composio_fetch.tools, "execute", execute)
+    result = _ingest(PAGE_IDS[:1])
+
+    assert result["knowledge"] == f"Timed out fetching content for https://www.notion.so/Page-{PAGE_IDS[0]}."
+    assert result["knowledge_sources"] == {}
+    assert page_cache.get(USER_ID, PAGE_IDS[0]) is None
+
+
+def test_cached_page_is_not_fetched_again(page_cache, monkeypatch):
+    fetched = []
+
+    def execute(slug, user_id, arguments):
+        fetched.append(arguments["block_id"])
+        return "contenu de la page"
+
+    monkeypatch.setattr(ingest_module.composio_fetch.tools, "execute", execute)
+    _ingest(PAGE_IDS[:1])
+    result = _ingest(PAGE_IDS[:1])
+
+    assert fetched == PAGE_IDS[:1]
+    assert list(result["knowledge_sources"]) == [f"notion:{PAGE_IDS[0]}"]
@@ -0,0 +1,155 @@
+"""
+Tests de la progression séquentielle (ProgressionService) et de son cache.
+"""
+import pytest
+
+from src.features.formations import progression_cache as progression_cache_module
+from src.features.formations import progression_service as progression_service_module
+from src.features.formations.progression_cache import ProgressionCache, RedisProgressionCache
+from src.features.formations.progression_service import ProgressionService
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ProgressionCache(ttl_seconds=60, max_entries=10)
+    monkeypatch.setattr(progression_service_module, "progression_cache", cache)
+    return cache
+
+
+def _formation(db, formation_id, module_count):
+    module_ids = []
+    for index in range(module_count):
+        module = db.insert_row("modules", {"titre": f"Module {index}", "index": index})
+        db.insert_row("formation_modules", {"formation_id": formation_id, "module_id": module["id"]})
+        module_ids.append(module["id"])
+    return module_ids
+
+
+def _put(cache, user_id, formation_id, progression):
+    cache.put(user_id, formation_id, progression, cache.version(user_id, formation_id))
+
+
+def _pass(db, module_id):
+    db.insert_row("user_module_progress", {"user_id": USER_ID, "module_id": module_id, "passed": True})
+
+
+def test_modules_unlock_sequentially(supabase, cache):
+    module_ids = _formation(supabase, 1, 3)
+    _pass(supabase, module_ids[0])
+
+    progression = ProgressionService.get_progression(USER_ID, 1)
+
+    assert progression["accessible_modules"] == module_ids[:2]
+    assert progression["completed_modules"] == module_ids[:1]
+    assert progression["summary"]["progress_percentage"] == 33
+
+
+def test_progression_cached_until_user_invalidated(supabase, cache):
+    module_ids = _formation(supabase, 1, 3)
+    assert ProgressionService.get_accessible_modules(USER_ID, 1) == module_ids[:1]
+
+    _pass(supabase, module_ids[0])
+    supabase.calls.clear()
+    assert ProgressionService.get_accessible_modules(USER_ID, 1) == module_ids[:1]
+    assert supabase.calls == []
+
+    ProgressionService.invalidate_user(USER_ID)
+    assert ProgressionService.get_accessible_modules(USER_ID, 1) == module_ids[:2]
+
+
+def test_module_change_invalidates_its_formations(supabase, cache):
+    module_ids = _formation(supabase, 1, 2)
+    ProgressionService.get_progression(USER_ID, 1)
+
+    ProgressionService.invalidate_module_formations(module_ids[1])
+    assert cache.get(USER_ID, 1) is None
+
+
+def test_cached_progression_cannot_be_mutated(supabase, cache):
+    module_ids = _formation(supabase, 1, 2)
+
+    progression = ProgressionService.get_progression(USER_ID, 1)
+    progression["accessible_modules"].append(999)
+    progression["summary"]["total_modules"] = 0
+
+    cached = ProgressionService.get_progression(USER_ID, 1)
+    assert cached["accessible_modules"] == module_ids[:1]
+    assert cached["summary"]["total_modules"] == 2
+
+
+def test_cache_expires_and_evicts(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(progression_cache_module.time, "monotonic", lambda: now[0])
+    cache = ProgressionCache(ttl_seconds=60, max_entries=2)
+
+    _put(cache, USER_ID, 1, {"accessible_modules": [1]})
+    _put(cache, USER_ID, 2, {"accessible_modules": [2]})
+    cache.get(USER_ID, 1)
+    _put(cache, USER_ID, 3, {"accessible_modules": [3]})
+    assert cache.get(USER_ID, 2) is None
+    assert cache.get(USER_ID, 1) == {"accessible_modules": [1]}
+
+    now[0] += 61
+    assert cache.get(USER_ID, 1) is None
+
+
+def test_invalidate_formation_keeps_other_formations():
+    cache = ProgressionCache(ttl_seconds=60, max_entries=10)
+    _put(cache, USER_ID, 1, {})
+    _put(cache, USER_ID, 2, {})
+    _put(cache, "other", 1, {})
+
+    cache.invalidate_formation(1)
+    assert cache.get(USER_ID, 1) is None and cache.get("other", 1) is None
+    assert cache.get(USER_ID, 2) == {}
+
+
+def test_progression_invalidated_during_computation_is_not_cached(supabase, cache, monkeypatch):
+    module_ids = _formation(supabase, 1, 2)
+    load_passed_modules = ProgressionService._load_passed_modules
+
+    def load_then_pass(user_id, ids):
+        # La tentative réussie est enregistrée après la lecture de la projection
+        passed = load_passed_modules(user_id, ids)
+        _pass(supabase, module_ids[0])
+        ProgressionService.invalidate_user(user_id)
+        return passed
+
+    monkeypatch.setattr(ProgressionService, "_load_passed_modules", staticmethod(load_then_pass))
+    assert ProgressionService.get_accessible_modules(USER_ID, 1) == module_ids[:1]
+    assert cache.get(USER_ID, 1) is None
+
+    monkeypatch.setattr(ProgressionService, "_load_passed_modules", staticmethod(load_passed_modules))
+    assert ProgressionService.get_accessible_modules(USER_ID, 1) == module_ids
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def mget(self, *keys):
+        return [self.values.get(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key) or 0) + 1
+
+
+def test_redis_put_after_invalidation_is_never_read():
+    cache = RedisProgressionCache.__new__(RedisProgressionCache)
+    cache.client, cache.ttl_seconds = FakeRedis(), 60
+
+    version = cache.version(USER_ID, 1)
+    cache.invalidate_formation(1)
+    cache.put(USER_ID, 1, {"accessible_modules": [1]}, version)
+    assert cache.get(USER_ID, 1) is None
+
+    _put(cache, USER_ID, 1, {"accessible_modules": [1, 2]})
+    assert cache.get(USER_ID, 1) == {"accessible_modules": [1, 2]}
@@ -0,0 +1,122 @@
+"""
+Tests des quiz : cache des quiz compilés (QuizCache) et lecteurs (QuizService).
+"""
+import json
+
+import pytest
+
+from conftest import QUIZ_JSON, insert_quiz
+from src.features.quiz import quiz_cache as quiz_cache_module
+from src.features.quiz import service as quiz_service_module
+from src.features.quiz.quiz_cache import QuizCache, compile_quiz
+from src.features.quiz.service import QuizService
+from src.features.creator_agent.service.nodes import save_quiz_to_supabase as save_quiz_module
+from src.features.creator_agent.service.nodes.save_quiz_to_supabase import save_quiz_to_supabase
+
+
+def _save_module_quiz(db, params):
+    return insert_quiz(db, params["p_module_id"], params["p_quiz"], params.get("p_generation_key"))
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = QuizCache(ttl_seconds=60, max_entries=10)
+    monkeypatch.setattr(quiz_service_module, "quiz_cache", cache)
+    monkeypatch.setattr(save_quiz_module, "quiz_cache", cache)
+    return cache
+
+
+def _compiled(quiz_id, module_id=1):
+    return compile_quiz({"id": quiz_id, "module_id": module_id, "quiz_questions": []})
+
+
+def test_module_quiz_served_from_cache(supabase, cache):
+    quiz_id = insert_quiz(supabase, 1, json.loads(QUIZ_JSON))
+
+    quiz = QuizService.get_module_quiz(1)
+    assert quiz["id"] == quiz_id
+    assert [question["order_index"] for question in quiz["questions"]] == [0, 1, 2]
+
+    supabase.calls.clear()
+    assert QuizService.get_module_quiz(1)["id"] == quiz_id
+    assert supabase.calls == []
+
+
+def test_regenerated_quiz_replaces_cached_active_quiz(supabase, cache):
+    supabase.rpc_handlers["save_module_quiz"] = _save_module_quiz
+    supabase.insert_row("formation_modules", {"formation_id": 7, "module_id": 1})
+    old_quiz_id = insert_quiz(supabase, 1, json.loads(QUIZ_JSON))
+    assert QuizService.get_module_quiz(1)["id"] == old_quiz_id
+
+    state = {
+        "submodules": [{"module_id": "module_1"}],
+        "current_index": 0,
+        "outputs": {"quiz_module_1": QUIZ_JSON},
+    }
+    save_quiz_to_supabase(state, generation_key="thread-1")
+
+    new_quiz = QuizService.get_module_quiz(1)
+    assert new_quiz["id"] != old_quiz_id
+    assert [row["id"] for row in supabase.tables["quizzes"] if row["is_active"]] == [new_quiz["id"]]
+    # L'ancien quiz reste lisible par id (tentatives en cours), rechargé comme inactif
+    assert QuizService.get_compiled_quiz(old_quiz_id)["quiz"]["is_active"] is False
+
+
+def test_resumed_save_keeps_active_quiz(supabase, cache):
+    supabase.rpc_handlers["save_module_quiz"] = _save_module_quiz
+    state = {
+        "submodules": [{"module_id": "module_1"}],
+        "current_index": 0,
+        "outputs": {"quiz_module_1": QUIZ_JSON},
+    }
+
+    save_quiz_to_supabase(state, generation_key="thread-1")
+    quiz_id = QuizService.get_module_quiz(1)["id"]
+    save_quiz_to_supabase(state, generation_key="thread-1")
+
+    assert QuizService.get_module_quiz(1)["id"] == quiz_id
+    assert len(supabase.tables["quizzes"]) == 1
+
+
+def test_lru_evicts_least_recently_used_quiz():
+    cache = QuizCache(ttl_seconds=60, max_entries=2)
+    cache.put(_compiled(1))
+    cache.put(_compiled(2))
+    cache.get(1)
+    cache.put(_compiled(3))
+
+    assert cache.get(2) is None
+    assert cache.get(1) is not None and cache.get(3) is not None
+
+
+def test_invalidate_quiz_drops_module_pointer():
+    cache = QuizCache(ttl_seconds=60, max_entries=10)
+    cache.put(_compiled(1, module_id=5), active=True)
+    assert cache.get_module_quiz(5)["quiz"]["id"] == 1
+
+    cache.invalidate_quiz(1)
+    assert cache.get(1) is None
+    assert cache.get_module_quiz(5) is None
+
+
+def test_invalidate_module_drops_previous_active_quiz():
+    cache = QuizCache(ttl_seconds=60, max_entries=10)
+    cache.put(_compiled(1, module_id=5), active=True)
+    cache.put(_compiled(2, module_id=6))
+
+    cache.invalidate_module(5)
+    assert cache.get_module_quiz(5) is None
+    assert cache.get(1) is None
+    assert cache.get(2) is not None
+
+
+def test_module_pointer_expires(monkeypatch):
+    cache = QuizCache(ttl_seconds=60, max_entries=10)
+    now = [1000.0]
+    monkeypatch.setattr(quiz_cache_module.time, "monotonic", lambda: now[0])
+    cache.put(_compiled(1, module_id=5), active=True)
+
+    now[0] += 61
+    assert cache.get_module_quiz(5) is None
+    # Le quiz compilé reste en cache (il n'est jamais modifié)
+    assert cache.get(1) is not None
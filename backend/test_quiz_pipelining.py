@@ -0,0 +1,37 @@
+"""
+Tests du pipelining des quiz : le quiz d'un module part avec les leçons du module suivant.
+"""
+from conftest import COURSE_STRUCTURE
+from src.features.creator_agent.service.graph_generate_content import dispatch
+from src.features.creator_agent.service.nodes.prepare_submodules import extract_all_submodules
+
+SUBMODULES = extract_all_submodules(COURSE_STRUCTURE)
+
+
+def _sends(result):
+    return [(send.node, send.arg.get("submodule", {}).get("lesson_id")) for send in result]
+
+
+def test_dispatch_pipelines_quiz_with_next_module_lessons():
+    state = {
+        "submodules": SUBMODULES,
+        "current_index": 2,
+        "outputs": {"lesson_1": "<p>1</p>", "lesson_2": "<p>2</p>"},
+    }
+
+    result = dispatch(state)
+
+    assert _sends(result) == [("quiz", None), ("generate_lesson", "lesson_3")]
+    quiz_task = result[0].arg
+    assert quiz_task["current_index"] == 0
+    assert quiz_task["outputs"] == {"lesson_1": "<p>1</p>", "lesson_2": "<p>2</p>"}
+
+
+def test_dispatch_ends_with_last_quiz_then_finalize():
+    outputs = {sub["lesson_id"]: "" for sub in SUBMODULES}
+
+    result = dispatch({"submodules": SUBMODULES, "current_index": 5, "outputs": outputs})
+    assert _sends(result) == [("quiz", None)]
+
+    outputs["quiz_module_3"] = "{}"
+    assert dispatch({"submodules": SUBMODULES, "current_index": 5, "outputs": outputs}) == "finalize"
@@ -0,0 +1,126 @@
+"""
+Tests de la soumission des quiz : notation ensembliste (QuizService.grade) et /quiz/submit.
+"""
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from conftest import QUIZ_JSON, insert_quiz
+from src.features.formations.access_service import AccessService, MODULE_ACCESSIBLE, MODULE_LOCKED
+from src.features.formations.progression_service import ProgressionService
+from src.features.quiz import service as quiz_service_module
+from src.features.quiz.quiz_cache import QuizCache
+from src.features.quiz.router import submit_quiz
+from src.features.quiz.service import QuizService
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+
+ANSWER_KEY = {
+    10: {"points": 1, "correct_answer_ids": frozenset({100})},
+    11: {"points": 2, "correct_answer_ids": frozenset({110, 111})},
+}
+
+
+def test_grade_scores_exact_answer_sets():
+    grading = QuizService.grade(ANSWER_KEY, [
+        {"question_id": 10, "selected_answer_ids": [100]},
+        {"question_id": 11, "selected_answer_ids": [110]},
+    ])
+
+    assert grading["score"] == 1 and grading["max_score"] == 3
+    assert [response["is_correct"] for response in grading["responses"]] == [True, False]
+
+
+def test_grade_ignores_unknown_and_repeated_questions():
+    grading = QuizService.grade(ANSWER_KEY, [
+        {"question_id": 11, "selected_answer_ids": [111, 110]},
+        {"question_id": 11, "selected_answer_ids": []},
+        {"question_id": 99, "selected_answer_ids": [1]},
+    ])
+
+    assert grading["score"] == 2 and grading["max_score"] == 2
+    assert grading["responses"] == [
+        {"question_id": 11, "selected_answer_ids": [111, 110], "is_correct": True, "points_earned": 2}
+    ]
+
+
+@pytest.fixture
+def quiz(supabase, monkeypatch):
+    """Quiz de 3 questions (bonnes réponses : 1, 3 et 5) d'un module accessible."""
+    monkeypatch.setattr(quiz_service_module, "quiz_cache", QuizCache(ttl_seconds=60, max_entries=10))
+    monkeypatch.setattr(AccessService, "resolve_module", staticmethod(lambda user_id, module_id: MODULE_ACCESSIBLE))
+    return insert_quiz(supabase, 4, json.loads(QUIZ_JSON))
+
+
+@pytest.fixture
+def invalidated(monkeypatch):
+    users = []
+    monkeypatch.setattr(ProgressionService, "invalidate_user", staticmethod(users.append))
+    return users
+
+
+def _attempt(attempt_id, attempt_number):
+    return lambda db, params: [{"attempt_id": attempt_id, "attempt_number": attempt_number}]
+
+
+def _submit(quiz_id, selected):
+    answers = [
+        {"question_id": question_id, "selected_answer_ids": [answer_id]}
+        for question_id, answer_id in zip([1, 2, 3], selected)
+    ]
+    return asyncio.run(submit_quiz({"quiz_id": quiz_id, "answers": answers}, current_user={"sub": USER_ID}))
+
+
+def test_passed_attempt_is_saved_and_invalidates_progression(supabase, quiz, invalidated):
+    supabase.rpc_handlers["submit_quiz_attempt"] = _attempt(10, 1)
+
+    result = _submit(quiz, [1, 3, 5])
+
+    assert result["passed"] is True and result["score"] == 3 and result["attempt_number"] == 1
+    [(name, params)] = supabase.rpc_calls
+    assert name == "submit_quiz_attempt"
+    assert {key: value for key, value in params.items() if key != "p_responses"} == {
+        "p_user_id": USER_ID,
+        "p_quiz_id": quiz,
+        "p_module_id": 4,
+        "p_score": 3,
+        "p_max_score": 3,
+        "p_passed": True,
+        "p_max_attempts": 3,
+    }
+    assert [response["is_correct"] for response in params["p_responses"]] == [True, True, True]
+    assert invalidated == [USER_ID]
+
+
+def test_failed_attempt_keeps_cached_progression(supabase, quiz, invalidated):
+    supabase.rpc_handlers["submit_quiz_attempt"] = _attempt(10, 2)
+
+    result = _submit(quiz, [1, 4, 6])
+
+    assert result["passed"] is False and result["score"] == 1
+    assert supabase.rpc_calls[0][1]["p_passed"] is False
+    assert invalidated == []
+
+
+def test_attempt_over_the_limit_is_rejected(supabase, quiz, invalidated):
+    supabase.rpc_handlers["submit_quiz_attempt"] = _attempt(None, 4)
+
+    with pytest.raises(HTTPException) as error:
+        _submit(quiz, [1, 3, 5])
+
+    assert error.value.status_code == 400
+    assert "Nombre maximum de tentatives atteint (3)" in error.value.detail
+    assert invalidated == []
+
+
+def test_locked_module_is_not_graded(supabase, quiz, invalidated, monkeypatch):
+    monkeypatch.setattr(AccessService, "resolve_module", staticmethod(lambda user_id, module_id: MODULE_LOCKED))
+
+    with pytest.raises(HTTPException) as error:
+        _submit(quiz, [1, 3, 5])
+
+    assert error.value.status_code == 403
+    assert supabase.rpc_calls == []